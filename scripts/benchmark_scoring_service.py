@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for scoring_service.py on localhost
+
+Starts the service in-process (or targets --url), replays contacts over
+keep-alive connections from several client threads and reports p50/p95/p99
+latency for single and batch scoring against the 5 ms p99 target.
+"""
+
+import argparse
+import csv
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+from scoring_service import HUBSPOT_FIELDS, make_server
+
+P99_TARGET_MS = 5.0
+
+SAMPLE_CONTACTS = [
+    {'First Name': 'Greg', 'Last Name': 'Pedro', 'Specialty': 'Prosthodontist', 'State/Region': 'NY',
+     'City': 'New York', 'HubSpot Score': '182', 'Number of Sales Activities': '64',
+     'Email': 'greg@example.com', 'Mobile Phone Number': '917-555-0100',
+     'Notes': 'Ready to buy Yomi, wants full arch digital workflow. Early adopter.'},
+    {'first_name': 'Ana', 'last_name': 'Lopez', 'specialty': 'General Dentist', 'state': 'TX',
+     'hubspot_score': 128, 'sales_touches': 3, 'notes': 'small practice, interested in itero scanner'},
+    {'First Name': 'Sam', 'Last Name': 'Kim', 'Specialty': 'Periodontist', 'State/Region': 'CA',
+     'HubSpot Score': '155', 'Number of Sales Activities': '22', 'Notes': 'demo requested for CBCT'},
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def load_contacts(path, limit):
+    with open(path, 'r', encoding='utf-8') as f:
+        contacts = []
+        for row in csv.DictReader(f):
+            contacts.append({k: row.get(k, '') for k in HUBSPOT_FIELDS})
+            if len(contacts) >= limit:
+                break
+    return contacts
+
+
+def run_client(host, port, path, bodies, latencies, lock):
+    conn = http.client.HTTPConnection(host, port)
+    local = []
+    headers = {'Content-Type': 'application/json'}
+    for body in bodies:
+        start = time.perf_counter()
+        conn.request('POST', path, body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        local.append((time.perf_counter() - start) * 1000)
+        if response.status != 200:
+            raise RuntimeError(f"{path} returned {response.status}")
+    conn.close()
+    with lock:
+        latencies.extend(local)
+
+
+def benchmark(host, port, path, bodies, clients):
+    latencies = []
+    lock = threading.Lock()
+    per_client = [bodies[i::clients] for i in range(clients)]
+    threads = [threading.Thread(target=run_client, args=(host, port, path, chunk, latencies, lock))
+               for chunk in per_client]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return latencies, elapsed
+
+
+def report(label, latencies, elapsed, items_per_request=1):
+    p99 = percentile(latencies, 99)
+    print(f"\n{label}:")
+    print(f"  Requests: {len(latencies):,} in {elapsed:.2f}s "
+          f"({len(latencies) * items_per_request / elapsed:,.0f} contacts/s)")
+    print(f"  p50 {percentile(latencies, 50):.2f} ms | p95 {percentile(latencies, 95):.2f} ms | "
+          f"p99 {p99:.2f} ms | max {latencies[-1]:.2f} ms")
+    return p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the contact scoring service')
+    parser.add_argument('--url', help='existing service (default: start one in-process)')
+    parser.add_argument('--contacts', help='CSV export to sample contacts from')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    contacts = load_contacts(args.contacts, 1000) if args.contacts else SAMPLE_CONTACTS
+    server = None
+    if args.url:
+        parsed = urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+    else:
+        server = make_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = '127.0.0.1', server.server_port
+
+    print(f"Benchmarking http://{host}:{port} with {len(contacts):,} distinct contacts, {args.clients} clients...")
+
+    single_bodies = [json.dumps(contacts[i % len(contacts)]).encode() for i in range(args.requests)]
+    latencies, elapsed = benchmark(host, port, '/score', single_bodies, args.clients)
+    p99 = report('POST /score', latencies, elapsed)
+
+    batches = max(1, args.requests // args.batch_size)
+    batch_bodies = [
+        json.dumps({'contacts': [contacts[(b * args.batch_size + i) % len(contacts)]
+                                 for i in range(args.batch_size)]}).encode()
+        for b in range(batches)
+    ]
+    latencies, elapsed = benchmark(host, port, '/score/batch', batch_bodies, args.clients)
+    report(f'POST /score/batch ({args.batch_size} per request)', latencies, elapsed, args.batch_size)
+
+    status = '✅' if p99 < P99_TARGET_MS else '⚠️'
+    print(f"\n{status} Single-contact p99 {p99:.2f} ms (target < {P99_TARGET_MS:.0f} ms)")
+
+    if server:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Canonical Specialty and State/Region values shared by the scoring scripts
+
+The export is hand-typed. 'Oral & Maxillofacial Surgeon' and 'oral surgeon '
+missed SPECIALTY_VALUES and fell through to the default points, and
+state.upper()[:2] turned 'New York' into 'NE' (Midwest) and 'Texas' into 'TE'
+(no territory, no premium-state bonus). Each distinct raw value is now mapped
+once, then cached:
+
+1. the canonical value itself, ignoring case, spacing and punctuation
+2. the alias tables below (OMS, perio, 'Calif.', 'N.Y.', ...)
+3. a difflib fuzzy match against canonical names and aliases, for typos
+4. otherwise the cleaned raw text is kept (unknown specialties still get the
+   default points, unknown states the 'Other' territory)
+
+Per row that is one cached lookup; canonical_codes() maps a whole column
+through its distinct values only and returns categorical codes. The caches
+and the per-method report sets hold at most MAX_CACHED_VALUES raw values
+each, so a long-running scorer fed arbitrary text stays bounded.
+
+  python3 canonical_values.py MasterD_NYCC.csv    # how each distinct value maps
+"""
+
+import argparse
+import csv
+import os
+import re
+from collections import Counter, defaultdict
+from difflib import get_close_matches
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # enrich_contacts_clean.py runs on the stdlib alone
+    np = None
+
+SPECIALTIES = ['Oral Surgeon', 'Periodontist', 'Prosthodontist', 'Endodontist',
+               'Orthodontist', 'General Dentist', 'Pediatric Dentist']
+
+# Normalized alias -> canonical specialty
+SPECIALTY_ALIASES = {
+    'oral and maxillofacial surgeon': 'Oral Surgeon',
+    'oral and maxillofacial surgery': 'Oral Surgeon',
+    'oral maxillofacial surgeon': 'Oral Surgeon',
+    'maxillofacial surgeon': 'Oral Surgeon',
+    'oral surgery': 'Oral Surgeon',
+    'oms': 'Oral Surgeon',
+    'omfs': 'Oral Surgeon',
+    'periodontics': 'Periodontist',
+    'periodontal': 'Periodontist',
+    'perio': 'Periodontist',
+    'prosthodontics': 'Prosthodontist',
+    'prosth': 'Prosthodontist',
+    'endodontics': 'Endodontist',
+    'endo': 'Endodontist',
+    'orthodontics': 'Orthodontist',
+    'ortho': 'Orthodontist',
+    'general dentistry': 'General Dentist',
+    'general practice': 'General Dentist',
+    'general practitioner': 'General Dentist',
+    'family dentist': 'General Dentist',
+    'dentist': 'General Dentist',
+    'gp': 'General Dentist',
+    'pediatric dentistry': 'Pediatric Dentist',
+    'paediatric dentist': 'Pediatric Dentist',
+    'pedodontist': 'Pediatric Dentist',
+    'pedodontics': 'Pediatric Dentist',
+    'pediatric': 'Pediatric Dentist',
+    'pedo': 'Pediatric Dentist',
+}
+
+# Full names come from geo_data/us_states.csv; these are the common abbreviations
+STATE_ALIASES = {
+    'ala': 'AL', 'ariz': 'AZ', 'ark': 'AR', 'cal': 'CA', 'calif': 'CA', 'colo': 'CO',
+    'conn': 'CT', 'del': 'DE', 'fla': 'FL', 'ill': 'IL', 'ind': 'IN', 'kan': 'KS',
+    'kans': 'KS', 'mass': 'MA', 'mich': 'MI', 'minn': 'MN', 'miss': 'MS', 'mont': 'MT',
+    'neb': 'NE', 'nebr': 'NE', 'nev': 'NV', 'okla': 'OK', 'ore': 'OR', 'oreg': 'OR',
+    'penn': 'PA', 'penna': 'PA', 'tenn': 'TN', 'tex': 'TX', 'wash': 'WA', 'wis': 'WI',
+    'wisc': 'WI', 'wyo': 'WY', 'w va': 'WV', 'wva': 'WV',
+    'washington dc': 'DC', 'washington d c': 'DC', 'd c': 'DC',
+}
+STATES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'geo_data', 'us_states.csv')
+
+FUZZY_CUTOFF = 0.85
+FUZZY_MIN_LENGTH = 4  # shorter text is an abbreviation, not a typo
+
+MAX_CACHED_VALUES = 10000  # per lookup cache, and per MATCHES set
+
+# Distinct raw values per resolution method, for the coverage report (sets merge
+# across worker processes); a full set stops growing and reports 'N+'
+MATCHES = {'specialty': defaultdict(set), 'state': defaultdict(set)}
+
+
+def normalize(text):
+    """Comparison key: lowercase, '&' -> 'and', periods dropped, other punctuation -> spaces"""
+    text = str(text or '').lower().replace('&', ' and ').replace('.', ' ')
+    return ' '.join(re.sub(r"[^a-z0-9' ]+", ' ', text).split())
+
+
+def _load_state_names():
+    names = {}
+    with open(STATES_FILE, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            names[normalize(row['name'])] = row['state']
+    return names
+
+
+# Normalized name / alias -> code
+STATE_NAMES = {**_load_state_names(), **{normalize(alias): code for alias, code in STATE_ALIASES.items()}}
+STATE_CODES = set(STATE_NAMES.values())
+SPECIALTY_NAMES = {**{normalize(name): name for name in SPECIALTIES}, **SPECIALTY_ALIASES}
+
+
+def _fuzzy(key, table):
+    """Canonical value of the closest table key, or None"""
+    if len(key) >= FUZZY_MIN_LENGTH:
+        close = get_close_matches(key, list(table), n=1, cutoff=FUZZY_CUTOFF)
+        if close:
+            return table[close[0]]
+    return None
+
+
+def _matched(kind, method, raw):
+    values = MATCHES[kind][method]
+    if len(values) < MAX_CACHED_VALUES:
+        values.add(raw)
+
+
+def merge_matches(matches):
+    """Fold another process's MATCHES-shaped sets into this one's, within the cap"""
+    for kind, methods in matches.items():
+        for method, values in methods.items():
+            for raw in values:
+                _matched(kind, method, raw)
+
+
+@lru_cache(maxsize=MAX_CACHED_VALUES)
+def canonical_specialty(raw):
+    """'oral & maxillofacial surgeon ' -> 'Oral Surgeon'; unknown values come back trimmed"""
+    text = ' '.join(str(raw or '').split())
+    key = normalize(text)
+    if not key:
+        return ''
+    if key in SPECIALTY_NAMES:
+        _matched('specialty', 'exact' if SPECIALTY_NAMES[key] == raw else 'alias', raw)
+        return SPECIALTY_NAMES[key]
+    match = _fuzzy(key, SPECIALTY_NAMES)
+    _matched('specialty', 'unmatched' if match is None else 'fuzzy', raw)
+    return text if match is None else match
+
+
+@lru_cache(maxsize=MAX_CACHED_VALUES)
+def state_code(raw):
+    """Two-letter code for a state name, code or abbreviation ('Texas', 'tx', 'N.Y.'), else None"""
+    key = normalize(raw)
+    if not key:
+        return None
+    compact = key.replace(' ', '').upper()
+    if len(compact) == 2 and compact in STATE_CODES:
+        _matched('state', 'exact' if compact == raw else 'alias', raw)
+        return compact
+    if key in STATE_NAMES:
+        _matched('state', 'alias', raw)
+        return STATE_NAMES[key]
+    match = _fuzzy(key, STATE_NAMES)
+    _matched('state', 'unmatched' if match is None else 'fuzzy', raw)
+    return match
+
+
+def canonical_state(raw):
+    """State code, or the trimmed raw text when it isn't a US state"""
+    return state_code(raw) or ' '.join(str(raw or '').split())
+
+
+def canonical_codes(values, canonicalize):
+    """(codes, categories) for a column, canonicalizing each distinct value once
+
+    values: a pandas Series (NaN maps to '') or any sequence of strings;
+    categories[codes] gives every row's canonical value
+    """
+    if hasattr(values, 'factorize'):
+        raw_codes, uniques = values.factorize()  # pandas: NaN gets code -1
+    else:
+        uniques, raw_codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+
+    categories = []
+    positions = {}
+    lookup = []
+    for value in list(uniques) + ['']:  # trailing '' is what code -1 (missing) indexes
+        canonical = canonicalize(value)
+        if canonical not in positions:
+            positions[canonical] = len(categories)
+            categories.append(canonical)
+        lookup.append(positions[canonical])
+    return np.asarray(lookup)[np.asarray(raw_codes)], categories
+
+
+def format_match_report(kind):
+    """Report lines: distinct raw values per resolution method"""
+    values = MATCHES[kind]
+    return [f"   - {method}: {len(values[method]):,}{'+' if len(values[method]) >= MAX_CACHED_VALUES else ''} "
+            f"distinct value(s)" for method in ('exact', 'alias', 'fuzzy', 'unmatched') if values.get(method)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show how Specialty and State/Region values canonicalize')
+    parser.add_argument('input', nargs='?', default='/Users/jasonsmacbookpro2022/Desktop/MasterD_NYCC.csv')
+    args = parser.parse_args()
+
+    columns = {'Specialty': canonical_specialty, 'State/Region': canonical_state}
+    seen = {column: Counter() for column in columns}
+    with open(args.input, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            for column in columns:
+                seen[column][row.get(column) or ''] += 1
+
+    for column, canonicalize in columns.items():
+        print(f"\n{column} ({len(seen[column]):,} distinct values):")
+        for raw, count in seen[column].most_common():
+            canonical = canonicalize(raw)
+            marker = '✓' if canonical == raw else '→'
+            print(f"  {marker} {raw!r:<36} {canonical!r:<22} {count:>8,}")
+        kind = 'specialty' if column == 'Specialty' else 'state'
+        for line in format_match_report(kind):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
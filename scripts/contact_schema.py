@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Declared input schema for the HubSpot export columns
+
+Every script used to wrap float(contact.get('HubSpot Score', 0) or 0) in a
+bare try/except on every row, so dirty values silently scored as 0 and each
+bad row paid for an exception. Columns are now coerced against this schema:
+
+- pandas scripts coerce each numeric column once, in bulk (coerce_frame)
+- stdlib scripts go through SchemaCoercer, which parses each distinct raw
+  value once and caches the result
+
+Both count missing and invalid values per column so dirty exports are visible
+in the run summary instead of disappearing into the score.
+"""
+
+import threading
+from collections import namedtuple
+
+# dtype: 'float' | 'datetime' | 'str'
+# fill:  value used by scoring when the cell is missing or invalid (None = keep null)
+Column = namedtuple('Column', ['dtype', 'fill'])
+
+HUBSPOT_SCHEMA = {
+    'First Name': Column('str', None),
+    'Last Name': Column('str', None),
+    'Email': Column('str', None),
+    'Phone Number': Column('str', None),
+    'Mobile Phone Number': Column('str', None),
+    'City': Column('str', None),
+    'State/Region': Column('str', None),
+    'Specialty': Column('str', None),
+    'HubSpot Score': Column('float', 0.0),
+    'Number of Sales Activities': Column('float', 0.0),
+    'Contact owner': Column('str', None),
+    'Create Date': Column('datetime', None),
+    'Notes': Column('str', None),
+}
+
+MAX_CACHED_VALUES = 100000
+# Ranking score of a contact row, by file: enriched output, Supabase upload, raw export
+RANK_COLUMNS = ['value_score', 'hubspot_score', 'HubSpot Score']
+
+
+def _parse_float(raw):
+    """(value, status) for one raw cell; status is 'ok', 'missing' or 'invalid'"""
+    if raw is None:
+        return None, 'missing'
+    if isinstance(raw, (int, float)):
+        return (None, 'missing') if raw != raw else (float(raw), 'ok')
+    text = str(raw).strip().replace(',', '')
+    if not text or text.lower() in ('nan', 'none', 'null'):
+        return None, 'missing'
+    try:
+        value = float(text)
+    except ValueError:
+        return None, 'invalid'
+    if value != value:
+        return None, 'missing'
+    return value, 'ok'
+
+
+def _counts_report(missing, invalid):
+    return {
+        name: {'missing': missing[name], 'invalid': invalid[name]}
+        for name in missing
+        if missing[name] or invalid[name]
+    }
+
+
+class SchemaCoercer:
+    """Row-at-a-time coercion with a per-column cache of distinct raw values
+
+    Safe to share between threads (scoring_service.py): the counters are only
+    updated under a lock, and take() reads and zeroes them in one step.
+    """
+
+    def __init__(self, schema=HUBSPOT_SCHEMA):
+        self.schema = schema
+        self._cache = {name: {} for name in schema}
+        self._lock = threading.Lock()
+        self.missing = {name: 0 for name in schema}
+        self.invalid = {name: 0 for name in schema}
+
+    def number(self, column, raw, count=True):
+        """Typed float for a numeric column, with the schema's fill for bad cells
+
+        Pass count=False when the same cell is read a second time for a row.
+        """
+        cache = self._cache[column]
+        try:
+            value, status = cache[raw]
+        except (KeyError, TypeError):
+            value, status = _parse_float(raw)
+            if len(cache) < MAX_CACHED_VALUES and isinstance(raw, str):
+                cache[raw] = (value, status)
+        if status == 'ok':
+            return value
+        if count:
+            counts = self.missing if status == 'missing' else self.invalid
+            with self._lock:
+                counts[column] += 1
+        return self.schema[column].fill
+
+    def report(self):
+        with self._lock:
+            return _counts_report(self.missing, self.invalid)
+
+    def take_report(self):
+        """report() of the counts so far, resetting them to zero"""
+        return _counts_report(*self.take())
+
+    def take(self):
+        """(missing, invalid) counts so far, resetting both to zero"""
+        with self._lock:
+            counts = dict(self.missing), dict(self.invalid)
+            self.missing = dict.fromkeys(self.schema, 0)
+            self.invalid = dict.fromkeys(self.schema, 0)
+        return counts
+
+    def add(self, missing, invalid):
+        """Fold counts from take() (e.g. another process's) back in"""
+        with self._lock:
+            for name, count in missing.items():
+                self.missing[name] += count
+            for name, count in invalid.items():
+                self.invalid[name] += count
+
+
+# Shared by the scoring functions; counters accumulate for the whole run
+HUBSPOT_COERCER = SchemaCoercer()
+
+
+def coerce_frame(df, schema=HUBSPOT_SCHEMA):
+    """Bulk-coerce numeric columns of a DataFrame in place; returns the error report
+
+    Invalid cells become NaN (the schema fill is applied when scoring, so the
+    exported CSV still shows them as blank rather than a made-up 0).
+    """
+    import pandas as pd
+
+    report = {}
+    for name, spec in schema.items():
+        if name not in df.columns or spec.dtype != 'float':
+            continue
+        original = df[name]
+        if pd.api.types.is_numeric_dtype(original):
+            typed = original.astype(float)
+            missing = int(typed.isna().sum())
+            invalid = 0
+        else:  # object or pandas' str dtype: text that may be dirty
+            cleaned = original.astype('string').str.strip().str.replace(',', '', regex=False)
+            blank = cleaned.isna() | cleaned.fillna('').str.lower().isin(['', 'nan', 'none', 'null'])
+            blank = blank.astype(bool)
+            typed = pd.to_numeric(cleaned.mask(blank), errors='coerce').astype(float)
+            missing = int(blank.sum())
+            invalid = int((typed.isna() & ~blank).sum())
+        df[name] = typed
+        if missing or invalid:
+            report[name] = {'missing': missing, 'invalid': invalid}
+    return report
+
+
+def filled(df, column, schema=HUBSPOT_SCHEMA):
+    """Numeric column as a float array with the schema's null rule applied"""
+    return df[column].fillna(schema[column].fill).to_numpy(dtype=float)
+
+
+def rank_value(row):
+    """Best-first sort value of an output or export row (0.0 when no rank column parses)"""
+    for column in RANK_COLUMNS:
+        try:
+            return float(row[column])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return 0.0
+
+
+def format_coercion_report(report, total_rows=None):
+    """Summary lines for the console"""
+    if not report:
+        return ["  • All typed columns parsed cleanly"]
+    lines = []
+    for name, counts in report.items():
+        suffix = f" of {total_rows:,} rows" if total_rows else ""
+        lines.append(f"  • {name}: {counts['missing']:,} missing, {counts['invalid']:,} invalid{suffix}")
+    return lines
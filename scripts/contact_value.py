@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Value score rules behind select_top_5000.py, without pandas
+
+calculate_contact_value() and its tables live here so the stdlib-only
+rankers (external_rank.py, execution_planner.py's streaming plan) can score
+rows without importing pandas and numpy. select_top_5000.py re-exports
+everything, and adds the vectorized versions for frames.
+"""
+
+from canonical_values import canonical_specialty, state_code
+from contact_schema import HUBSPOT_COERCER
+from create_dates import recency_points
+
+# Scoring tables - module level so score_variants.py can start from them
+SPECIALTY_VALUES = {
+    'Oral Surgeon': 20,        # Highest ticket
+    'Periodontist': 18,        # Implant heavy
+    'Prosthodontist': 16,      # Full mouth rehabs
+    'Endodontist': 14,         # Tech adopters
+    'Orthodontist': 12,        # High volume
+    'General Dentist': 10,     # Largest market
+    'Pediatric Dentist': 8,    # Lower ticket
+}
+DEFAULT_SPECIALTY_POINTS = 5
+
+BUYING_SIGNALS = [
+    'ready to buy', 'immediate', 'asap', 'this quarter',
+    'wants to purchase', 'decision', 'budget approved', 'edge'
+]
+INTEREST_SIGNALS = [
+    'very interested', 'demo', 'evaluation', 'comparing',
+    'requested pricing', 'follow up', 'next steps'
+]
+TECH_SIGNALS = [
+    'yomi', 'robot', 'implant', 'digital', 'cad/cam',
+    'cerec', 'guided', '3d', 'innovation', 'technology'
+]
+VOLUME_SIGNALS = [
+    'high volume', 'busy', '10+', '20+', 'monthly',
+    'cases per', 'full arch', '4-5', '5-10'
+]
+
+PREMIUM_STATES = ['CA', 'NY', 'TX', 'FL', 'IL', 'NJ', 'PA', 'MA']
+
+
+def present(value):
+    """pd.notna() for one cell: False for None and NaN"""
+    try:
+        return bool(value == value) and value is not None
+    except TypeError:  # pd.NA
+        return False
+
+
+def numeric_points(hubspot, activities):
+    """HubSpot score + sales activity points (60 max) for typed, null-filled values"""
+    
+    score = 0
+    
+    # 1. HUBSPOT SCORE (40 points max)
+    if hubspot >= 170:
+        score += 40  # Platinum
+    elif hubspot >= 150:
+        score += 30  # Gold
+    elif hubspot >= 130:
+        score += 20  # Silver
+    else:
+        score += 10  # Bronze
+    
+    # 2. SALES ACTIVITY (20 points max)
+    if activities >= 50:
+        score += 20  # Very engaged
+    elif activities >= 20:
+        score += 15  # Engaged
+    elif activities >= 10:
+        score += 10  # Somewhat engaged
+    elif activities >= 5:
+        score += 5   # Touched
+    
+    return score
+
+
+def calculate_contact_value(contact, recency=None, numeric=None):
+    """Score each contact 0-100 based on multiple factors
+    
+    recency: precomputed recency points (see create_dates.py); parsed from
+    'Create Date' when not given
+    numeric: precomputed numeric_points(); coerced through contact_schema.py
+    when not given
+    """
+    
+    score = 0
+    
+    # 1-2. HUBSPOT SCORE + SALES ACTIVITY (60 points max)
+    if numeric is None:
+        numeric = numeric_points(
+            HUBSPOT_COERCER.number('HubSpot Score', contact.get('HubSpot Score')),
+            HUBSPOT_COERCER.number('Number of Sales Activities', contact.get('Number of Sales Activities'))
+        )
+    score += numeric
+    
+    # 3. SPECIALTY VALUE (20 points max)
+    specialty = canonical_specialty(contact.get('Specialty', ''))
+    score += SPECIALTY_VALUES.get(specialty, DEFAULT_SPECIALTY_POINTS)
+    
+    # 4. NOTES QUALITY (20 points max)
+    notes = str(contact.get('Notes', '')).lower()
+    
+    # Buying signals
+    if any(signal in notes for signal in BUYING_SIGNALS):
+        score += 20
+        
+    # High interest signals
+    elif any(signal in notes for signal in INTEREST_SIGNALS):
+        score += 15
+        
+    # Technology mentions (good for your products)
+    elif any(tech in notes for tech in TECH_SIGNALS):
+        score += 10
+        
+    # Volume indicators
+    elif any(volume in notes for volume in VOLUME_SIGNALS):
+        score += 10
+        
+    # Any notes is better than none
+    elif len(notes) > 10:
+        score += 5
+    
+    # 5. RECENCY BONUS (10 points bonus, decays with days since creation)
+    if recency is None:
+        recency = recency_points(contact.get('Create Date', ''))
+    score += recency
+    
+    # 6. LOCATION BONUS (10 points bonus)
+    if state_code(contact.get('State/Region', '')) in PREMIUM_STATES:
+        score += 10
+    
+    # 7. CONTACT COMPLETENESS (10 points bonus)
+    has_email = present(contact.get('Email')) and '@' in str(contact.get('Email', ''))
+    has_mobile = present(contact.get('Mobile Phone Number'))
+    
+    if has_email and has_mobile:
+        score += 10  # Has both email and mobile
+    elif has_email:
+        score += 5   # At least has email
+    
+    return min(score, 100)  # Cap at 100
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+'Create Date' parsing and recency scoring shared by the selection scripts
+
+The old recency bonus tested substrings ('2024' in create_date), which is slow
+and gave 2025+ contacts nothing. Dates are now parsed properly, once per
+distinct raw string (exports contain few distinct timestamps), and recency is
+a smooth decay on days since creation.
+"""
+
+import re
+from datetime import date, datetime, timezone
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # prepare_contacts_for_upload.py runs on the stdlib alone
+    np = None
+
+RECENCY_MAX_POINTS = 10       # same ceiling as the old '2023/2024' bonus
+RECENCY_HALF_LIFE_DAYS = 365  # a year-old contact earns half the bonus
+
+DATE_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S.%f',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M',
+    '%m/%d/%Y %I:%M %p',
+    '%m/%d/%Y',
+    '%m/%d/%y',
+]
+ZONE_SUFFIX = re.compile(r'(?:Z|[+-]\d{2}(?::?\d{2})?)$', re.IGNORECASE)
+
+
+@lru_cache(maxsize=65536)
+def parse_create_date(raw):
+    """Parse one raw 'Create Date' string into a datetime (None if unparseable)"""
+    text = str(raw or '').strip()
+    if not text or text.lower() == 'nan':
+        return None
+
+    # HubSpot API / ISO timestamps: drop the zone suffix (Z, +HH:MM, -HHMM), we only need the day
+    if 'T' in text:
+        text = ZONE_SUFFIX.sub('', text)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+
+    # Epoch milliseconds (HubSpot API exports)
+    if text.isdigit() and len(text) >= 12:
+        return datetime.fromtimestamp(int(text) / 1000, timezone.utc).replace(tzinfo=None)
+    return None
+
+
+def recency_points_from_days(days):
+    """Decay points for a contact created `days` ago"""
+    days = max(0.0, days)
+    return int(round(RECENCY_MAX_POINTS * 0.5 ** (days / RECENCY_HALF_LIFE_DAYS)))
+
+
+@lru_cache(maxsize=65536)
+def _recency_points_cached(raw, as_of):
+    parsed = parse_create_date(raw)
+    if parsed is None:
+        return 0
+    return recency_points_from_days((as_of - parsed.date()).days)
+
+
+def recency_points(raw, as_of=None):
+    """Recency bonus (0-10) for one raw 'Create Date' value, cached per distinct string"""
+    return _recency_points_cached(str(raw or ''), as_of or date.today())
+
+
+def parse_create_dates(values):
+    """Vectorized parse to a datetime64[s] array - one strptime per distinct value"""
+    if hasattr(values, 'factorize'):
+        codes, uniques = values.factorize()  # pandas: NaN gets code -1
+    else:
+        uniques, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+
+    parsed = [parse_create_date(value) for value in uniques]
+    lookup = np.array(
+        [np.datetime64(p, 's') if p is not None else np.datetime64('NaT', 's') for p in parsed]
+        + [np.datetime64('NaT', 's')],
+        dtype='datetime64[s]'
+    )
+    # Code -1 (missing) indexes the trailing NaT
+    return lookup[np.asarray(codes)]
+
+
+def recency_points_vectorized(create_dates, as_of=None):
+    """Days-since-create decay for a datetime64 array; NaT scores 0"""
+    as_of = np.datetime64(as_of or date.today(), 'D')
+    days = (as_of - create_dates.astype('datetime64[D]')).astype(float)
+    days = np.clip(days, 0, None)
+    points = np.rint(RECENCY_MAX_POINTS * np.power(0.5, days / RECENCY_HALF_LIFE_DAYS))
+    return np.where(np.isnat(create_dates), 0, points).astype(int)
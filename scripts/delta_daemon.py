@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Resident scoring daemon: apply HubSpot delta exports without a cold start
+
+Every new export used to mean reading the full CSV, scoring, sorting and
+selecting again, even when it only held the contacts modified since
+yesterday. This loads the full export once and keeps it resident:
+
+- per contact only the raw export values (a tuple), its value_score (an
+  array of doubles) and a key -> slot dict; slots are first-seen order, which
+  is also the tie-break, as in the batch sort
+- a bucket per distinct score (scores are small integers) holding its slots,
+  plus the sorted list of scores in use, so an insert or rescore is O(1) and
+  reading the top K walks only the best buckets
+- delta CSVs dropped into the inbox are upserted by 'Record ID' (or email,
+  else name + phone + city); columns a delta leaves out keep their old values
+  and unchanged rows are not rescored
+- after each file the top K is rebuilt into contacts_enriched_clean.csv
+  (written to a temp file and renamed, so readers never see half a file);
+  only contacts entering the top K are re-enriched
+
+Files are picked up once they have been quiet for SETTLE_SECONDS, then moved
+to inbox/processed (or inbox/failed). With --state the resident contacts are
+pickled after every delta, so a restart skips the full export as long as
+the scoring rules haven't changed (the same rules_fingerprint() the sharded
+workers check: the rule modules plus the state table they load).
+
+  python3 delta_daemon.py --input MasterD_NYCC.csv --inbox ~/Desktop/hubspot_inbox
+  python3 delta_daemon.py --state daemon_state.pkl --once     # apply what's waiting and exit
+"""
+
+import argparse
+import bisect
+import csv
+import os
+import pickle
+import time
+from array import array
+
+from enrich_contacts_clean import CLEAN_FIELDNAMES, build_clean_contact
+from sharded_scoring import rules_fingerprint
+from sqlite_store import contact_key
+
+TOP_K = 5000
+POLL_SECONDS = 1.0
+SETTLE_SECONDS = 1.0
+KEY_COLUMNS = ['Record ID', 'Contact ID']
+
+# Raw export column -> clean contact field used by contact_key()
+KEY_FIELDS = {'Email': 'email', 'First Name': 'first_name', 'Last Name': 'last_name',
+              'Phone Number': 'phone_number', 'Mobile Phone Number': 'cell', 'City': 'city'}
+
+
+def row_key(row):
+    for column in KEY_COLUMNS:
+        if row.get(column):
+            return f"id:{row[column].strip()}"
+    return contact_key({field: row.get(column) for column, field in KEY_FIELDS.items()})
+
+
+class ResidentContacts:
+    """Every contact's raw values and score, with score buckets for the top K"""
+
+    def __init__(self, fieldnames):
+        self.fieldnames = list(fieldnames)
+        self.slots = {}
+        self.rows = []
+        self.scores = array('d')
+        self.buckets = {}  # score -> {slots}
+        self.levels = []   # scores with a non-empty bucket, ascending
+        self._published = {}  # slot -> enriched contact, from the last publish
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _place(self, slot, score):
+        bucket = self.buckets.get(score)
+        if bucket is None:
+            bucket = self.buckets[score] = set()
+            bisect.insort(self.levels, score)
+        bucket.add(slot)
+
+    def _unplace(self, slot, score):
+        bucket = self.buckets[score]
+        bucket.discard(slot)
+        if not bucket:
+            del self.buckets[score]
+            del self.levels[bisect.bisect_left(self.levels, score)]
+
+    def upsert(self, row):
+        """Apply one export row; returns 'inserted', 'updated' or 'unchanged'"""
+        key = row_key(row)
+        slot = self.slots.get(key)
+        if slot is None:
+            values = tuple(row.get(column) or '' for column in self.fieldnames)
+        else:
+            old = self.rows[slot]
+            values = tuple(row[column] if column in row else old[i] for i, column in enumerate(self.fieldnames))
+            if values == old:
+                return 'unchanged'
+        score = build_clean_contact(dict(zip(self.fieldnames, values)))['value_score']
+
+        if slot is None:
+            slot = self.slots[key] = len(self.rows)
+            self.rows.append(values)
+            self.scores.append(score)
+            self._place(slot, score)
+            return 'inserted'
+        self.rows[slot] = values
+        self._published.pop(slot, None)
+        if self.scores[slot] != score:
+            self._unplace(slot, self.scores[slot])
+            self.scores[slot] = score
+            self._place(slot, score)
+        return 'updated'
+
+    def apply_file(self, path):
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                counts[self.upsert(row)] += 1
+        return counts
+
+    def top(self, k=TOP_K):
+        """Slots of the best k contacts (first-seen order breaks ties)"""
+        slots = []
+        for score in reversed(self.levels):
+            slots.extend(sorted(self.buckets[score]))
+            if len(slots) >= k:
+                break
+        return slots[:k]
+
+    def publish(self, output_file, k=TOP_K):
+        """Write the current top k as contacts_enriched_clean.csv; returns contacts re-enriched"""
+        published = {}
+        enriched = 0
+        for slot in self.top(k):
+            contact = self._published.get(slot)
+            if contact is None:
+                contact = build_clean_contact(dict(zip(self.fieldnames, self.rows[slot])))
+                enriched += 1
+            published[slot] = contact
+        self._published = published
+
+        tmp = output_file + '.tmp'
+        with open(tmp, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=CLEAN_FIELDNAMES, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(published.values())
+        os.replace(tmp, output_file)
+        return enriched
+
+    def save(self, path):
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump({'rules': rules_fingerprint(), 'fieldnames': self.fieldnames, 'slots': self.slots,
+                         'rows': self.rows, 'scores': self.scores}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Restore saved contacts, rescoring them if the rules have changed since"""
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        resident = cls(state['fieldnames'])
+        resident.slots = state['slots']
+        resident.rows = state['rows']
+        if state['rules'] == rules_fingerprint():
+            resident.scores = state['scores']
+        else:
+            print("⚠️  Scoring rules changed since the state was saved - rescoring")
+            resident.scores = array('d', (build_clean_contact(dict(zip(resident.fieldnames, values)))['value_score']
+                                          for values in resident.rows))
+        for slot, score in enumerate(resident.scores):
+            resident._place(slot, score)
+        return resident
+
+    @classmethod
+    def from_export(cls, path):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            resident = cls(reader.fieldnames)
+            for row in reader:
+                resident.upsert(row)
+        return resident
+
+
+def ready_files(inbox, settle=SETTLE_SECONDS):
+    """CSV files in the inbox that haven't been written to for `settle` seconds, oldest first"""
+    now = time.time()
+    files = []
+    for name in os.listdir(inbox):
+        path = os.path.join(inbox, name)
+        if name.lower().endswith('.csv') and os.path.isfile(path):
+            mtime = os.path.getmtime(path)
+            if now - mtime >= settle:
+                files.append((mtime, name, path))
+    return [path for mtime, name, path in sorted(files)]
+
+
+def _move(path, directory):
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, time.strftime('%Y%m%d-%H%M%S-') + os.path.basename(path))
+    os.replace(path, target)
+
+
+def process_inbox(resident, inbox, output_file, k=TOP_K, state_file=None, settle=SETTLE_SECONDS):
+    """Apply every ready delta file and republish after each; returns files applied"""
+    applied = 0
+    for path in ready_files(inbox, settle):
+        name = os.path.basename(path)
+        started = time.perf_counter()
+        try:
+            counts = resident.apply_file(path)
+        except (csv.Error, UnicodeDecodeError, OSError) as e:
+            print(f"⚠️  {name}: {e} - moved to failed/")
+            _move(path, os.path.join(inbox, 'failed'))
+            continue
+        enriched = resident.publish(output_file, k)
+        _move(path, os.path.join(inbox, 'processed'))
+        if state_file:
+            resident.save(state_file)
+        applied += 1
+        print(f"✓ {name}: {counts['inserted']:,} new, {counts['updated']:,} updated, "
+              f"{counts['unchanged']:,} unchanged -> republished top {k:,} "
+              f"({enriched:,} re-enriched) in {time.perf_counter() - started:.2f}s")
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep contacts resident and apply HubSpot delta exports as they land')
+    parser.add_argument('--input', default='/Users/jasonsmacbookpro2022/Desktop/MasterD_NYCC.csv',
+                        help='full export loaded at startup (skipped when --state exists)')
+    parser.add_argument('--inbox', default='/Users/jasonsmacbookpro2022/Desktop/hubspot_inbox')
+    parser.add_argument('--output', default='/Users/jasonsmacbookpro2022/Desktop/contacts_enriched_clean.csv')
+    parser.add_argument('--state', help='pickle of the resident contacts, saved after every delta')
+    parser.add_argument('--k', type=int, default=TOP_K)
+    parser.add_argument('--poll', type=float, default=POLL_SECONDS, help='seconds between inbox checks')
+    parser.add_argument('--settle', type=float, default=SETTLE_SECONDS,
+                        help='seconds a file must be unchanged before it is read')
+    parser.add_argument('--once', action='store_true', help='apply the waiting deltas and exit')
+    args = parser.parse_args()
+
+    os.makedirs(args.inbox, exist_ok=True)
+    started = time.perf_counter()
+    if args.state and os.path.exists(args.state):
+        resident = ResidentContacts.load(args.state)
+        source = args.state
+    else:
+        resident = ResidentContacts.from_export(args.input)
+        source = args.input
+    resident.publish(args.output, args.k)
+    print(f"✅ {len(resident):,} contacts resident from {source} in {time.perf_counter() - started:.2f}s")
+    print(f"   - Publishing top {args.k:,} to: {args.output}")
+    print(f"   - Watching: {args.inbox}")
+
+    try:
+        while True:
+            process_inbox(resident, args.inbox, args.output, args.k, args.state, args.settle)
+            if args.once:
+                break
+            time.sleep(args.poll)
+    except KeyboardInterrupt:
+        print("\nStopping")
+    if args.state:
+        resident.save(args.state)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Streaming engagement features from the sales_activities log
+
+engagement_level and the activity points only look at the export's static
+'Number of Sales Activities', so 60 touches from 2019 still count as Hot.
+EngagementStore streams raw activity events (sales_activities exported to CSV
+or NDJSON) into compact per-contact numpy arrays:
+
+- decayed touches: each touch is worth 0.5 ** (age / HALF_LIFE_DAYS). Stored
+  as a sum of 2 ** ((day - ANCHOR) / HALF_LIFE_DAYS), so events can arrive
+  in any order and an update is a single add
+- rolling window counts: a ring of BUCKETS weekly counters per contact,
+  enough for the longest window (52 weeks); stale weeks are zeroed as a
+  contact's latest week moves forward
+- total touches and the last touch date
+
+Updates cost O(new events). The store is saved with np.savez along with a
+watermark (latest event seen) and the ids of the events dated exactly at it;
+later runs skip events before the watermark and the already-applied ones at
+it, so exporting rows with date >= watermark keeps a run incremental without
+losing events that share the watermark's timestamp. Exports without an id
+column fall back to skipping everything at the watermark.
+
+  python3 engagement.py update engagement.npz sales_activities.csv
+  python3 engagement.py show engagement.npz greg.pedro@example.com
+  python3 enrich_contacts_clean.py --engagement engagement.npz
+"""
+
+import argparse
+import csv
+import json
+import os
+from datetime import date, datetime
+
+import numpy as np
+
+from create_dates import parse_create_date
+
+HALF_LIFE_DAYS = 90
+ANCHOR = date(2015, 1, 1)  # decay sums are stored relative to this day
+WINDOWS_WEEKS = {'touches_4w': 4, 'touches_13w': 13, 'touches_52w': 52}
+BUCKETS = 53
+BATCH_SIZE = 100000
+EMPTY_WEEK = -(1 << 40)  # latest_week of a contact with no ring entries yet
+
+# Event columns; contacts are matched by email when the export has one
+EVENT_KEY_COLUMNS = ['contact_email', 'email', 'contact_id']
+EVENT_DATE_COLUMNS = ['date', 'created_at']
+
+# Event ids, when the export has them, let events at exactly the watermark
+# be told apart from ones already applied
+EVENT_ID_COLUMNS = ['id', 'activity_id', 'event_id']
+
+# Decayed touches are never more than the raw count, so they are scaled to
+# static-count equivalents before the 50/20/10/5 activity points, the >20
+# timeline rule and the <5 recommended-action rule; without it every engaged
+# contact would rank below contacts scored on the static count
+DECAYED_TOUCH_WEIGHT = 2.5
+
+# decayed touches -> engagement_level: the static >= 20 / >= 5 rule, in decayed touches
+ENGAGEMENT_LEVELS = [(20 / DECAYED_TOUCH_WEIGHT, 'Hot'), (5 / DECAYED_TOUCH_WEIGHT, 'Warm')]
+
+
+def _day_number(value):
+    """Days since ANCHOR for a datetime / date / raw string, or None"""
+    if isinstance(value, str):
+        value = parse_create_date(value)
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return (value - datetime.combine(ANCHOR, datetime.min.time())).total_seconds() / 86400
+    return float((value - ANCHOR).days)
+
+
+def activity_equivalent(decayed_touches):
+    """Decayed touches on the static 'Number of Sales Activities' scale"""
+    return decayed_touches * DECAYED_TOUCH_WEIGHT
+
+
+def engagement_level(decayed_touches):
+    for minimum, level in ENGAGEMENT_LEVELS:
+        if decayed_touches >= minimum:
+            return level
+    return 'Cold'
+
+
+def read_events(path):
+    """Yield event dicts from a CSV or NDJSON export"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.endswith(('.ndjson', '.jsonl', '.json')):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+class EngagementStore:
+    """Per-contact engagement arrays, grown by doubling"""
+
+    def __init__(self, capacity=1024):
+        self.keys = []
+        self.slots = {}
+        self.decay_sum = np.zeros(capacity)
+        self.total = np.zeros(capacity, dtype=np.int64)
+        self.last_day = np.full(capacity, -np.inf)
+        self.latest_week = np.full(capacity, EMPTY_WEEK, dtype=np.int64)
+        self.buckets = np.zeros((capacity, BUCKETS), dtype=np.int32)
+        self.watermark = -np.inf
+        self.watermark_ids = set()  # ids of applied events dated exactly at the watermark
+        self.pending_watermark = -np.inf
+        self.pending_ids = set()
+        self.skipped = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _grow(self, needed):
+        capacity = len(self.decay_sum)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        extra = capacity - len(self.decay_sum)
+        self.decay_sum = np.concatenate([self.decay_sum, np.zeros(extra)])
+        self.total = np.concatenate([self.total, np.zeros(extra, dtype=np.int64)])
+        self.last_day = np.concatenate([self.last_day, np.full(extra, -np.inf)])
+        self.latest_week = np.concatenate([self.latest_week, np.full(extra, EMPTY_WEEK, dtype=np.int64)])
+        self.buckets = np.concatenate([self.buckets, np.zeros((extra, BUCKETS), dtype=np.int32)])
+
+    def _slot(self, key):
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = self.slots[key] = len(self.keys)
+            self.keys.append(key)
+            self._grow(slot + 1)
+        return slot
+
+    @staticmethod
+    def normalize_key(key):
+        return str(key or '').strip().lower()
+
+    def _is_new(self, day, event_id):
+        """After the watermark, or at it with an id not applied yet (no id: already applied)"""
+        if day > self.watermark:
+            return True
+        return day == self.watermark and event_id is not None and event_id not in self.watermark_ids
+
+    def add_batch(self, keys, days, ids=None):
+        """Apply one batch of (contact key, day number[, event id]) events"""
+        ids = ids or [None] * len(keys)
+        fresh = [(k, d, i) for k, d, i in zip(map(self.normalize_key, keys), days, ids)
+                 if k and d is not None and self._is_new(d, i)]
+        self.skipped += len(keys) - len(fresh)
+        if not fresh:
+            return 0
+        slots = np.fromiter((self._slot(k) for k, d, i in fresh), dtype=np.int64, count=len(fresh))
+        days = np.fromiter((d for k, d, i in fresh), dtype=float, count=len(fresh))
+        weeks = np.floor(days / 7).astype(np.int64)
+
+        np.add.at(self.decay_sum, slots, np.exp2(days / HALF_LIFE_DAYS))
+        np.add.at(self.total, slots, 1)
+        np.maximum.at(self.last_day, slots, days)
+
+        # Advance each touched contact's ring, zeroing weeks it skipped over
+        new_latest = self.latest_week.copy()
+        np.maximum.at(new_latest, slots, weeks)
+        for slot in np.unique(slots):
+            old, new = self.latest_week[slot], new_latest[slot]
+            if new > old:
+                if new - old >= BUCKETS:
+                    self.buckets[slot] = 0
+                else:
+                    self.buckets[slot, np.arange(old + 1, new + 1) % BUCKETS] = 0
+        self.latest_week = new_latest
+
+        in_ring = weeks > self.latest_week[slots] - BUCKETS
+        np.add.at(self.buckets, (slots[in_ring], weeks[in_ring] % BUCKETS), 1)
+        latest = float(days.max())
+        if latest > self.pending_watermark:
+            self.pending_watermark, self.pending_ids = latest, set()
+        if latest == self.pending_watermark:
+            self.pending_ids.update(i for k, d, i in fresh if d == latest and i is not None)
+        return len(fresh)
+
+    def update_from(self, path, batch_size=BATCH_SIZE):
+        """Stream one events file into the store; returns events applied"""
+        applied = 0
+        keys, days, ids = [], [], []
+        key_column = date_column = id_column = None
+        for event in read_events(path):
+            if key_column is None:
+                key_column = next((c for c in EVENT_KEY_COLUMNS if c in event), EVENT_KEY_COLUMNS[-1])
+                date_column = next((c for c in EVENT_DATE_COLUMNS if c in event), EVENT_DATE_COLUMNS[0])
+                id_column = next((c for c in EVENT_ID_COLUMNS if c in event), None)
+            keys.append(event.get(key_column))
+            days.append(_day_number(event.get(date_column)))
+            event_id = event.get(id_column) if id_column else None
+            ids.append(str(event_id) if event_id not in (None, '') else None)
+            if len(keys) >= batch_size:
+                applied += self.add_batch(keys, days, ids)
+                keys, days, ids = [], [], []
+        if keys:
+            applied += self.add_batch(keys, days, ids)
+        return applied
+
+    def commit(self):
+        """Move the watermark past everything applied so far
+
+        Done after whole files, so out-of-order events within a file all count.
+        """
+        if self.pending_watermark > self.watermark:
+            self.watermark, self.watermark_ids = self.pending_watermark, set(self.pending_ids)
+        elif self.pending_watermark == self.watermark:
+            self.watermark_ids |= self.pending_ids
+
+    def features(self, key, as_of=None):
+        """Engagement features for one contact (None if it has no events)"""
+        slot = self.slots.get(self.normalize_key(key))
+        if slot is None:
+            return None
+        today = _day_number(as_of or date.today())
+        week = int(np.floor(today / 7))
+        latest = int(self.latest_week[slot])
+        features = {
+            'decayed_touches': float(self.decay_sum[slot] * np.exp2(-today / HALF_LIFE_DAYS)),
+            'total_touches': int(self.total[slot]),
+            'days_since_last': max(0, int(today - self.last_day[slot])),
+        }
+        for name, span in WINDOWS_WEEKS.items():
+            first = max(week - span + 1, latest - BUCKETS + 1)
+            weeks = np.arange(first, min(week, latest) + 1)
+            features[name] = int(self.buckets[slot, weeks % BUCKETS].sum()) if len(weeks) else 0
+        return features
+
+    def save(self, path):
+        n = len(self.keys)
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, keys=np.array(self.keys, dtype=str), decay_sum=self.decay_sum[:n],
+                 total=self.total[:n], last_day=self.last_day[:n], latest_week=self.latest_week[:n],
+                 buckets=self.buckets[:n], watermark=np.array(self.watermark),
+                 watermark_ids=np.array(sorted(self.watermark_ids), dtype=str),
+                 half_life=np.array(HALF_LIFE_DAYS), anchor=np.array(ANCHOR.isoformat()))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        if int(data['half_life']) != HALF_LIFE_DAYS or str(data['anchor']) != ANCHOR.isoformat():
+            raise ValueError(f"{path} was built with different decay settings - rebuild it")
+        keys = [str(k) for k in data['keys']]
+        store = cls(capacity=max(1024, len(keys)))
+        n = len(keys)
+        store.keys = keys
+        store.slots = {k: i for i, k in enumerate(keys)}
+        store.decay_sum[:n] = data['decay_sum']
+        store.total[:n] = data['total']
+        store.last_day[:n] = data['last_day']
+        store.latest_week[:n] = data['latest_week']
+        store.buckets[:n] = data['buckets']
+        store.watermark = store.pending_watermark = float(data['watermark'])
+        if 'watermark_ids' in data.files:  # stores saved before ids were kept have none
+            store.watermark_ids = {str(i) for i in data['watermark_ids']}
+            store.pending_ids = set(store.watermark_ids)
+        return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate sales activity events into engagement features')
+    sub = parser.add_subparsers(dest='command', required=True)
+    update = sub.add_parser('update', help='stream new events into the store')
+    update.add_argument('store')
+    update.add_argument('events', nargs='+', help='sales_activities CSV / NDJSON exports')
+    show = sub.add_parser('show', help='print one contact\'s features')
+    show.add_argument('store')
+    show.add_argument('key', help='contact email (or contact_id)')
+    args = parser.parse_args()
+
+    if args.command == 'show':
+        features = EngagementStore.load(args.store).features(args.key)
+        if features is None:
+            print(f"No activity for {args.key}")
+        else:
+            for name, value in features.items():
+                print(f"  {name}: {value:,.2f}" if isinstance(value, float) else f"  {name}: {value:,}")
+            print(f"  engagement_level: {engagement_level(features['decayed_touches'])}")
+        return
+
+    store = EngagementStore.load(args.store) if os.path.exists(args.store) else EngagementStore()
+    before = len(store)
+    applied = 0
+    for path in args.events:
+        applied += store.update_from(path)
+    store.commit()
+    store.save(args.store)
+
+    print(f"✅ Applied {applied:,} events ({store.skipped:,} skipped: undated, no contact, "
+          f"or already applied)")
+    print(f"   - {len(store):,} contacts with activity ({len(store) - before:,} new)")
+    print(f"   - Saved to: {args.store}")
+
+
+if __name__ == "__main__":
+    main()
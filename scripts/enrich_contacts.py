@@ -4,33 +4,36 @@ Enrich contacts with additional data before uploading to Supabase
 This adds calculated fields and extracts insights from existing data
 """
 
+import argparse
 import csv
+import heapq
 import json
+import os
 import re
 from datetime import datetime, timedelta
 import random
 
+from canonical_values import canonical_specialty, canonical_state, state_code
+from contact_schema import HUBSPOT_COERCER, format_coercion_report
+from json_export import JsonObjectEncoder, NdjsonWriter
+
 def calculate_value_score(contact):
     """Score each contact 0-100 based on multiple factors"""
     score = 0
     
-    # HubSpot Score (40 points max)
-    try:
-        hubspot = float(contact.get('HubSpot Score', 0) or 0)
-        if hubspot >= 170: score += 40
-        elif hubspot >= 150: score += 30
-        elif hubspot >= 130: score += 20
-        else: score += 10
-    except: pass
+    # HubSpot Score (40 points max) - typed via contact_schema, no per-row try/except
+    hubspot = HUBSPOT_COERCER.number('HubSpot Score', contact.get('HubSpot Score'))
+    if hubspot >= 170: score += 40
+    elif hubspot >= 150: score += 30
+    elif hubspot >= 130: score += 20
+    else: score += 10
     
     # Sales Activity (20 points max)
-    try:
-        activities = float(contact.get('Number of Sales Activities', 0) or 0)
-        if activities >= 50: score += 20
-        elif activities >= 20: score += 15
-        elif activities >= 10: score += 10
-        elif activities >= 5: score += 5
-    except: pass
+    activities = HUBSPOT_COERCER.number('Number of Sales Activities', contact.get('Number of Sales Activities'))
+    if activities >= 50: score += 20
+    elif activities >= 20: score += 15
+    elif activities >= 10: score += 10
+    elif activities >= 5: score += 5
     
     # Specialty Value (20 points max)
     specialty_values = {
@@ -38,7 +41,7 @@ def calculate_value_score(contact):
         'Endodontist': 14, 'Orthodontist': 12, 'General Dentist': 10,
         'Pediatric Dentist': 8
     }
-    score += specialty_values.get(contact.get('Specialty', ''), 5)
+    score += specialty_values.get(canonical_specialty(contact.get('Specialty', '')), 5)
     
     # Notes Quality (20 points max)
     notes = str(contact.get('Notes', '') or '').lower()
@@ -196,7 +199,7 @@ def determine_territory(state):
         'Other': ['AK', 'HI']
     }
     
-    state_abbr = state.strip().upper()[:2]
+    state_abbr = state_code(state)  # 'New York' -> 'NY', not 'NE'
     
     for territory, states in territories.items():
         if state_abbr in states:
@@ -228,8 +231,8 @@ def enrich_contact(contact):
     
     # Extract base data
     notes = contact.get('Notes', '')
-    specialty = contact.get('Specialty', '')
-    activities = float(contact.get('Number of Sales Activities', 0) or 0)
+    specialty = canonical_specialty(contact.get('Specialty', ''))
+    activities = HUBSPOT_COERCER.number('Number of Sales Activities', contact.get('Number of Sales Activities'), count=False)
     state = contact.get('State/Region', '')
     
     # Calculate enrichments
@@ -282,26 +285,127 @@ def enrich_contact(contact):
     
     return enriched
 
+TOP_K = 5000
+
+SUPABASE_FIELDNAMES = [
+    'first_name', 'last_name', 'email', 'phone_number', 'cell',
+    'city', 'state', 'specialty', 'hubspot_score', 'sales_touches',
+    'notes', 'contact_owner', 'create_date', 'user_id',
+    'is_for_sale', 'sale_price', 'is_public', 'access_list'
+]
+
+# Key layout of the access_list payload - encoded once, not per row
+ACCESS_LIST_KEYS = [
+    'value_score', 'lead_tier', 'technologies', 'innovation_score',
+    'practice_volume', 'estimated_deal_value', 'purchase_timeline',
+    'territory', 'engagement_level', 'recommended_action', 'enrichment_priority'
+]
+ACCESS_LIST_CSV_ENCODER = JsonObjectEncoder(ACCESS_LIST_KEYS, separators=(', ', ': '))
+CHECKPOINT_EVERY = 250000
+
+def read_rows_from_offset(f, start_offset=0):
+    """Yield row dicts starting at a saved file offset; f.tell() stays valid between rows"""
+    f.seek(0)
+    header = next(csv.reader([f.readline()]))
+    if start_offset:
+        f.seek(start_offset)
+    
+    # readline() (unlike iteration) keeps f.tell() usable; csv pulls lines on demand,
+    # so after each record the file position sits exactly at the next record
+    def lines():
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            yield line
+    
+    for values in csv.reader(lines()):
+        if values:
+            yield dict(zip(header, values))
+
+def save_checkpoint(path, state):
+    """Atomically write the run state (offset, rows read, current top-K, coercion counts)"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path, input_file):
+    """Load a checkpoint, refusing one that was taken against a different input"""
+    with open(path, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    stat = os.stat(input_file)
+    if state['input_file'] != input_file or state['input_size'] != stat.st_size or \
+       state['input_mtime'] != stat.st_mtime:
+        raise SystemExit(f"Checkpoint {path} does not match {input_file} - delete it or rerun without --resume")
+    return state
+
 def main():
-    input_file = '/Users/jasonsmacbookpro2022/Desktop/MasterD_NYCC.csv'
-    output_file = '/Users/jasonsmacbookpro2022/Desktop/enriched_contacts_for_supabase.csv'
-    
-    print("Reading and enriching contacts...")
+    parser = argparse.ArgumentParser(description='Enrich contacts and export the top 5,000 for Supabase')
+    parser.add_argument('--resume', action='store_true', help='continue from the last checkpoint')
+    parser.add_argument('--checkpoint-every', type=int, default=CHECKPOINT_EVERY,
+                        help='rows between checkpoints (0: no checkpoints)')
+    parser.add_argument('--input', default='/Users/jasonsmacbookpro2022/Desktop/MasterD_NYCC.csv')
+    parser.add_argument('--output', default='/Users/jasonsmacbookpro2022/Desktop/enriched_contacts_for_supabase.csv')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv',
+                        help='ndjson writes access_list as a nested object for direct jsonb loading')
+    args = parser.parse_args()
+    if args.checkpoint_every < 0:
+        parser.error('--checkpoint-every must be 0 or more')
+    
+    input_file = args.input
+    output_file = args.output
+    checkpoint_file = output_file + '.checkpoint.json'
+    
+    # Keep a bounded min-heap of (score, -row_index, contact) instead of every row.
+    # Ties evict the later row, which matches a stable sort of the full list.
+    heap = []
+    rows_read = 0
+    offset = 0
+    if args.resume and os.path.exists(checkpoint_file):
+        state = load_checkpoint(checkpoint_file, input_file)
+        heap = [(score, neg_index, contact) for score, neg_index, contact in state['top_k']]
+        heapq.heapify(heap)
+        rows_read = state['rows_read']
+        offset = state['offset']
+        # Counts from before the checkpoint; older checkpoints don't carry them
+        if 'coercion' in state:
+            HUBSPOT_COERCER.add(*state['coercion'])
+        print(f"Resuming from checkpoint at row {rows_read:,}...")
+    else:
+        print("Reading and enriching contacts...")
     
-    contacts = []
-    with open(input_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+    with open(input_file, 'r', encoding='utf-8', newline='') as f:
+        for row in read_rows_from_offset(f, offset):
             enriched = enrich_contact(row)
-            contacts.append(enriched)
-    
-    print(f"Enriched {len(contacts):,} contacts")
-    
-    # Sort by value score
-    contacts.sort(key=lambda x: x['value_score'], reverse=True)
-    
-    # Get top 5000
-    top_contacts = contacts[:5000]
+            item = (enriched['value_score'], -rows_read, enriched)
+            if len(heap) < TOP_K:
+                heapq.heappush(heap, item)
+            elif item[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, item)
+            rows_read += 1
+            
+            if args.checkpoint_every and rows_read % args.checkpoint_every == 0:
+                stat = os.stat(input_file)
+                coercion = HUBSPOT_COERCER.take()
+                HUBSPOT_COERCER.add(*coercion)
+                save_checkpoint(checkpoint_file, {
+                    'input_file': input_file,
+                    'input_size': stat.st_size,
+                    'input_mtime': stat.st_mtime,
+                    'offset': f.tell(),
+                    'rows_read': rows_read,
+                    'top_k': heap,
+                    'coercion': coercion,
+                })
+                print(f"  ...checkpoint at {rows_read:,} contacts")
+    
+    print(f"Enriched {rows_read:,} contacts")
+    for line in format_coercion_report(HUBSPOT_COERCER.report(), rows_read):
+        print(line)
+    
+    # Sort by value score (input order breaks ties, as the full sort did)
+    top_contacts = [contact for score, neg_index, contact in sorted(heap, key=lambda x: (-x[0], -x[1]))]
     
     # Prepare for Supabase
     supabase_ready = []
@@ -314,8 +418,8 @@ def main():
             'phone_number': contact.get('Phone Number', '').strip() if contact.get('Phone Number') else None,
             'cell': contact.get('Mobile Phone Number', '').strip() if contact.get('Mobile Phone Number') else None,
             'city': contact.get('City', '').strip(),
-            'state': contact.get('State/Region', '').strip(),
-            'specialty': contact.get('Specialty', '').strip(),
+            'state': canonical_state(contact.get('State/Region', '')),
+            'specialty': canonical_specialty(contact.get('Specialty', '')),
             'hubspot_score': contact.get('HubSpot Score', '').strip(),
             'sales_touches': contact.get('Number of Sales Activities', '').strip(),
             'contact_owner': contact.get('Contact owner', '').strip(),
@@ -332,38 +436,45 @@ def main():
             'is_public': False,
             
             # Enrichment fields (stored in access_list as JSON for now)
-            'access_list': json.dumps({
-                'value_score': contact['value_score'],
-                'lead_tier': contact['lead_tier'],
-                'technologies': contact['technologies_mentioned'],
-                'innovation_score': contact['innovation_score'],
-                'practice_volume': contact['practice_volume'],
-                'estimated_deal_value': contact['estimated_deal_value'],
-                'purchase_timeline': contact['purchase_timeline'],
-                'territory': contact['territory'],
-                'engagement_level': contact['engagement_level'],
-                'recommended_action': contact['recommended_action'],
-                'enrichment_priority': i + 1
-            })
+            'access_list': [
+                contact['value_score'],
+                contact['lead_tier'],
+                contact['technologies_mentioned'],
+                contact['innovation_score'],
+                contact['practice_volume'],
+                contact['estimated_deal_value'],
+                contact['purchase_timeline'],
+                contact['territory'],
+                contact['engagement_level'],
+                contact['recommended_action'],
+                i + 1
+            ]
         }
         supabase_ready.append(supabase_contact)
     
-    # Write CSV
-    if supabase_ready:
-        fieldnames = [
-            'first_name', 'last_name', 'email', 'phone_number', 'cell',
-            'city', 'state', 'specialty', 'hubspot_score', 'sales_touches',
-            'notes', 'contact_owner', 'create_date', 'user_id',
-            'is_for_sale', 'sale_price', 'is_public', 'access_list'
-        ]
+    if supabase_ready and args.format == 'ndjson':
+        # One JSON object per line, access_list nested - loads straight into jsonb
+        flat_fields = SUPABASE_FIELDNAMES[:-1]
+        with open(output_file, 'w', encoding='utf-8') as f:
+            writer = NdjsonWriter(f, flat_fields, 'access_list', ACCESS_LIST_KEYS)
+            for contact in supabase_ready:
+                writer.write([contact[field] for field in flat_fields], contact['access_list'])
+        
+        print(f"\n✅ Created enriched NDJSON: {output_file}")
+    
+    elif supabase_ready:
+        # Write CSV - access_list as a JSON string (same text json.dumps produced)
+        for contact in supabase_ready:
+            contact['access_list'] = ACCESS_LIST_CSV_ENCODER.encode(contact['access_list'])
         
         with open(output_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer = csv.DictWriter(f, fieldnames=SUPABASE_FIELDNAMES)
             writer.writeheader()
             writer.writerows(supabase_ready[:5000])  # Only write top 5000
         
         print(f"\n✅ Created enriched CSV: {output_file}")
-        
+    
+    if supabase_ready:
         # Summary
         print(f"\n📊 ENRICHMENT SUMMARY:")
         print(f"{'='*50}")
@@ -405,6 +516,10 @@ def main():
         
         print(f"\n🎯 The enrichment data is stored in 'access_list' field as JSON")
         print(f"This preserves all insights while working with current schema")
+    
+    # Run finished cleanly - the checkpoint is no longer needed
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
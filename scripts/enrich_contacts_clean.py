@@ -3,47 +3,136 @@
 Enrich contacts with all fields as clean columns for Supabase
 """
 
+import argparse
 import csv
+import heapq
 import re
 from datetime import datetime
 
-def calculate_value_score(contact):
-    """Score each contact 0-100 based on multiple factors"""
+import canonical_values
+from canonical_values import canonical_specialty, canonical_state, format_match_report, state_code
+from contact_schema import HUBSPOT_COERCER, format_coercion_report
+from partitioned_output import PartitionedWriter
+from practice_join import PracticeIndex, practice_volume
+
+# Scoring rules - built once at import, shared by the batch run and scoring_service.py
+SPECIALTY_VALUES = {
+    'Oral Surgeon': 20, 'Periodontist': 18, 'Prosthodontist': 16,
+    'Endodontist': 14, 'Orthodontist': 12, 'General Dentist': 10,
+    'Pediatric Dentist': 8
+}
+
+BUYING_SIGNALS = ['ready to buy', 'immediate', 'asap', 'decision']
+INTEREST_SIGNALS = ['interested', 'demo', 'evaluation']
+TECH_SIGNALS = ['yomi', 'robot', 'implant', 'digital']
+
+TECH_MAP = {
+    'Surgical Robotics': ['yomi', 'robot', 'robotic', 'surgical guidance'],
+    'Implant Systems': ['implant', 'full arch', 'full-arch', 'all-on-4'],
+    'Digital Workflow': ['digital', 'cad/cam', 'cad cam', 'digital workflow'],
+    'Imaging': ['cbct', 'cone beam', '3d imaging', '3d x-ray'],
+    'Surgical Guides': ['guide', 'guided surgery', 'surgical guide'],
+    'Intraoral Scanners': ['itero', 'scanner', 'digital impression', 'intraoral'],
+    'Practice Management': ['dentrix', 'eaglesoft', 'open dental'],
+    'Lasers': ['laser', 'biolase', 'waterlase'],
+    'Clear Aligners': ['invisalign', 'clear aligner', 'aligner'],
+    'Microscopes': ['microscope', 'magnification']
+}
+
+HIGH_VOLUME_INDICATORS = ['high volume', 'busy', '10+', '20+', '4-5 monthly', '5-10',
+                          'multiple locations', 'large practice', 'group practice']
+LOW_VOLUME_INDICATORS = ['small practice', 'solo', 'new practice', 'starting', 'part time']
+
+IMMEDIATE_SIGNALS = ['ready to buy', 'immediate', 'asap', 'this quarter',
+                     'wants to purchase', 'decision', 'edge', 'urgent']
+
+INNOVATION_TERMS = {
+    'early adopter': 3, 'innovator': 3, 'cutting edge': 2,
+    'differentiation': 2, 'technology': 1, 'digital': 1,
+    'advanced': 1, 'latest': 1, 'new technology': 2
+}
+CONSERVATIVE_TERMS = ['traditional', 'old school', 'conservative']
+
+BASE_DEAL_VALUES = {
+    'Oral Surgeon': 150000,
+    'Periodontist': 120000,
+    'Prosthodontist': 100000,
+    'Endodontist': 80000,
+    'Orthodontist': 90000,
+    'General Dentist': 60000,
+    'Pediatric Dentist': 50000
+}
+
+VOLUME_MULTIPLIERS = {
+    'High': 2.5,
+    'Medium-High': 1.5,
+    'Medium': 1.0,
+    'Low': 0.7
+}
+
+TERRITORIES = {
+    'Northeast': ['NY', 'NJ', 'CT', 'MA', 'PA', 'ME', 'NH', 'VT', 'RI'],
+    'Southeast': ['FL', 'GA', 'NC', 'SC', 'VA', 'TN', 'AL', 'MS', 'KY', 'WV', 'MD', 'DE', 'DC'],
+    'Midwest': ['IL', 'OH', 'MI', 'IN', 'WI', 'MN', 'IA', 'MO', 'ND', 'SD', 'NE', 'KS'],
+    'Southwest': ['TX', 'OK', 'AR', 'LA', 'NM', 'AZ'],
+    'West': ['CA', 'WA', 'OR', 'NV', 'UT', 'CO', 'ID', 'MT', 'WY'],
+    'Other': ['AK', 'HI']
+}
+# Flattened for a single dict lookup per contact
+STATE_TO_TERRITORY = {state: territory for territory, states in TERRITORIES.items() for state in states}
+
+CLEAN_FIELDNAMES = [
+    # Original fields
+    'first_name', 'last_name', 'email', 'phone_number', 'cell',
+    'city', 'state', 'specialty', 'hubspot_score', 'sales_touches',
+    'notes', 'contact_owner', 'create_date',
+    
+    # Ownership
+    'user_id', 'is_for_sale', 'sale_price', 'is_public',
+    
+    # Enrichment fields
+    'value_score', 'lead_tier', 'technologies_mentioned', 'tech_count',
+    'innovation_score', 'practice_volume', 'estimated_deal_value',
+    'purchase_timeline', 'territory', 'engagement_level',
+    'recommended_action', 'data_quality_score'
+]
+# Added when contacts are joined to the practices dataset (--practices)
+PRACTICE_FIELDNAMES = ['practice_id', 'practice_name']
+
+def calculate_value_score(contact, activities=None):
+    """Score each contact 0-100 based on multiple factors
+    
+    activities: time-decayed touches from engagement.py, already scaled to the
+    static count (engagement.activity_equivalent); the export's static
+    'Number of Sales Activities' is used when not given
+    """
     score = 0
     
-    # HubSpot Score (40 points max)
-    try:
-        hubspot = float(contact.get('HubSpot Score', 0) or 0)
-        if hubspot >= 170: score += 40
-        elif hubspot >= 150: score += 30
-        elif hubspot >= 130: score += 20
-        else: score += 10
-    except: pass
+    # HubSpot Score (40 points max) - typed via contact_schema, no per-row try/except
+    hubspot = HUBSPOT_COERCER.number('HubSpot Score', contact.get('HubSpot Score'))
+    if hubspot >= 170: score += 40
+    elif hubspot >= 150: score += 30
+    elif hubspot >= 130: score += 20
+    else: score += 10
     
     # Sales Activity (20 points max)
-    try:
-        activities = float(contact.get('Number of Sales Activities', 0) or 0)
-        if activities >= 50: score += 20
-        elif activities >= 20: score += 15
-        elif activities >= 10: score += 10
-        elif activities >= 5: score += 5
-    except: pass
+    if activities is None:
+        activities = HUBSPOT_COERCER.number('Number of Sales Activities', contact.get('Number of Sales Activities'))
+    if activities >= 50: score += 20
+    elif activities >= 20: score += 15
+    elif activities >= 10: score += 10
+    elif activities >= 5: score += 5
     
     # Specialty Value (20 points max)
-    specialty_values = {
-        'Oral Surgeon': 20, 'Periodontist': 18, 'Prosthodontist': 16,
-        'Endodontist': 14, 'Orthodontist': 12, 'General Dentist': 10,
-        'Pediatric Dentist': 8
-    }
-    score += specialty_values.get(contact.get('Specialty', ''), 5)
+    score += SPECIALTY_VALUES.get(canonical_specialty(contact.get('Specialty', '')), 5)
     
     # Notes Quality (20 points max)
     notes = str(contact.get('Notes', '') or '').lower()
-    if any(signal in notes for signal in ['ready to buy', 'immediate', 'asap', 'decision']):
+    if any(signal in notes for signal in BUYING_SIGNALS):
         score += 20
-    elif any(signal in notes for signal in ['interested', 'demo', 'evaluation']):
+    elif any(signal in notes for signal in INTEREST_SIGNALS):
         score += 15
-    elif any(tech in notes for tech in ['yomi', 'robot', 'implant', 'digital']):
+    elif any(tech in notes for tech in TECH_SIGNALS):
         score += 10
     elif len(notes) > 10:
         score += 5
@@ -58,20 +147,7 @@ def extract_technologies(notes):
     notes_lower = notes.lower()
     technologies = []
     
-    tech_map = {
-        'Surgical Robotics': ['yomi', 'robot', 'robotic', 'surgical guidance'],
-        'Implant Systems': ['implant', 'full arch', 'full-arch', 'all-on-4'],
-        'Digital Workflow': ['digital', 'cad/cam', 'cad cam', 'digital workflow'],
-        'Imaging': ['cbct', 'cone beam', '3d imaging', '3d x-ray'],
-        'Surgical Guides': ['guide', 'guided surgery', 'surgical guide'],
-        'Intraoral Scanners': ['itero', 'scanner', 'digital impression', 'intraoral'],
-        'Practice Management': ['dentrix', 'eaglesoft', 'open dental'],
-        'Lasers': ['laser', 'biolase', 'waterlase'],
-        'Clear Aligners': ['invisalign', 'clear aligner', 'aligner'],
-        'Microscopes': ['microscope', 'magnification']
-    }
-    
-    for tech_name, keywords in tech_map.items():
+    for tech_name, keywords in TECH_MAP.items():
         if any(keyword in notes_lower for keyword in keywords):
             technologies.append(tech_name)
     
@@ -85,14 +161,11 @@ def determine_practice_volume(notes, specialty):
     notes_lower = notes.lower()
     
     # High volume indicators
-    high_indicators = ['high volume', 'busy', '10+', '20+', '4-5 monthly', '5-10', 
-                      'multiple locations', 'large practice', 'group practice']
-    if any(ind in notes_lower for ind in high_indicators):
+    if any(ind in notes_lower for ind in HIGH_VOLUME_INDICATORS):
         return 'High'
     
     # Low volume indicators
-    low_indicators = ['small practice', 'solo', 'new practice', 'starting', 'part time']
-    if any(ind in notes_lower for ind in low_indicators):
+    if any(ind in notes_lower for ind in LOW_VOLUME_INDICATORS):
         return 'Low'
     
     # Specialists tend to be higher volume
@@ -108,9 +181,7 @@ def estimate_timeline(notes, activities):
     
     notes_lower = notes.lower()
     
-    immediate_signals = ['ready to buy', 'immediate', 'asap', 'this quarter', 
-                        'wants to purchase', 'decision', 'edge', 'urgent']
-    if any(signal in notes_lower for signal in immediate_signals):
+    if any(signal in notes_lower for signal in IMMEDIATE_SIGNALS):
         return 'Immediate'
     
     if 'demo' in notes_lower or 'interested' in notes_lower:
@@ -131,18 +202,12 @@ def calculate_innovation_score(notes, specialty):
     notes_lower = notes.lower()
     
     # Innovation indicators
-    innovation_terms = {
-        'early adopter': 3, 'innovator': 3, 'cutting edge': 2,
-        'differentiation': 2, 'technology': 1, 'digital': 1,
-        'advanced': 1, 'latest': 1, 'new technology': 2
-    }
-    
-    for term, points in innovation_terms.items():
+    for term, points in INNOVATION_TERMS.items():
         if term in notes_lower:
             score += points
     
     # Negative indicators
-    if any(term in notes_lower for term in ['traditional', 'old school', 'conservative']):
+    if any(term in notes_lower for term in CONSERVATIVE_TERMS):
         score -= 2
     
     # Specialty bonus
@@ -153,26 +218,10 @@ def calculate_innovation_score(notes, specialty):
 
 def estimate_deal_value(specialty, volume, technologies):
     """Estimate potential deal value"""
-    base_values = {
-        'Oral Surgeon': 150000,
-        'Periodontist': 120000,
-        'Prosthodontist': 100000,
-        'Endodontist': 80000,
-        'Orthodontist': 90000,
-        'General Dentist': 60000,
-        'Pediatric Dentist': 50000
-    }
-    
-    value = base_values.get(specialty, 50000)
+    value = BASE_DEAL_VALUES.get(specialty, 50000)
     
     # Volume multiplier
-    volume_multipliers = {
-        'High': 2.5,
-        'Medium-High': 1.5,
-        'Medium': 1.0,
-        'Low': 0.7
-    }
-    value *= volume_multipliers.get(volume, 1.0)
+    value *= VOLUME_MULTIPLIERS.get(volume, 1.0)
     
     # Technology interest multiplier
     if 'Surgical Robotics' in technologies:
@@ -185,22 +234,7 @@ def estimate_deal_value(specialty, volume, technologies):
 
 def determine_territory(state):
     """Assign sales territory based on state"""
-    territories = {
-        'Northeast': ['NY', 'NJ', 'CT', 'MA', 'PA', 'ME', 'NH', 'VT', 'RI'],
-        'Southeast': ['FL', 'GA', 'NC', 'SC', 'VA', 'TN', 'AL', 'MS', 'KY', 'WV', 'MD', 'DE', 'DC'],
-        'Midwest': ['IL', 'OH', 'MI', 'IN', 'WI', 'MN', 'IA', 'MO', 'ND', 'SD', 'NE', 'KS'],
-        'Southwest': ['TX', 'OK', 'AR', 'LA', 'NM', 'AZ'],
-        'West': ['CA', 'WA', 'OR', 'NV', 'UT', 'CO', 'ID', 'MT', 'WY'],
-        'Other': ['AK', 'HI']
-    }
-    
-    state_abbr = state.strip().upper()[:2]
-    
-    for territory, states in territories.items():
-        if state_abbr in states:
-            return territory
-    
-    return 'Other'
+    return STATE_TO_TERRITORY.get(state_code(state), 'Other')
 
 def clean_notes(notes):
     """Clean and truncate notes"""
@@ -221,109 +255,365 @@ def clean_notes(notes):
     
     return notes[:200] + "..." if len(notes) > 200 else notes
 
-def main():
-    input_file = '/Users/jasonsmacbookpro2022/Desktop/MasterD_NYCC.csv'
-    output_file = '/Users/jasonsmacbookpro2022/Desktop/contacts_enriched_clean.csv'
+def build_clean_contact(row, practice=None, engagement=None):
+    """Score and enrich one raw export row into a clean Supabase contact record
+    
+    practice: matched row from the practices dataset (see practice_join.py);
+    its size replaces the notes-based volume guess and its id/name are attached
+    engagement: features from engagement.py (activity_equivalent, engagement_level);
+    they replace the static activity count for scoring, timeline and level
+    """
+    # Calculate enrichments
+    notes = row.get('Notes', '')
+    specialty = canonical_specialty(row.get('Specialty', ''))
+    if engagement:
+        activities = engagement['activity_equivalent']
+    else:
+        activities = HUBSPOT_COERCER.number('Number of Sales Activities', row.get('Number of Sales Activities'), count=False)
+    state = row.get('State/Region', '')
+    
+    # Calculate all enrichment fields
+    value_score = calculate_value_score(row, activities if engagement else None)
+    technologies = extract_technologies(notes)
+    volume = (practice_volume(practice) if practice else None) or determine_practice_volume(notes, specialty)
+    
+    # Create clean contact record with ALL fields as columns
+    contact = {
+        # Original fields
+        'first_name': row.get('First Name', '').strip(),
+        'last_name': row.get('Last Name', '').strip(),
+        'email': row.get('Email', '').strip() if row.get('Email') else None,
+        'phone_number': row.get('Phone Number', '').strip() if row.get('Phone Number') else None,
+        'cell': row.get('Mobile Phone Number', '').strip() if row.get('Mobile Phone Number') else None,
+        'city': row.get('City', '').strip(),
+        'state': canonical_state(state),
+        'specialty': specialty,
+        'hubspot_score': row.get('HubSpot Score', '').strip(),
+        'sales_touches': row.get('Number of Sales Activities', '').strip(),
+        'contact_owner': row.get('Contact owner', '').strip(),
+        'create_date': row.get('Create Date', '').strip(),
+        'notes': clean_notes(notes),
+    
+        # Ownership fields
+        'user_id': '5fe37075-c2f5-4acd-abef-1ef15d0c1ffd',
+        'is_for_sale': True,
+        'is_public': False,
+    
+        # Enrichment fields (all as proper columns)
+        'value_score': value_score,
+        'lead_tier': 'Platinum' if value_score >= 85 else \
+                    'Gold' if value_score >= 70 else \
+                    'Silver' if value_score >= 55 else 'Bronze',
+        'technologies_mentioned': technologies,
+        'tech_count': len(technologies.split('|')) if technologies else 0,
+        'innovation_score': calculate_innovation_score(notes, specialty),
+        'practice_volume': volume,
+        'estimated_deal_value': estimate_deal_value(specialty, volume, technologies),
+        'purchase_timeline': estimate_timeline(notes, activities),
+        'territory': determine_territory(state),
+        'engagement_level': engagement['engagement_level'] if engagement else \
+                           'Hot' if activities >= 20 else \
+                           'Warm' if activities >= 5 else 'Cold',
+        'data_quality_score': 100 if row.get('Email') and row.get('Mobile Phone Number') else \
+                             75 if row.get('Email') else 50
+    }
     
-    print("Reading contacts...")
+    if practice:
+        contact['practice_id'] = practice.get('id')
+        contact['practice_name'] = practice.get('name')
+    
+    # Add recommended action
+    if contact['purchase_timeline'] == 'Immediate':
+        contact['recommended_action'] = 'Priority Outreach - Schedule Demo'
+    elif contact['engagement_level'] == 'Hot':
+        contact['recommended_action'] = 'Executive Engagement'
+    elif 'demo' in notes.lower():
+        contact['recommended_action'] = 'Follow Up on Demo Interest'
+    elif activities < 5:
+        contact['recommended_action'] = 'Initial Qualification Call'
+    else:
+        contact['recommended_action'] = 'Continue Nurture Sequence'
+    
+    # Dynamic pricing based on tier
+    contact['sale_price'] = 1.00 if contact['lead_tier'] == 'Platinum' else \
+                           0.75 if contact['lead_tier'] == 'Gold' else 0.50
+    
+    return contact
+
+def read_export_rows(input_file):
+    with open(input_file, 'r', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+
+def enrich_row(row, practices=None, engagement_store=None, geocoder=None):
+    """build_clean_contact() with the optional practice join, engagement and geocoding;
+    returns (contact, engaged)"""
+    practice = practices.match(row)[0] if practices else None
+    engagement = engagement_store.features(row.get('Email')) if engagement_store else None
+    if engagement:
+        from engagement import activity_equivalent, engagement_level
+        engagement['activity_equivalent'] = activity_equivalent(engagement['decayed_touches'])
+        engagement['engagement_level'] = engagement_level(engagement['decayed_touches'])
+    contact = build_clean_contact(row, practice, engagement)
+    if geocoder:
+        contact.update(geocoder.geo_fields(row))
+    return contact, engagement is not None
+
+
+def take_counters(practices=None, geocoder=None):
+    """The per-row report counters this process has accumulated, reset to zero"""
+    missing, invalid = HUBSPOT_COERCER.take()
+    counters = {
+        'missing': missing,
+        'invalid': invalid,
+        'canonical': {kind: {method: set(values) for method, values in methods.items()}
+                      for kind, methods in canonical_values.MATCHES.items()},
+    }
+    for methods in canonical_values.MATCHES.values():
+        methods.clear()
+    if practices:
+        counters['matched'], counters['practice_contacts'] = dict(practices.matched), practices.contacts
+        practices.matched = dict.fromkeys(practices.matched, 0)
+        practices.contacts = 0
+    if geocoder:
+        counters['located'] = dict(geocoder.located)
+        geocoder.located = dict.fromkeys(geocoder.located, 0)
+    return counters
+
+
+def add_counters(counters, practices=None, geocoder=None):
+    """Fold a worker's take_counters() into this process's reports"""
+    HUBSPOT_COERCER.add(counters['missing'], counters['invalid'])
+    canonical_values.merge_matches(counters['canonical'])
+    if practices:
+        for method, count in counters['matched'].items():
+            practices.matched[method] += count
+        practices.contacts += counters['practice_contacts']
+    if geocoder:
+        for precision, count in counters['located'].items():
+            geocoder.located[precision] += count
+
+
+# Lookup sources installed in each --pipeline worker process
+_worker_sources = (None, None, None)
+
+
+def init_enrich_worker(practices, engagement_store, geocoder):
+    global _worker_sources
+    _worker_sources = (practices, engagement_store, geocoder)
+    take_counters(practices, geocoder)  # start from zero whatever the parent had counted
+
+
+def enrich_batch(rows):
+    """--pipeline compute stage: (contacts, engaged, counters) for one batch of export rows"""
+    practices, engagement_store, geocoder = _worker_sources
+    contacts = []
+    engaged = 0
+    for row in rows:
+        contact, was_engaged = enrich_row(row, practices, engagement_store, geocoder)
+        contacts.append(contact)
+        engaged += was_engaged
+    return contacts, engaged, take_counters(practices, geocoder)
+
+
+def main():
+    from hubspot_ingest import add_hubspot_arguments
+
+    parser = argparse.ArgumentParser(description='Enrich contacts with all fields as clean columns')
+    parser.add_argument('--input', default='/Users/jasonsmacbookpro2022/Desktop/MasterD_NYCC.csv')
+    parser.add_argument('--output', default='/Users/jasonsmacbookpro2022/Desktop/contacts_enriched_clean.csv')
+    parser.add_argument('--partition-by', action='append', choices=['territory', 'contact_owner'],
+                        help='also write one file per value of this field (repeatable)')
+    parser.add_argument('--partition-dir', default='/Users/jasonsmacbookpro2022/Desktop/contacts_by_partition')
+    parser.add_argument('--partition-top-k', type=int, help='keep only the best K contacts per partition file')
+    parser.add_argument('--max-open-files', type=int, default=64)
+    parser.add_argument('--quota-max', action='append',
+                        help='cap the top 5000 per group, e.g. contact_owner=600 or territory:Northeast=1500')
+    parser.add_argument('--quota-min', action='append',
+                        help='guarantee a minimum per group, e.g. specialty=150')
+    parser.add_argument('--practices', help='CSV export of the practices table to join contacts against')
+    parser.add_argument('--engagement', help='engagement store built by engagement.py from sales_activities')
+    parser.add_argument('--distribution', action='store_true',
+                        help='sketch score / deal value / innovation percentiles over every contact')
+    parser.add_argument('--sketch-output', help='save those sketches (quantile_sketch.py can merge them)')
+    parser.add_argument('--sqlite', help='also upsert every enriched contact into this SQLite database')
+    parser.add_argument('--geo', action='store_true', help='add latitude / longitude from the geo_data/ centroids')
+    parser.add_argument('--zip-centroids', help='ZIP centroid table for --geo (Census ZCTA gazetteer or CSV)')
+    parser.add_argument('--hubspot', action='store_true',
+                        help='score contacts straight from the HubSpot API ($HUBSPOT_ACCESS_TOKEN) instead of --input')
+    add_hubspot_arguments(parser, prefix='hubspot-')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='read, score and write in overlapped stages (scoring in worker processes)')
+    parser.add_argument('--workers', type=int, help='scoring processes for --pipeline (default: all cores)')
+    parser.add_argument('--batch-size', type=int, default=2000, help='rows per --pipeline batch')
+    parser.add_argument('--memory-budget',
+                        help='e.g. 2G: keep every contact in memory only if the export fits, else stream the top 5,000')
+    args = parser.parse_args()
+    
+    input_file = args.input
+    output_file = args.output
+    
+    practices = None
+    fieldnames = CLEAN_FIELDNAMES
+    if args.practices:
+        practices = PracticeIndex.from_csv(args.practices)
+        fieldnames = CLEAN_FIELDNAMES + PRACTICE_FIELDNAMES
+    
+    geocoder = None
+    if args.geo or args.zip_centroids:
+        from geo_index import GEO_FIELDNAMES, Geocoder
+        geocoder = Geocoder(args.zip_centroids)
+        for line in geocoder.missing_warnings():
+            print(line)
+        fieldnames = fieldnames + GEO_FIELDNAMES
+    
+    engagement_store = None
+    if args.engagement:
+        from engagement import EngagementStore
+        engagement_store = EngagementStore.load(args.engagement)
+        engaged = 0
+    
+    selector = None
+    if args.quota_max or args.quota_min:
+        from quota_selection import QuotaSelector, parse_quotas, quota_warnings
+        selector = QuotaSelector(5000, parse_quotas(args.quota_max), parse_quotas(args.quota_min))
+    
+    streaming = False
+    if args.memory_budget and not selector:
+        from execution_planner import format_bytes, parse_size, plan_execution, profile_input
+        budget = parse_size(args.memory_budget)
+        if args.hubspot:
+            streaming = True
+            print(f"📋 Plan: streaming - API input has no known size; keeping only the best 5,000")
+        else:
+            counted = HUBSPOT_COERCER.take()
+            profile = profile_input(input_file, transform=build_clean_contact)
+            HUBSPOT_COERCER.take()  # the sample is counted again in the run
+            HUBSPOT_COERCER.add(*counted)
+            # A list of (score, contact) tuples, not a frame: ~1.2x the contact dicts. There is
+            # no on-disk sort here, so past in-memory the plan is always streaming
+            plan = plan_execution(profile, budget, k=5000, frame_factor=1.2, external=False)
+            streaming = plan.strategy != 'in-memory'
+            print(f"📋 Plan: {plan.strategy} - {plan.reason}")
+            print(f"   - Estimated peak memory: {format_bytes(plan.peak_bytes)} (budget {format_bytes(budget)})")
+    
+    sketches = None
+    if args.distribution or args.sketch_output:
+        from quantile_sketch import SketchSet
+        sketches = SketchSet()
+    
+    store = None
+    if args.sqlite:
+        from sqlite_store import ContactStore
+        store = ContactStore(args.sqlite)
+        store.begin_load()
+    
+    partitions = None
+    if args.partition_by:
+        partitions = PartitionedWriter(args.partition_dir, args.partition_by, fieldnames,
+                                       max_open=args.max_open_files, top_k=args.partition_top_k)
+    
+    if args.hubspot:
+        from hubspot_ingest import make_ingest
+        ingest = make_ingest(args)  # --hubspot-url / --hubspot-token / --hubspot-rate / --hubspot-workers
+        print(f"Streaming contacts from {args.hubspot_url}...")
+        rows = ingest.rows()
+    else:
+        print("Reading contacts...")
+        rows = read_export_rows(input_file)
+    
+    if args.pipeline:
+        # Reader thread -> worker processes -> this loop, overlapping I/O and scoring
+        from pipelined import pipelined_map
+        batches = pipelined_map(enrich_batch, rows, workers=args.workers, batch_size=args.batch_size,
+                                initializer=init_enrich_worker, initargs=(practices, engagement_store, geocoder))
+    else:
+        batches = (([contact], engaged_row, None) for contact, engaged_row in
+                   (enrich_row(row, practices, engagement_store, geocoder) for row in rows))
     
     all_contacts = []
-    with open(input_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Calculate enrichments
-            notes = row.get('Notes', '')
-            specialty = row.get('Specialty', '')
-            activities = float(row.get('Number of Sales Activities', 0) or 0)
-            state = row.get('State/Region', '')
-            
-            # Calculate all enrichment fields
-            value_score = calculate_value_score(row)
-            technologies = extract_technologies(notes)
-            volume = determine_practice_volume(notes, specialty)
-            
-            # Create clean contact record with ALL fields as columns
-            contact = {
-                # Original fields
-                'first_name': row.get('First Name', '').strip(),
-                'last_name': row.get('Last Name', '').strip(),
-                'email': row.get('Email', '').strip() if row.get('Email') else None,
-                'phone_number': row.get('Phone Number', '').strip() if row.get('Phone Number') else None,
-                'cell': row.get('Mobile Phone Number', '').strip() if row.get('Mobile Phone Number') else None,
-                'city': row.get('City', '').strip(),
-                'state': row.get('State/Region', '').strip(),
-                'specialty': specialty,
-                'hubspot_score': row.get('HubSpot Score', '').strip(),
-                'sales_touches': row.get('Number of Sales Activities', '').strip(),
-                'contact_owner': row.get('Contact owner', '').strip(),
-                'create_date': row.get('Create Date', '').strip(),
-                'notes': clean_notes(notes),
-                
-                # Ownership fields
-                'user_id': '5fe37075-c2f5-4acd-abef-1ef15d0c1ffd',
-                'is_for_sale': True,
-                'is_public': False,
-                
-                # Enrichment fields (all as proper columns)
-                'value_score': value_score,
-                'lead_tier': 'Platinum' if value_score >= 85 else \
-                            'Gold' if value_score >= 70 else \
-                            'Silver' if value_score >= 55 else 'Bronze',
-                'technologies_mentioned': technologies,
-                'tech_count': len(technologies.split('|')) if technologies else 0,
-                'innovation_score': calculate_innovation_score(notes, specialty),
-                'practice_volume': volume,
-                'estimated_deal_value': estimate_deal_value(specialty, volume, technologies),
-                'purchase_timeline': estimate_timeline(notes, activities),
-                'territory': determine_territory(state),
-                'engagement_level': 'Hot' if activities >= 20 else \
-                                   'Warm' if activities >= 5 else 'Cold',
-                'data_quality_score': 100 if row.get('Email') and row.get('Mobile Phone Number') else \
-                                     75 if row.get('Email') else 50
-            }
-            
-            # Add recommended action
-            if contact['purchase_timeline'] == 'Immediate':
-                contact['recommended_action'] = 'Priority Outreach - Schedule Demo'
-            elif contact['engagement_level'] == 'Hot':
-                contact['recommended_action'] = 'Executive Engagement'
-            elif 'demo' in notes.lower():
-                contact['recommended_action'] = 'Follow Up on Demo Interest'
-            elif activities < 5:
-                contact['recommended_action'] = 'Initial Qualification Call'
+    top_heap = []  # streaming: (score, -index, contact) for the best 5,000 so far
+    seen = 0
+    for contacts, batch_engaged, counters in batches:
+        if counters:
+            add_counters(counters, practices, geocoder)
+        if engagement_store:
+            engaged += batch_engaged
+        for contact in contacts:
+            if selector:
+                selector.add(contact)
+            elif streaming:
+                # Ties evict the later row, matching the stable sort of the full list
+                item = (contact['value_score'], -seen, contact)
+                if len(top_heap) < 5000:
+                    heapq.heappush(top_heap, item)
+                elif item[:2] > top_heap[0][:2]:
+                    heapq.heapreplace(top_heap, item)
+                seen += 1
             else:
-                contact['recommended_action'] = 'Continue Nurture Sequence'
-            
-            # Dynamic pricing based on tier
-            contact['sale_price'] = 1.00 if contact['lead_tier'] == 'Platinum' else \
-                                   0.75 if contact['lead_tier'] == 'Gold' else 0.50
-            
-            all_contacts.append((value_score, contact))
-    
-    print(f"Enriched {len(all_contacts):,} contacts")
-    
-    # Sort by value score and get top 5000
-    all_contacts.sort(key=lambda x: x[0], reverse=True)
-    top_5000 = [contact for score, contact in all_contacts[:5000]]
+                all_contacts.append((contact['value_score'], contact))
+            if partitions:
+                partitions.add(contact)
+            if sketches:
+                sketches.add(contact)
+            if store:
+                store.add(contact)
+    
+    total = selector.seen if selector else seen if streaming else len(all_contacts)
+    print(f"Enriched {total:,} contacts")
+    for line in format_coercion_report(HUBSPOT_COERCER.report(), total):
+        print(line)
+    for kind, column in (('specialty', 'Specialty'), ('state', 'State/Region')):
+        lines = format_match_report(kind)
+        if lines:
+            print(f"Canonical {column} values:")
+            for line in lines:
+                print(line)
+    if engagement_store:
+        print(f"\nEngagement: {engaged:,} contacts scored on decayed activity "
+              f"({len(engagement_store):,} in the store), the rest on the static count")
+    if practices:
+        print("\nPractice Join:")
+        for line in practices.report():
+            print(line)
+    if geocoder:
+        print("\nGeocoded by:")
+        for line in geocoder.report():
+            print(line)
+    if sketches:
+        print("\n📊 Full-Export Distribution:")
+        for line in sketches.report():
+            print(line)
+        if args.sketch_output:
+            sketches.save(args.sketch_output)
+            print(f"   - Sketches saved to: {args.sketch_output}")
+    
+    if partitions:
+        counts = partitions.close()
+        print(f"\n✅ Wrote partitioned files to: {args.partition_dir}")
+        for field, per_key in counts.items():
+            print(f"   - {field}: {len(per_key):,} files")
+    
+    # Sort by value score and get top 5000 (within the quotas, if any)
+    if selector:
+        selected, unmet = selector.select()
+        top_5000 = [contact for score, contact in selected]
+        for line in quota_warnings(selected, selector, unmet):
+            print(line)
+    elif streaming:
+        top_5000 = [contact for score, neg_index, contact in sorted(top_heap, key=lambda x: (-x[0], -x[1]))]
+    else:
+        all_contacts.sort(key=lambda x: x[0], reverse=True)
+        top_5000 = [contact for score, contact in all_contacts[:5000]]
+    
+    if store:
+        store.mark_selected(top_5000)
+        store.finish_load()
+        store.close()
+        print(f"\n✅ Upserted {store.loaded:,} contacts into SQLite: {args.sqlite}")
     
     # Write clean CSV with all fields as columns
     if top_5000:
-        fieldnames = [
-            # Original fields
-            'first_name', 'last_name', 'email', 'phone_number', 'cell',
-            'city', 'state', 'specialty', 'hubspot_score', 'sales_touches',
-            'notes', 'contact_owner', 'create_date',
-            
-            # Ownership
-            'user_id', 'is_for_sale', 'sale_price', 'is_public',
-            
-            # Enrichment fields
-            'value_score', 'lead_tier', 'technologies_mentioned', 'tech_count',
-            'innovation_score', 'practice_volume', 'estimated_deal_value',
-            'purchase_timeline', 'territory', 'engagement_level',
-            'recommended_action', 'data_quality_score'
-        ]
-        
         with open(output_file, 'w', newline='', encoding='utf-8') as f:
             writer = csv.DictWriter(f, fieldnames=fieldnames)
             writer.writeheader()
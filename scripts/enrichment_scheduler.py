@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Run the tiered enrichment searches planned by select_top_5000.py
+
+Each contact in Top_5000_Contacts.csv carries an enrichment_tier. This turns
+the tiers into a priority queue of search tasks and executes them against a
+pluggable search provider, concurrently, under a global rate limit and a hard
+dollar budget. Best prospects (lowest enrichment_priority) are searched first.
+"""
+
+import argparse
+import csv
+import heapq
+import importlib
+import json
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+# Searches per contact for each tier (matches Top_5000_Report.txt)
+TIER_SEARCHES = {
+    'Tier 1 - Deep': 5,
+    'Tier 2 - Medium': 2,
+    'Tier 3 - Light': 1,
+}
+
+# Query templates, in the order they are spent. Light enrichment only gets the
+# first one, deep enrichment gets all five.
+SEARCH_TEMPLATES = [
+    ('practice', '{first} {last} {specialty} {city} {state}'),
+    ('technology', '{first} {last} {city} dental technology implants CBCT'),
+    ('reviews', '{first} {last} {specialty} {city} reviews'),
+    ('social', '{first} {last} {specialty} linkedin'),
+    ('news', '{first} {last} {city} dental practice news'),
+]
+
+# Cost per search used for the estimate in Top_5000_Report.txt ($25 / 5,000)
+DEFAULT_COST_PER_SEARCH = 0.005
+
+
+class SearchProvider:
+    """Interface for enrichment search backends"""
+
+    name = 'base'
+    cost_per_search = DEFAULT_COST_PER_SEARCH
+
+    def search(self, query):
+        """Run one search and return a JSON-serializable result"""
+        raise NotImplementedError
+
+
+class FakeSearchProvider(SearchProvider):
+    """Local provider for tests and dry runs - no network, no spend"""
+
+    name = 'fake'
+
+    def __init__(self, latency=0.01, failure_rate=0.0, seed=42):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def search(self, query):
+        with self._lock:
+            fail = self._random.random() < self.failure_rate
+        time.sleep(self.latency)
+        if fail:
+            raise RuntimeError(f"fake provider failure for '{query}'")
+        return {'query': query, 'results': [f"https://example.com/{zlib.crc32(query.encode()) % 100000}"]}
+
+
+PROVIDERS = {
+    'fake': FakeSearchProvider,
+}
+
+
+def load_provider(spec):
+    """Resolve a provider by registry name or 'module:ClassName'"""
+    if spec in PROVIDERS:
+        return PROVIDERS[spec]()
+    module_name, _, attr = spec.partition(':')
+    if not attr:
+        raise ValueError(f"Unknown provider '{spec}' (use one of {sorted(PROVIDERS)} or module:ClassName)")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+class RateLimiter:
+    """Token bucket shared by all workers"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_for = (1 - self.tokens) / self.rate
+            time.sleep(wait_for)
+
+    def set_rate(self, rate):
+        """Change the refill rate; tokens earned up to now are credited at the old one"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.rate = float(rate)
+
+
+class Budget:
+    """Hard dollar cap - spend is reserved before a search is dispatched"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.spent = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, cost):
+        with self._lock:
+            if self.spent + cost > self.limit + 1e-9:
+                return False
+            self.spent += cost
+            return True
+
+
+def build_task_queue(contacts):
+    """Turn tiered contacts into a heap of (priority, search_index, seq, task)"""
+    heap = []
+    seq = 0
+    for contact in contacts:
+        searches = TIER_SEARCHES.get(contact.get('enrichment_tier', ''), 0)
+        try:
+            priority = int(float(contact.get('enrichment_priority') or 0))
+        except ValueError:
+            priority = 0
+        fields = {
+            'first': (contact.get('First Name') or '').strip(),
+            'last': (contact.get('Last Name') or '').strip(),
+            'specialty': (contact.get('Specialty') or '').strip(),
+            'city': (contact.get('City') or '').strip(),
+            'state': (contact.get('State/Region') or '').strip(),
+        }
+        for search_index, (kind, template) in enumerate(SEARCH_TEMPLATES[:searches]):
+            task = {
+                'enrichment_priority': priority,
+                'enrichment_tier': contact.get('enrichment_tier', ''),
+                'first_name': fields['first'],
+                'last_name': fields['last'],
+                'search_type': kind,
+                'query': ' '.join(template.format(**fields).split()),
+            }
+            heapq.heappush(heap, (priority, search_index, seq, task))
+            seq += 1
+    return heap
+
+
+def run_tasks(heap, provider, rate, budget, workers=8, max_retries=2):
+    """Execute queued searches by priority; returns (results, stats)"""
+    limiter = RateLimiter(rate)
+    results = []
+    stats = {'completed': 0, 'failed': 0, 'retried': 0, 'skipped_budget': 0}
+
+    def execute(task):
+        limiter.acquire()
+        return provider.search(task['query'])
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+        while heap or in_flight:
+            # Keep the pool full with the highest-priority pending tasks
+            while heap and len(in_flight) < workers:
+                item = heapq.heappop(heap)
+                task = item[3]
+                if not budget.reserve(provider.cost_per_search):
+                    # Budget exhausted: nothing below this can run either
+                    stats['skipped_budget'] += 1 + len(heap)
+                    heap.clear()
+                    break
+                in_flight[pool.submit(execute, task)] = item
+
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = in_flight.pop(future)
+                task = dict(item[3])
+                attempts = task.pop('_attempts', 0)
+                try:
+                    task['result'] = json.dumps(future.result())
+                    task['status'] = 'ok'
+                    stats['completed'] += 1
+                except Exception as e:
+                    if attempts < max_retries:
+                        # Spent money is not refunded; retries cost a search too
+                        retry = dict(item[3], _attempts=attempts + 1)
+                        heapq.heappush(heap, item[:3] + (retry,))
+                        stats['retried'] += 1
+                        continue
+                    task['result'] = str(e)
+                    task['status'] = 'failed'
+                    stats['failed'] += 1
+                task['completed_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                results.append(task)
+
+    search_order = {kind: i for i, (kind, _) in enumerate(SEARCH_TEMPLATES)}
+    results.sort(key=lambda t: (t['enrichment_priority'], search_order[t['search_type']]))
+    return results, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--input', default='/Users/jasonsmacbookpro2022/Desktop/Top_5000_Contacts.csv')
+    parser.add_argument('--output', default='/Users/jasonsmacbookpro2022/Desktop/Enrichment_Results.csv')
+    parser.add_argument('--provider', default='fake', help="registry name or module:ClassName")
+    parser.add_argument('--budget', type=float, default=52.50, help='hard spend cap in dollars')
+    parser.add_argument('--rate', type=float, default=10.0, help='max searches per second')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"Reading {args.input}...")
+    with open(args.input, 'r', encoding='utf-8') as f:
+        contacts = list(csv.DictReader(f))
+
+    provider = load_provider(args.provider)
+    heap = build_task_queue(contacts)
+    planned = len(heap)
+    print(f"✓ Queued {planned:,} searches for {len(contacts):,} contacts "
+          f"(est. ${planned * provider.cost_per_search:,.2f} with '{provider.name}')")
+
+    budget = Budget(args.budget)
+    start = time.monotonic()
+    results, stats = run_tasks(heap, provider, args.rate, budget, workers=args.workers)
+    elapsed = time.monotonic() - start
+
+    fieldnames = [
+        'enrichment_priority', 'enrichment_tier', 'first_name', 'last_name',
+        'search_type', 'query', 'status', 'result', 'completed_at'
+    ]
+    with open(args.output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(results)
+
+    print(f"\n📊 ENRICHMENT RUN SUMMARY:")
+    print(f"{'='*50}")
+    print(f"  Completed searches: {stats['completed']:,}")
+    print(f"  Failed searches: {stats['failed']:,} ({stats['retried']:,} retries)")
+    print(f"  Skipped (budget): {stats['skipped_budget']:,}")
+    print(f"  Spend: ${budget.spent:,.2f} of ${budget.limit:,.2f}")
+    print(f"  Elapsed: {elapsed:.1f}s")
+    print(f"\n✅ Saved search results to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Pick in-memory, streaming top-K or external sort from a memory budget
+
+A 20k-row rep file and an 8M-row master export went through the same
+load-everything path: pandas over the whole file, then a sort. That is the
+fastest way to rank a file that fits, and an OOM kill for one that doesn't.
+The planner samples the head of the input (SAMPLE_BYTES), estimates the row
+count and the in-memory size of a row, and picks the cheapest strategy whose
+estimated peak fits the budget:
+
+- in-memory   pandas frame scored with score_variants.py's array lookups
+              (the baseline rules), one stable sort; peak ~ rows x row size
+              x PANDAS_PEAK_FACTOR
+- streaming   raw_export_scanner.py: memory-mapped scan keeping a bounded
+              heap of the best K; peak ~ K rows. Only for top-K output
+- external    external_rank.py: sorted runs spilled to disk and k-way merged,
+              run size chosen to fit the budget; for full rankings that don't
+              fit in memory
+
+All three rank by the same value_score with ties in input order and write
+the same columns, so the plan changes speed and memory, never the result.
+
+  python3 execution_planner.py --input MasterD_NYCC.csv --output Top_5000_Contacts.csv --memory-budget 2G
+  python3 execution_planner.py --input MasterD_NYCC.csv --output MasterD_Ranked.csv --all --memory-budget 512M
+  python3 execution_planner.py --input MasterD_NYCC.csv --memory-budget 1G --dry-run
+"""
+
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from collections import namedtuple
+
+SAMPLE_BYTES = 1 << 20
+BASE_BYTES = 100 << 20        # interpreter + pandas / numpy imports
+PANDAS_PEAK_FACTOR = 2.0      # text frame + NaN copy + coerced columns + sort / apply temporaries
+RUN_ROW_OVERHEAD = 120        # (score, seq, values) tuple around each buffered row
+HEADROOM = 0.8                # plan against 80% of the budget
+MIN_RUN_SIZE = 1000
+STRATEGIES = ['in-memory', 'streaming', 'external']
+
+InputProfile = namedtuple('InputProfile', ['file_bytes', 'rows', 'columns', 'bytes_per_row', 'row_memory'])
+Plan = namedtuple('Plan', ['strategy', 'peak_bytes', 'run_size', 'reason'])
+
+
+def parse_size(text):
+    """'512M' / '4G' / '1.5g' / '800000000' -> bytes"""
+    text = str(text).strip().upper().rstrip('B')
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(float(text))
+
+
+def format_bytes(count):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(count) < 1024 or unit == 'GB':
+            return f"{count:,.0f} {unit}" if unit == 'B' else f"{count:,.1f} {unit}"
+        count /= 1024
+
+
+def deep_size(value):
+    """Approximate bytes held by a row: the container plus its str / number values"""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def profile_input(path, transform=None, sample_bytes=SAMPLE_BYTES):
+    """Size estimates from the first sample_bytes of a CSV
+
+    transform: maps a sampled row dict to what the caller keeps per row (e.g.
+    build_clean_contact); row_memory is measured on its output
+    """
+    file_bytes = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        head = f.read(sample_bytes)
+    complete = head if len(head) == file_bytes else head[:head.rfind(b'\n') + 1]
+    lines = list(csv.reader(io.StringIO(complete.decode('utf-8-sig', errors='replace'), newline='')))
+    if not lines:
+        return InputProfile(file_bytes, 0, 0, 0, 0)
+    header, rows = lines[0], lines[1:]
+    if not rows:
+        return InputProfile(file_bytes, 0, len(header), 0, 0)
+
+    header_bytes = len(complete.split(b'\n', 1)[0]) + 1
+    bytes_per_row = (len(complete) - header_bytes) / len(rows)
+    if transform:
+        row_memory = sum(deep_size(transform(dict(zip(header, row)))) for row in rows) / len(rows)
+    else:
+        row_memory = sum(deep_size(row) for row in rows) / len(rows)
+    estimated_rows = len(rows) if len(complete) == file_bytes else int((file_bytes - header_bytes) / bytes_per_row)
+    return InputProfile(file_bytes, estimated_rows, len(header), bytes_per_row, row_memory)
+
+
+def plan_execution(profile, budget, k=5000, rank_all=False, frame_factor=PANDAS_PEAK_FACTOR, external=True):
+    """Cheapest strategy whose estimated peak fits budget (bytes); ValueError if none does
+
+    external=False is for callers with no on-disk sort: past in-memory they get
+    the streaming plan, with its real peak even when that is over the budget.
+    """
+    usable = budget * HEADROOM
+    in_memory = BASE_BYTES + profile.rows * profile.row_memory * frame_factor
+    if in_memory <= usable:
+        return Plan('in-memory', in_memory, None,
+                    f"~{profile.rows:,} rows fit in memory ({format_bytes(in_memory)} of {format_bytes(budget)})")
+
+    if not rank_all:
+        streaming = BASE_BYTES + min(k, profile.rows) * (profile.row_memory + RUN_ROW_OVERHEAD)
+        if streaming <= usable or not external:
+            over = '' if streaming <= usable else f" (over the budget: the best {k:,} have to stay in memory)"
+            return Plan('streaming', streaming, None,
+                        f"~{profile.rows:,} rows need ~{format_bytes(in_memory)}; keeping only the best {k:,}{over}")
+
+    return _external_plan(profile, budget,
+                          f"~{profile.rows:,} rows need ~{format_bytes(in_memory)}; sorting runs on disk")
+
+
+def _external_plan(profile, budget, reason):
+    """External sort with the largest run size the budget allows"""
+    per_row = profile.row_memory + RUN_ROW_OVERHEAD
+    run_size = int((budget * HEADROOM - BASE_BYTES) / per_row)
+    if run_size < MIN_RUN_SIZE:
+        raise ValueError(f"A {format_bytes(budget)} budget can't hold even {MIN_RUN_SIZE:,} rows "
+                         f"(~{format_bytes(profile.row_memory)} each) - raise --memory-budget")
+    run_size = min(run_size, max(profile.rows, MIN_RUN_SIZE))
+    return Plan('external', BASE_BYTES + run_size * per_row, run_size, f"{reason} (runs of {run_size:,})")
+
+
+def forced_plan(profile, strategy, budget, k=5000):
+    """Plan for a strategy chosen by hand (--strategy), with its estimated peak"""
+    if strategy == 'in-memory':
+        return Plan(strategy, BASE_BYTES + profile.rows * profile.row_memory * PANDAS_PEAK_FACTOR, None, 'forced')
+    if strategy == 'streaming':
+        return Plan(strategy, BASE_BYTES + min(k, profile.rows) * (profile.row_memory + RUN_ROW_OVERHEAD),
+                    None, 'forced')
+    return _external_plan(profile, budget, 'forced')
+
+
+# ---- strategies ---------------------------------------------------------------
+
+RANK_COLUMNS = ['value_score', 'enrichment_priority', 'enrichment_tier']
+
+
+def rank_in_memory(input_file, output_file, k=None):
+    """Whole file as one frame, scored and sorted in vectorized steps"""
+    import numpy as np
+    import pandas as pd
+
+    from contact_schema import coerce_frame
+    from external_rank import enrichment_tier
+    from score_variants import extract_features, make_variant, score_variant
+
+    text = pd.read_csv(input_file, dtype=object, keep_default_na=False)
+    work = text.replace('', np.nan)  # blank cells are missing, as in external_rank.score_row
+    coerce_frame(work)
+    # The baseline variant is calculate_contact_value() as array lookups
+    scores = score_variant(extract_features(work), make_variant({})).astype(int)
+    order = np.argsort(-scores, kind='stable')
+    if k is not None:
+        order = order[:k]
+
+    ranked = text.iloc[order].copy()
+    ranked['value_score'] = scores[order]
+    ranked['enrichment_priority'] = np.arange(1, len(order) + 1)
+    ranked['enrichment_tier'] = [enrichment_tier(priority) for priority in ranked['enrichment_priority']]
+    ranked.to_csv(output_file, index=False, lineterminator='\r\n')  # csv.writer's line ends, as the other strategies
+    return len(text)
+
+
+class _BlankAsMissing:
+    """ContactRecord view whose blank cells read as None, like pandas NaN"""
+
+    __slots__ = ('record',)
+
+    def __init__(self, record):
+        self.record = record
+
+    def get(self, name, default=None):
+        value = self.record.get(name, default)
+        return None if value == '' else value
+
+
+def rank_streaming(input_file, output_file, k):
+    """Memory-mapped scan keeping only the best k rows"""
+    from external_rank import enrichment_tier
+    from raw_export_scanner import RawExportScanner, select_top_records
+    from contact_value import calculate_contact_value
+
+    top, total = select_top_records(input_file, lambda record: calculate_contact_value(_BlankAsMissing(record)), k)
+    with RawExportScanner(input_file) as scanner:
+        header = scanner.header
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header + RANK_COLUMNS)
+        for priority, (value, row) in enumerate(top, 1):
+            writer.writerow([row.get(name, '') for name in header] + [value, priority, enrichment_tier(priority)])
+    return total
+
+
+def rank_external(input_file, output_file, run_size, k=None, tmp_dir=None):
+    """Spill sorted runs and merge; with k, only the first k ranked rows are kept"""
+    from external_rank import rank_export
+
+    if k is None:
+        return rank_export(input_file, output_file, run_size, tmp_dir)[0]
+    ranked_file = output_file + '.ranked.tmp'
+    try:
+        total = rank_export(input_file, ranked_file, run_size, tmp_dir)[0]
+        with open(ranked_file, 'r', newline='', encoding='utf-8') as src, \
+                open(output_file, 'w', newline='', encoding='utf-8') as dst:
+            reader, writer = csv.reader(src), csv.writer(dst)
+            writer.writerow(next(reader))
+            for i, row in enumerate(reader):
+                if i >= k:
+                    break
+                writer.writerow(row)
+    finally:
+        if os.path.exists(ranked_file):
+            os.remove(ranked_file)
+    return total
+
+
+def peak_rss():
+    """Peak resident memory of this process in bytes (None where unavailable)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rank contacts with the fastest strategy that fits a memory budget')
+    parser.add_argument('--input', default='/Users/jasonsmacbookpro2022/Desktop/MasterD_NYCC.csv')
+    parser.add_argument('--output', default='/Users/jasonsmacbookpro2022/Desktop/Top_5000_Contacts.csv')
+    parser.add_argument('--memory-budget', default='2G', help='e.g. 512M, 4G')
+    parser.add_argument('--k', type=int, default=5000, help='contacts to keep')
+    parser.add_argument('--all', action='store_true', help='rank every contact instead of the top K')
+    parser.add_argument('--strategy', choices=STRATEGIES, help='skip the planner and use this strategy')
+    parser.add_argument('--tmp-dir', help='spill directory for the external strategy')
+    parser.add_argument('--dry-run', action='store_true', help='print the plan and exit')
+    args = parser.parse_args()
+
+    budget = parse_size(args.memory_budget)
+    profile = profile_input(args.input)
+    try:
+        plan = (forced_plan(profile, args.strategy, budget, args.k) if args.strategy else
+                plan_execution(profile, budget, args.k, args.all))
+    except ValueError as e:
+        print(f"⚠️  {e}")
+        sys.exit(1)
+
+    print(f"📋 Input: {format_bytes(profile.file_bytes)}, ~{profile.rows:,} rows x {profile.columns} columns "
+          f"(~{profile.bytes_per_row:,.0f} B on disk, ~{format_bytes(profile.row_memory)} in memory per row)")
+    print(f"📋 Plan: {plan.strategy} - {plan.reason}")
+    print(f"   - Estimated peak memory: {format_bytes(plan.peak_bytes)} (budget {format_bytes(budget)})")
+    if args.dry_run:
+        return
+
+    k = None if args.all else args.k
+    started = time.perf_counter()
+    if plan.strategy == 'in-memory':
+        total = rank_in_memory(args.input, args.output, k)
+    elif plan.strategy == 'streaming':
+        if k is None:
+            print("⚠️  The streaming strategy only keeps the top K - pass --k or drop --all")
+            sys.exit(1)
+        total = rank_streaming(args.input, args.output, k)
+    else:
+        total = rank_external(args.input, args.output, plan.run_size, k, args.tmp_dir)
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ Ranked {total:,} contacts ({'all' if k is None else f'top {min(k, total):,}'} written) "
+          f"in {elapsed:.1f}s to: {args.output}")
+    peak = peak_rss()
+    if peak:
+        print(f"   - Peak memory: {format_bytes(peak)} (estimated {format_bytes(plan.peak_bytes)})")
+
+
+if __name__ == "__main__":
+    main()
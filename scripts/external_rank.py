@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Out-of-core full ranking: enrichment_priority for every contact
+
+select_top_5000.py sorts the whole export in memory and keeps 5,000 rows.
+This ranks every contact with the same value score in bounded memory, so
+later tiers can be queued too:
+
+1. Read the export in runs of RUN_SIZE rows, score each row, sort the run by
+   (value_score desc, input order) and spill it to a temp file.
+2. k-way merge the runs (heapq.merge, at most MAX_FAN_IN files at once; more
+   runs are merged in extra passes) and stream the ranked CSV out, numbering
+   enrichment_priority as rows come off the merge.
+
+Ties keep input order, so the ranking is deterministic and the top 5,000
+match a stable in-memory sort. Memory is one run plus one buffered row per
+open run file, whatever the size of the export.
+
+  python3 external_rank.py MasterD_NYCC.csv MasterD_Ranked.csv --run-size 200000
+"""
+
+import argparse
+import csv
+import heapq
+import os
+import tempfile
+
+from contact_value import calculate_contact_value
+
+RUN_SIZE = 200000
+MAX_FAN_IN = 64
+
+# (last priority in tier, tier) - same cut points as select_top_5000.py
+ENRICHMENT_TIERS = [
+    (1000, 'Tier 1 - Deep'),
+    (2500, 'Tier 2 - Medium'),
+    (5000, 'Tier 3 - Light'),
+]
+QUEUED_TIER = 'Tier 4 - Queued'
+
+
+def enrichment_tier(priority):
+    for last, tier in ENRICHMENT_TIERS:
+        if priority <= last:
+            return tier
+    return QUEUED_TIER
+
+
+def score_row(values, fieldnames):
+    """value_score for one raw CSV row; blank cells count as missing like pandas NaN"""
+    contact = {name: (value if value != '' else None) for name, value in zip(fieldnames, values)}
+    return calculate_contact_value(contact)
+
+
+def _spill(run, tmp_dir):
+    """Sort one run and write it as (score, seq, *values) rows; returns the path"""
+    run.sort(key=lambda r: (-r[0], r[1]))
+    fd, path = tempfile.mkstemp(suffix='.csv', prefix='run_', dir=tmp_dir)
+    with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        for score, seq, values in run:
+            writer.writerow([repr(score), seq] + values)
+    return path
+
+
+def _read_run(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            yield (-float(row[0]), int(row[1]), row)
+
+
+def _merge(paths):
+    """Merged stream of (-score, seq, raw run row) across run files"""
+    return heapq.merge(*(_read_run(path) for path in paths))
+
+
+def _reduce_runs(paths, tmp_dir):
+    """Merge runs MAX_FAN_IN at a time until one final merge can take them all"""
+    while len(paths) > MAX_FAN_IN:
+        merged = []
+        for i in range(0, len(paths), MAX_FAN_IN):
+            group = paths[i:i + MAX_FAN_IN]
+            fd, out = tempfile.mkstemp(suffix='.csv', prefix='merge_', dir=tmp_dir)
+            with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                for neg_score, seq, row in _merge(group):
+                    writer.writerow(row)
+            for path in group:
+                os.remove(path)
+            merged.append(out)
+        paths = merged
+    return paths
+
+
+def rank_export(input_file, output_file, run_size=RUN_SIZE, tmp_dir=None):
+    """Write every row of input_file ranked by value_score; returns (rows, runs)"""
+    with tempfile.TemporaryDirectory(prefix='rank_', dir=tmp_dir) as work_dir:
+        runs = []
+        with open(input_file, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            fieldnames = next(reader, None)
+            if fieldnames is None:
+                return 0, 0  # empty file: nothing to rank, no output
+            run = []
+            seq = 0
+            for values in reader:
+                run.append((score_row(values, fieldnames), seq, values))
+                seq += 1
+                if len(run) >= run_size:
+                    runs.append(_spill(run, work_dir))
+                    run = []
+            if run:
+                runs.append(_spill(run, work_dir))
+        run_count = len(runs)
+
+        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(fieldnames + ['value_score', 'enrichment_priority', 'enrichment_tier'])
+            priority = 0
+            for neg_score, seq, row in _merge(_reduce_runs(runs, work_dir)):
+                priority += 1
+                writer.writerow(row[2:] + [row[0], priority, enrichment_tier(priority)])
+
+    return priority, run_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rank every contact by value score in bounded memory')
+    parser.add_argument('input', nargs='?', default='/Users/jasonsmacbookpro2022/Desktop/MasterD_NYCC.csv')
+    parser.add_argument('output', nargs='?', default='/Users/jasonsmacbookpro2022/Desktop/MasterD_Ranked.csv')
+    parser.add_argument('--run-size', type=int, default=RUN_SIZE, help='rows sorted in memory per spill run')
+    parser.add_argument('--tmp-dir', help='where to spill runs (default: system temp dir)')
+    args = parser.parse_args()
+
+    print(f"Ranking {args.input} in runs of {args.run_size:,} rows...")
+    rows, runs = rank_export(args.input, args.output, args.run_size, args.tmp_dir)
+    if not rows:
+        print(f"⚠️  No contacts to rank in {args.input}")
+        return
+
+    print(f"✅ Ranked {rows:,} contacts ({runs:,} sorted runs merged) to: {args.output}")
+    for last, tier in ENRICHMENT_TIERS:
+        print(f"   - {tier}: up to priority {last:,}")
+    print(f"   - {QUEUED_TIER}: priority {ENRICHMENT_TIERS[-1][0] + 1:,} onwards")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+Geo index over enriched contacts: radius, nearest and visit-route queries
+
+determine_territory() only knows six regions, but reps ask for "the best
+contacts within 30 miles of this office". Geocoder attaches coordinates to
+each contact offline from centroid tables in geo_data/:
+
+- zip    - a ZIP centroid, when the contact has a ZIP column: us_zips.csv, or
+           --zip-centroids (the Census ZCTA gazetteer file or any
+           zip,latitude,longitude CSV)
+- city   - us_places.csv: every Census place (incorporated cities, towns and
+           villages plus CDPs), then us_cities.csv on top of it (metro names
+           the Census doesn't list as places: Manhattan, Brooklyn, ...)
+- state  - us_states.csv: state centroid only; never used for radius queries
+
+Only us_cities.csv and us_states.csv ship with the scripts. us_places.csv and
+us_zips.csv are optional trimmed extracts of the Census Gazetteer
+(city,state,latitude,longitude and zip,latitude,longitude at 4 decimals) that
+the `gazetteer` command builds from the national place and ZCTA files,
+downloaded or already on disk. Without them the Geocoder falls back to the
+metro table alone (most towns then get only a state centroid);
+enrich_contacts_clean.py --geo and the near / routes commands warn when they
+are missing.
+
+GeoIndex puts the distinct coordinates in a grid of CELL_DEGREES cells, with
+each coordinate's contacts kept best value_score first. within() visits only
+the cells covering the circle and merges those lists, nearest() searches
+rings of cells outward until nothing closer can remain, so both answer in
+milliseconds however many contacts share a city centroid.
+
+plan_routes() groups a rep's list into day routes: the best unrouted contact
+seeds a route, its nearest unrouted neighbours within ROUTE_MILES fill it up
+to ROUTE_STOPS, and the stops are ordered nearest-neighbour + 2-opt.
+
+  python3 geo_index.py near contacts_enriched_clean.csv --at "White Plains, NY" --miles 30
+  python3 geo_index.py near contacts_enriched_clean.csv --at 40.75,-73.98 --k 10
+  python3 geo_index.py routes contacts_enriched_clean.csv --owner "Alice Smith" --top 40
+  python3 geo_index.py gazetteer --year 2023     # refresh geo_data/us_places.csv + us_zips.csv
+  python3 enrich_contacts_clean.py --geo          # adds latitude / longitude / geo_precision
+"""
+
+import argparse
+import csv
+import heapq
+import io
+import math
+import os
+import re
+import time
+import urllib.request
+import zipfile
+from itertools import repeat
+
+from canonical_values import state_code
+from contact_schema import rank_value
+
+GEO_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'geo_data')
+CITY_CENTROIDS = os.path.join(GEO_DATA_DIR, 'us_cities.csv')
+PLACE_CENTROIDS = os.path.join(GEO_DATA_DIR, 'us_places.csv')
+ZIP_CENTROIDS = os.path.join(GEO_DATA_DIR, 'us_zips.csv')
+STATE_CENTROIDS = os.path.join(GEO_DATA_DIR, 'us_states.csv')
+GAZETTEER_URL = ('https://www2.census.gov/geo/docs/maps-data/data/gazetteer/'
+                 '{year}_Gazetteer/{year}_Gaz_{layer}_national.zip')
+GAZETTEER_YEAR = 2023
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE = 69.09  # one degree of latitude
+CELL_DEGREES = 0.25
+ROUTE_STOPS = 8
+ROUTE_MILES = 30
+
+GEO_FIELDNAMES = ['latitude', 'longitude', 'geo_precision']
+RADIUS_PRECISIONS = {'zip', 'city'}  # state centroids are too coarse for distances
+
+CITY_ALIASES = {
+    'nyc': 'new york', 'new york city': 'new york', 'saint louis': 'st louis',
+    'la': 'los angeles', 'sf': 'san francisco', 'washington dc': 'washington',
+}
+# Contact columns: enrichment output first, then the raw export
+CITY_COLUMNS = ['city', 'City']
+STATE_COLUMNS = ['state', 'State/Region']
+ZIP_COLUMNS = ['zip_code', 'Postal Code', 'Zip', 'ZIP Code']
+# ZIP table columns (CSV or the tab-separated Census gazetteer)
+ZIP_TABLE_COLUMNS = (['zip', 'zip_code', 'GEOID'], ['latitude', 'lat', 'INTPTLAT'],
+                     ['longitude', 'lng', 'lon', 'INTPTLONG'])
+# Census place names carry their legal type: 'Abbeville city', 'Boise City city',
+# 'Nashville-Davidson metropolitan government (balance)'
+PLACE_TYPE = re.compile(r'\s+(?:city and borough|consolidated government|metropolitan government|'
+                        r'metro government|unified government|urban county|municipality|borough|'
+                        r'village|town|township|city|CDP|plantation|corporation|comunidad|zona urbana)'
+                        r'(?: \(balance\))?$')
+
+
+def haversine_miles(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def city_key(city):
+    """'St. Louis' / 'Saint Louis' -> 'st louis'"""
+    key = ' '.join(re.sub(r'[^a-z ]+', ' ', str(city or '').lower().replace('.', '')).split())
+    return CITY_ALIASES.get(key, key)
+
+
+def _first(row, columns):
+    for column in columns:
+        value = row.get(column)
+        if value:
+            return value
+    return None
+
+
+def _pick(fieldnames, candidates):
+    for candidate in candidates:
+        if candidate in fieldnames:
+            return candidate
+    raise ValueError(f"ZIP table needs one of the columns {candidates}")
+
+
+class Geocoder:
+    """Offline city / state / ZIP centroid lookups, with counts per precision"""
+
+    def __init__(self, zip_path=None):
+        self.states = {}       # 'NY' -> (lat, lng)
+        self.cities = {}       # ('white plains', 'NY') -> (lat, lng)
+        self.city_states = {}  # 'white plains' -> {'NY'}
+        self.zips = {}
+        with open(STATE_CENTROIDS, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                self.states[row['state']] = (float(row['latitude']), float(row['longitude']))
+        for path in (PLACE_CENTROIDS, CITY_CENTROIDS):  # the metro table wins on a clash
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                for row in csv.DictReader(f):
+                    key = city_key(row['city'])
+                    self.cities[(key, row['state'])] = (float(row['latitude']), float(row['longitude']))
+                    self.city_states.setdefault(key, set()).add(row['state'])
+        self.missing_tables = [path for path in (PLACE_CENTROIDS, ZIP_CENTROIDS)
+                               if not os.path.exists(path) and not (zip_path and path == ZIP_CENTROIDS)]
+        if zip_path is None and os.path.exists(ZIP_CENTROIDS):
+            zip_path = ZIP_CENTROIDS
+        if zip_path:
+            self._load_zips(zip_path)
+        self.located = {'zip': 0, 'city': 0, 'state': 0, 'none': 0}
+
+    def _load_zips(self, path):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            delimiter = '\t' if '\t' in f.readline() else ','
+            f.seek(0)
+            reader = csv.reader(f, delimiter=delimiter)
+            header = [name.strip() for name in next(reader)]
+            zip_col, lat_col, lng_col = (header.index(_pick(header, names)) for names in ZIP_TABLE_COLUMNS)
+            for values in reader:
+                if values:
+                    self.zips[values[zip_col].strip().zfill(5)] = (float(values[lat_col]), float(values[lng_col]))
+
+    def state_code(self, state):
+        code = state_code(state)
+        return code if code in self.states else None
+
+    def locate(self, city=None, state=None, zip_code=None):
+        """(latitude, longitude, precision) or None"""
+        zip5 = ''.join(ch for ch in str(zip_code or '') if ch.isdigit())[:5]
+        if len(zip5) == 5 and zip5 in self.zips:
+            return (*self.zips[zip5], 'zip')
+        code = self.state_code(state)
+        key = city_key(city)
+        if key:
+            states = self.city_states.get(key, ())
+            if code is None and len(states) == 1:
+                code = next(iter(states))  # no usable state, but the city name is unambiguous
+            if (key, code) in self.cities:
+                return (*self.cities[(key, code)], 'city')
+        if code:
+            return (*self.states[code], 'state')
+        return None
+
+    def geo_fields(self, contact):
+        """latitude / longitude / geo_precision for an enriched or raw contact"""
+        found = self.locate(_first(contact, CITY_COLUMNS), _first(contact, STATE_COLUMNS),
+                            _first(contact, ZIP_COLUMNS))
+        self.located[found[2] if found else 'none'] += 1
+        if not found:
+            return dict.fromkeys(GEO_FIELDNAMES)
+        return dict(zip(GEO_FIELDNAMES, found))
+
+    def resolve(self, text):
+        """Query centre from 'lat,lng', a ZIP or 'City, ST'"""
+        parts = [part.strip() for part in str(text).split(',')]
+        try:
+            if len(parts) == 2:
+                return float(parts[0]), float(parts[1])
+        except ValueError:
+            pass
+        found = self.locate(zip_code=text) if text.strip().isdigit() else \
+            self.locate(parts[0], parts[1] if len(parts) > 1 else None)
+        if not found or found[2] == 'state':
+            raise ValueError(f"Can't place '{text}' - use 'City, ST' from geo_data/us_places.csv or "
+                             f"us_cities.csv, a ZIP or 'latitude,longitude'")
+        return found[0], found[1]
+
+    def missing_warnings(self):
+        """Warning lines for optional centroid tables that haven't been built"""
+        if not self.missing_tables:
+            return []
+        names = ' and '.join(os.path.basename(path) for path in self.missing_tables)
+        return [f"⚠️  {names} not found in {GEO_DATA_DIR} - fewer contacts get a ZIP or "
+                f"city location",
+                "   Build them with: python3 geo_index.py gazetteer"]
+
+    def report(self):
+        total = sum(self.located.values())
+        return [f"  • {precision}: {count:,} ({count / total * 100 if total else 0:.1f}%)"
+                for precision, count in self.located.items()]
+
+
+class GeoIndex:
+    """Grid index over contact coordinates; contacts get ids in value_score order"""
+
+    def __init__(self, contacts, geocoder=None, precisions=RADIUS_PRECISIONS):
+        rows = list(contacts)
+        order = sorted(range(len(rows)), key=lambda i: -rank_value(rows[i]))  # stable
+        self.contacts = []
+        self.points = []     # id -> (lat, lng)
+        self.locations = {}  # (lat, lng) -> ids, best first
+        self.grid = {}       # cell -> [(lat, lng)]
+        self.skipped = 0
+        for i in order:
+            contact = rows[i]
+            if contact.get('latitude') not in (None, ''):
+                point = (float(contact['latitude']), float(contact['longitude']))
+                precision = contact.get('geo_precision') or 'city'
+            else:
+                found = geocoder.locate(_first(contact, CITY_COLUMNS), _first(contact, STATE_COLUMNS),
+                                        _first(contact, ZIP_COLUMNS)) if geocoder else None
+                point, precision = (found[:2], found[2]) if found else (None, None)
+            if point is None or precision not in precisions:
+                self.skipped += 1
+                continue
+            contact_id = len(self.contacts)
+            self.contacts.append(contact)
+            self.points.append(point)
+            ids = self.locations.get(point)
+            if ids is None:
+                ids = self.locations[point] = []
+                self.grid.setdefault(self._cell(*point), []).append(point)
+            ids.append(contact_id)
+
+    @staticmethod
+    def _cell(lat, lng):
+        return (math.floor(lat / CELL_DEGREES), math.floor(lng / CELL_DEGREES))
+
+    def _locations_within(self, lat, lng, miles):
+        """[(distance, location)] for the distinct coordinates within the radius"""
+        dlat = miles / MILES_PER_DEGREE
+        dlng = miles / (MILES_PER_DEGREE * max(0.01, math.cos(math.radians(min(89.0, abs(lat) + dlat)))))
+        (lat0, lng0), (lat1, lng1) = self._cell(lat - dlat, lng - dlng), self._cell(lat + dlat, lng + dlng)
+        found = []
+        for i in range(lat0, lat1 + 1):
+            for j in range(lng0, lng1 + 1):
+                for location in self.grid.get((i, j), ()):
+                    distance = haversine_miles(lat, lng, *location)
+                    if distance <= miles:
+                        found.append((distance, location))
+        return found
+
+    def within(self, lat, lng, miles, limit=20):
+        """[(contact, miles)] within the radius, best value_score first"""
+        lists = [zip(self.locations[location], repeat(distance))
+                 for distance, location in self._locations_within(lat, lng, miles)]
+        results = []
+        for contact_id, distance in heapq.merge(*lists):
+            results.append((self.contacts[contact_id], distance))
+            if len(results) >= limit:
+                break
+        return results
+
+    def _ring(self, center, r):
+        ci, cj = center
+        if r == 0:
+            return [center]
+        cells = [(ci + di, cj + dj) for di in (-r, r) for dj in range(-r, r + 1)]
+        return cells + [(ci + di, cj + dj) for dj in (-r, r) for di in range(-r + 1, r)]
+
+    def _outside_bound(self, lat, lng, center, r):
+        """Lower bound (miles) on the distance to anything outside rings 0..r"""
+        ci, cj = center
+        north = ((ci + r + 1) * CELL_DEGREES - lat) * MILES_PER_DEGREE
+        south = (lat - (ci - r) * CELL_DEGREES) * MILES_PER_DEGREE
+        widest = min(89.0, max(abs((ci - r) * CELL_DEGREES), abs((ci + r + 1) * CELL_DEGREES)))
+        per_degree = MILES_PER_DEGREE * math.cos(math.radians(widest))
+        east = ((cj + r + 1) * CELL_DEGREES - lng) * per_degree
+        west = (lng - (cj - r) * CELL_DEGREES) * per_degree
+        return min(north, south, east, west)
+
+    def nearest(self, lat, lng, k=10):
+        """[(contact, miles)] for the k nearest contacts (better value_score first on ties)"""
+        if not self.grid:
+            return []
+        center = self._cell(lat, lng)
+        max_ring = max(max(abs(i - center[0]), abs(j - center[1])) for i, j in self.grid)
+        candidates = []
+        for r in range(max_ring + 1):
+            for cell in self._ring(center, r):
+                for location in self.grid.get(cell, ()):
+                    candidates.append((haversine_miles(lat, lng, *location), location))
+            bound = self._outside_bound(lat, lng, center, r)
+            if sum(len(self.locations[loc]) for distance, loc in candidates if distance <= bound) >= k:
+                break
+        results = []
+        for distance, location in sorted(candidates):
+            for contact_id in self.locations[location]:
+                results.append((self.contacts[contact_id], distance))
+                if len(results) >= k:
+                    return results
+        return results
+
+
+def _tour_miles(points):
+    return sum(haversine_miles(*a, *b) for a, b in zip(points, points[1:]))
+
+
+def order_stops(points):
+    """Visit order (indexes) starting at points[0]: nearest neighbour, then 2-opt"""
+    order = [0]
+    remaining = set(range(1, len(points)))
+    while remaining:
+        last = points[order[-1]]
+        nxt = min(remaining, key=lambda i: (haversine_miles(*last, *points[i]), i))
+        order.append(nxt)
+        remaining.remove(nxt)
+
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(order) - 1):
+            for j in range(i + 1, len(order)):
+                candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                if _tour_miles([points[s] for s in candidate]) < _tour_miles([points[s] for s in order]) - 1e-9:
+                    order = candidate
+                    improved = True
+    return order
+
+
+def plan_routes(index, max_stops=ROUTE_STOPS, max_miles=ROUTE_MILES, top=None):
+    """Group the index's best `top` contacts (all by default) into routes
+
+    Returns [{'stops', 'points', 'miles', 'value'}] in the order they were seeded.
+    """
+    top = len(index.contacts) if top is None else min(top, len(index.contacts))
+    routed = set()
+    routes = []
+    for seed in range(top):  # ids are in value order
+        if seed in routed:
+            continue
+        lat, lng = index.points[seed]
+        stops = [seed]
+        routed.add(seed)
+        for distance, location in sorted(index._locations_within(lat, lng, max_miles)):
+            for contact_id in index.locations[location]:
+                if len(stops) >= max_stops:
+                    break
+                if contact_id < top and contact_id not in routed:
+                    stops.append(contact_id)
+                    routed.add(contact_id)
+        points = [index.points[s] for s in stops]
+        order = order_stops(points)
+        stops = [stops[i] for i in order]
+        routes.append({
+            'stops': [index.contacts[s] for s in stops],
+            'points': [index.points[s] for s in stops],
+            'miles': _tour_miles([points[i] for i in order]),
+            'value': sum(rank_value(index.contacts[s]) for s in stops),
+        })
+    return routes
+
+
+def _gazetteer_rows(source):
+    """Rows of a Census Gazetteer file: a .txt, the national .zip, or its URL"""
+    if source.startswith(('http://', 'https://')):
+        with urllib.request.urlopen(source, timeout=120) as response:
+            source = io.BytesIO(response.read())
+    if not isinstance(source, str) or source.endswith('.zip'):
+        with zipfile.ZipFile(source) as archive:
+            member = next(name for name in archive.namelist() if name.endswith('.txt'))
+            text = archive.read(member).decode('utf-8')
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            text = f.read()
+    reader = csv.reader(io.StringIO(text), delimiter='\t')
+    header = [name.strip() for name in next(reader)]  # INTPTLONG has trailing blanks
+    for values in reader:
+        if values:
+            yield dict(zip(header, (value.strip() for value in values)))
+
+
+def _write_table(path, header, rows):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+
+def build_gazetteer(places, zctas=None):
+    """Write us_places.csv (and us_zips.csv) from the Census place (and ZCTA) gazetteer"""
+    best = {}  # (city key, state) -> (incorporated, land area, name, lat, lng)
+    for row in _gazetteer_rows(places):
+        name = PLACE_TYPE.sub('', row['NAME'])
+        names = [name]
+        if row['NAME'].endswith('(balance)'):  # consolidated city-county: also 'Nashville', 'Louisville'
+            names.append(re.split(r'[-/]', name)[0])
+        for place in names:
+            key = (city_key(place), row['USPS'])
+            candidate = (not row['NAME'].endswith(' CDP'), int(row['ALAND'] or 0), place,
+                         round(float(row['INTPTLAT']), 4), round(float(row['INTPTLONG']), 4))
+            if key not in best or candidate[:2] > best[key][:2]:
+                best[key] = candidate
+    _write_table(PLACE_CENTROIDS, ['city', 'state', 'latitude', 'longitude'],
+                 sorted((name, state, lat, lng) for (_, state), (_, _, name, lat, lng) in best.items()))
+    written = {'places': len(best)}
+    if zctas:
+        zips = sorted((row['GEOID'].zfill(5), round(float(row['INTPTLAT']), 4), round(float(row['INTPTLONG']), 4))
+                      for row in _gazetteer_rows(zctas))
+        _write_table(ZIP_CENTROIDS, ['zip', 'latitude', 'longitude'], zips)
+        written['zips'] = len(zips)
+    return written
+
+
+def _name(contact):
+    first = contact.get('first_name', contact.get('First Name', ''))
+    last = contact.get('last_name', contact.get('Last Name', ''))
+    return f"{first} {last}".strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Radius / nearest / route queries over an enrichment output CSV')
+    sub = parser.add_subparsers(dest='command', required=True)
+    near = sub.add_parser('near', help='best contacts within a radius, or the k nearest')
+    near.add_argument('input', nargs='?', default='/Users/jasonsmacbookpro2022/Desktop/contacts_enriched_clean.csv')
+    near.add_argument('--at', required=True, help="'City, ST', a ZIP or 'latitude,longitude'")
+    near.add_argument('--miles', type=float, default=30)
+    near.add_argument('--k', type=int, help='k nearest contacts instead of a radius search')
+    near.add_argument('--limit', type=int, default=20)
+    routes = sub.add_parser('routes', help="group a rep's best contacts into visit routes")
+    routes.add_argument('input', nargs='?', default='/Users/jasonsmacbookpro2022/Desktop/contacts_enriched_clean.csv')
+    routes.add_argument('--owner', help='contact_owner to plan for (default: everyone)')
+    routes.add_argument('--top', type=int, default=100, help="route the rep's best N located contacts")
+    routes.add_argument('--stops', type=int, default=ROUTE_STOPS, help='stops per route')
+    routes.add_argument('--max-miles', type=float, default=ROUTE_MILES, help='route radius around its seed')
+    routes.add_argument('--output', help='also write the routes as CSV')
+    for command in (near, routes):
+        command.add_argument('--zip-centroids', help='ZIP centroid table (Census ZCTA gazetteer or zip,lat,lng CSV; '
+                                                     'default: geo_data/us_zips.csv)')
+    gazetteer = sub.add_parser('gazetteer', help='rebuild geo_data/us_places.csv and us_zips.csv from the Census')
+    gazetteer.add_argument('--year', type=int, default=GAZETTEER_YEAR, help='Gazetteer vintage to download')
+    gazetteer.add_argument('--places', help='national place file (.txt/.zip) instead of downloading it')
+    gazetteer.add_argument('--zcta', help='national ZCTA file (.txt/.zip) instead of downloading it')
+    args = parser.parse_args()
+
+    if args.command == 'gazetteer':
+        started = time.perf_counter()
+        written = build_gazetteer(args.places or GAZETTEER_URL.format(year=args.year, layer='place'),
+                                  args.zcta or GAZETTEER_URL.format(year=args.year, layer='zcta'))
+        print(f"✅ {written['places']:,} places -> {PLACE_CENTROIDS}")
+        print(f"✅ {written['zips']:,} ZIP centroids -> {ZIP_CENTROIDS} ({time.perf_counter() - started:.1f}s)")
+        return
+
+    geocoder = Geocoder(args.zip_centroids)
+    for line in geocoder.missing_warnings():
+        print(line)
+    with open(args.input, 'r', encoding='utf-8', newline='') as f:
+        contacts = list(csv.DictReader(f))
+
+    if args.command == 'near':
+        started = time.perf_counter()
+        index = GeoIndex(contacts, geocoder)
+        print(f"✓ Indexed {len(index.contacts):,} contacts at {len(index.locations):,} locations "
+              f"in {time.perf_counter() - started:.2f}s ({index.skipped:,} without a city/ZIP location)")
+        lat, lng = geocoder.resolve(args.at)
+        started = time.perf_counter()
+        if args.k:
+            results = index.nearest(lat, lng, args.k)
+        else:
+            results = index.within(lat, lng, args.miles, args.limit)
+        elapsed = (time.perf_counter() - started) * 1000
+        for contact, miles in results:
+            print(f"  {rank_value(contact):>5.0f}  {miles:>6.1f} mi  {_name(contact)} - "
+                  f"{_first(contact, ['specialty', 'Specialty']) or ''}, {_first(contact, CITY_COLUMNS) or ''}")
+        print(f"  {len(results)} contact(s) in {elapsed:.2f} ms")
+        return
+
+    if args.owner:
+        contacts = [c for c in contacts
+                    if (_first(c, ['contact_owner', 'Contact owner']) or '').strip() == args.owner]
+    index = GeoIndex(contacts, geocoder)
+    planned = plan_routes(index, args.stops, args.max_miles, args.top)
+
+    print(f"🗺️  {len(planned)} route(s) for {min(args.top, len(index.contacts)):,} contacts"
+          f"{f' owned by {args.owner}' if args.owner else ''} ({index.skipped:,} without a city/ZIP location)")
+    for number, route in enumerate(planned, 1):
+        print(f"\nRoute {number}: {len(route['stops'])} stops, {route['miles']:.1f} mi, "
+              f"value {route['value']:,.0f}")
+        for contact in route['stops']:
+            print(f"  • {_name(contact)} - {_first(contact, CITY_COLUMNS) or ''} ({rank_value(contact):.0f})")
+
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['route', 'stop', 'name', 'email', 'city', 'value_score', 'latitude', 'longitude'])
+            for number, route in enumerate(planned, 1):
+                for stop, (contact, (lat, lng)) in enumerate(zip(route['stops'], route['points']), 1):
+                    writer.writerow([number, stop, _name(contact), _first(contact, ['email', 'Email']) or '',
+                                     _first(contact, CITY_COLUMNS) or '', rank_value(contact), lat, lng])
+        print(f"\n✅ Routes saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
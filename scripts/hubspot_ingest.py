@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Pull contacts straight from the HubSpot CRM API instead of a hand export
+
+The pipeline started from MasterD_NYCC.csv exported by hand. HubSpotIngest
+reads the same properties through the v3 search API and yields rows with the
+export's column names, so scoring consumes them as they arrive:
+
+- the contact id space is split into partitions of at most PARTITION_SIZE
+  contacts (sized with cheap total-count queries), and WORKERS threads page
+  through partitions concurrently with the `after` cursor. Rows are still
+  yielded in id order: each partition has a bounded queue that the consumer
+  drains in turn, so memory stays at a few pages per worker
+- one token bucket (enrichment_scheduler.RateLimiter) paces every request.
+  A 429 waits out Retry-After and halves the rate, and successes bring it
+  back up; 5xx and dropped connections retry with backoff. Connections are
+  kept alive per thread
+- incremental sync: the state file keeps a lastmodifieddate watermark (the
+  sync's start time minus SYNC_OVERLAP_MS), and the next run only asks for
+  contacts modified since. Overlap re-fetches are harmless: downstream
+  upserts by 'Record ID'
+- a partition that grows past the search API's 10,000-result window mid-sync
+  continues from its last id rather than failing
+
+mock_hubspot.py serves an export CSV through the same endpoints for tests.
+
+  export HUBSPOT_ACCESS_TOKEN=pat-...
+  python3 hubspot_ingest.py --output MasterD_NYCC.csv --full
+  python3 hubspot_ingest.py --inbox ~/Desktop/hubspot_inbox    # delta for delta_daemon.py
+  python3 enrich_contacts_clean.py --hubspot                   # score straight from the API
+"""
+
+import argparse
+import csv
+import http.client
+import json
+import math
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from create_dates import parse_create_date
+from enrichment_scheduler import RateLimiter
+
+DEFAULT_BASE_URL = 'https://api.hubapi.com'
+SEARCH_PATH = '/crm/v3/objects/contacts/search'
+OWNERS_PATH = '/crm/v3/owners'
+PAGE_SIZE = 200          # search API maximum
+SEARCH_WINDOW = 10000    # search API refuses to page past this many results
+PARTITION_SIZE = 5000
+WORKERS = 4
+RATE = 4.0               # requests / second (search API allows 5)
+MIN_RATE = 0.5
+MAX_RETRIES = 5
+MAX_THROTTLE_WAITS = 50
+QUEUE_PAGES = 4
+SYNC_OVERLAP_MS = 5 * 60 * 1000
+
+# HubSpot property -> export column the scoring rules read
+PROPERTY_COLUMNS = {
+    'firstname': 'First Name',
+    'lastname': 'Last Name',
+    'email': 'Email',
+    'phone': 'Phone Number',
+    'mobilephone': 'Mobile Phone Number',
+    'city': 'City',
+    'state': 'State/Region',
+    'specialty': 'Specialty',
+    'hubspotscore': 'HubSpot Score',
+    'num_notes': 'Number of Sales Activities',
+    'hubspot_owner_id': 'Contact owner',
+    'createdate': 'Create Date',
+    'notes': 'Notes',
+}
+EXPORT_COLUMNS = ['Record ID'] + list(PROPERTY_COLUMNS.values())
+
+
+class HubSpotError(Exception):
+    pass
+
+
+class HubSpotClient:
+    """JSON requests against a HubSpot-compatible API under a shared, adaptive rate limit"""
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, token=None, rate=RATE, max_retries=MAX_RETRIES, timeout=30):
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == 'https'
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+        self.max_rate = rate
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(rate)
+        self.stats = {'requests': 0, 'throttled': 0, 'retries': 0}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self._local.conn = cls(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def _adjust_rate(self, factor, step=0.0):
+        with self._lock:
+            self.limiter.set_rate(min(self.max_rate, max(MIN_RATE, self.limiter.rate * factor + step)))
+
+    def request(self, method, path, body=None):
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        failures = throttles = 0
+        while True:
+            self.limiter.acquire()
+            with self._lock:
+                self.stats['requests'] += 1
+            try:
+                conn = self._connection()
+                conn.request(method, self.prefix + path, body=payload, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                self._local.conn = None
+                conn.close()
+                status, error = None, e
+            else:
+                status, error = response.status, None
+
+            if status == 429 and throttles < MAX_THROTTLE_WAITS:
+                throttles += 1
+                with self._lock:
+                    self.stats['throttled'] += 1
+                self._adjust_rate(0.5)
+                retry_after = response.getheader('Retry-After')
+                interval = response.getheader('X-HubSpot-RateLimit-Interval-Milliseconds')
+                time.sleep(float(retry_after) if retry_after else int(interval) / 1000 if interval else 1.0)
+                continue
+            if status is not None and status < 400:
+                self._adjust_rate(1.0, self.max_rate * 0.05)
+                return json.loads(data) if data else {}
+            if status is not None and status < 500 and status != 429:
+                raise HubSpotError(f"{method} {path}: HTTP {status} {data[:300].decode('utf-8', 'replace')}")
+
+            failures += 1
+            if failures > self.max_retries:
+                raise HubSpotError(f"{method} {path} failed after {failures} attempts: "
+                                   f"{error or f'HTTP {status}'}")
+            with self._lock:
+                self.stats['retries'] += 1
+            time.sleep(min(30.0, 0.5 * 2 ** failures))
+
+
+def export_date(value):
+    """API timestamp -> the export's 'YYYY-MM-DD HH:MM' (raw text if unparseable)"""
+    parsed = parse_create_date(value)
+    return parsed.strftime('%Y-%m-%d %H:%M') if parsed else (value or '')
+
+
+def modified_ms(value):
+    parsed = parse_create_date(value)
+    return int((parsed - datetime(1970, 1, 1)).total_seconds() * 1000) if parsed else None
+
+
+def record_to_row(record, owners):
+    """One API contact -> a row with the export's column names"""
+    properties = record.get('properties') or {}
+    row = {'Record ID': str(record['id'])}
+    for name, column in PROPERTY_COLUMNS.items():
+        value = properties.get(name)
+        row[column] = '' if value is None else str(value)
+    row['Contact owner'] = owners.get(row['Contact owner'], row['Contact owner'])
+    row['Create Date'] = export_date(row['Create Date'])
+    return row
+
+
+class HubSpotIngest:
+    """Concurrent partitioned sync of contacts, streamed in id order"""
+
+    def __init__(self, client, workers=WORKERS, page_size=PAGE_SIZE, partition_size=PARTITION_SIZE):
+        self.client = client
+        self.workers = workers
+        self.page_size = page_size
+        self.partition_size = partition_size
+        self.properties = list(PROPERTY_COLUMNS) + ['lastmodifieddate']
+        self.stats = {'contacts': 0, 'pages': 0, 'partitions': 0, 'max_modified': None}
+
+    def owners(self):
+        """hubspot_owner_id -> 'First Last'"""
+        owners = {}
+        after = None
+        while True:
+            page = self.client.request('GET', OWNERS_PATH + '?limit=100' + (f'&after={after}' if after else ''))
+            for owner in page.get('results', []):
+                name = ' '.join(filter(None, [owner.get('firstName'), owner.get('lastName')]))
+                owners[str(owner['id'])] = name or owner.get('email') or str(owner['id'])
+            after = (page.get('paging') or {}).get('next', {}).get('after')
+            if not after:
+                return owners
+
+    def _search(self, lo, hi, since, after=None, limit=None, direction='ASCENDING'):
+        filters = []
+        if lo is not None:
+            filters.append({'propertyName': 'hs_object_id', 'operator': 'GTE', 'value': str(lo)})
+        if hi is not None:
+            filters.append({'propertyName': 'hs_object_id', 'operator': 'LT', 'value': str(hi)})
+        if since is not None:
+            filters.append({'propertyName': 'lastmodifieddate', 'operator': 'GTE', 'value': str(since)})
+        body = {
+            'filterGroups': [{'filters': filters}] if filters else [],
+            'sorts': [{'propertyName': 'hs_object_id', 'direction': direction}],
+            'properties': self.properties,
+            'limit': limit or self.page_size,
+        }
+        if after:
+            body['after'] = after
+        return self.client.request('POST', SEARCH_PATH, body)
+
+    def plan(self, since=None):
+        """[(lo, hi)] id ranges of at most partition_size contacts each, in id order"""
+        last = self._search(None, None, since, limit=1, direction='DESCENDING')
+        if not last.get('results'):
+            return []
+        pending = [(0, int(last['results'][0]['id']) + 1)]
+        partitions = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while pending:
+                totals = pool.map(lambda r: self._search(r[0], r[1], since, limit=1).get('total', 0), pending)
+                split = []
+                for (lo, hi), total in zip(pending, totals):
+                    if total <= self.partition_size or hi - lo <= 1:
+                        if total:
+                            partitions.append((lo, hi))
+                        continue
+                    pieces = min(hi - lo, math.ceil(total / self.partition_size))
+                    bounds = [lo + (hi - lo) * i // pieces for i in range(pieces)] + [hi]
+                    split.extend(zip(bounds, bounds[1:]))
+                pending = split
+        return sorted(partitions)
+
+    def _fetch(self, lo, hi, since, out, stop):
+        """Page one partition into its queue; ends with None (or the exception)"""
+        def put(item):
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            after = None
+            fetched = 0
+            while True:
+                page = self._search(lo, hi, since, after)
+                results = page.get('results', [])
+                if results and not put(results):
+                    return
+                fetched += len(results)
+                after = (page.get('paging') or {}).get('next', {}).get('after')
+                if not after or not results:
+                    break
+                if fetched + self.page_size > SEARCH_WINDOW:
+                    # Past the search window: restart the cursor after the last id
+                    lo, after, fetched = int(results[-1]['id']) + 1, None, 0
+            put(None)
+        except Exception as e:  # handed to the consumer, which re-raises it
+            put(e)
+
+    def rows(self, since=None):
+        """Yield export-style rows for every contact modified since `since` (ms), in id order"""
+        owners = self.owners()
+        partitions = self.plan(since)
+        self.stats['partitions'] = len(partitions)
+        stop = threading.Event()
+        queues = [queue.Queue(maxsize=QUEUE_PAGES) for _ in partitions]
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            for (lo, hi), out in zip(partitions, queues):
+                pool.submit(self._fetch, lo, hi, since, out, stop)
+            for out in queues:
+                while True:
+                    item = out.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    self.stats['pages'] += 1
+                    for record in item:
+                        self.stats['contacts'] += 1
+                        modified = modified_ms((record.get('properties') or {}).get('lastmodifieddate'))
+                        if modified and (self.stats['max_modified'] or 0) < modified:
+                            self.stats['max_modified'] = modified
+                        yield record_to_row(record, owners)
+        finally:
+            stop.set()
+            pool.shutdown(wait=True)
+
+
+def load_state(path):
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(path, state):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def sync_rows(ingest, state_file=None, full=False):
+    """Rows since the saved watermark (all rows if full); the watermark advances once they're consumed"""
+    state = {} if full else load_state(state_file)
+    since = state.get('since')
+    started_ms = int(time.time() * 1000)
+    yield from ingest.rows(since)
+    if state_file:
+        save_state(state_file, {'since': started_ms - SYNC_OVERLAP_MS,
+                                'synced_at': datetime.now().isoformat(timespec='seconds'),
+                                'contacts': ingest.stats['contacts']})
+
+
+def make_ingest(args):
+    token = args.hubspot_token or os.environ.get('HUBSPOT_ACCESS_TOKEN')
+    client = HubSpotClient(args.hubspot_url, token, rate=args.hubspot_rate)
+    return HubSpotIngest(client, workers=args.hubspot_workers)
+
+
+def add_hubspot_arguments(parser, prefix=''):
+    """Connection options shared with enrich_contacts_clean.py, which passes prefix='hubspot-'
+    (its own --workers are scoring processes)"""
+    parser.add_argument('--hubspot-url', default=DEFAULT_BASE_URL, help='API base URL (mock_hubspot.py for tests)')
+    parser.add_argument(f'--{prefix}token', dest='hubspot_token',
+                        help='private app token (default: $HUBSPOT_ACCESS_TOKEN)')
+    parser.add_argument(f'--{prefix}workers', dest='hubspot_workers', type=int, default=WORKERS,
+                        help='partitions fetched concurrently')
+    parser.add_argument(f'--{prefix}rate', dest='hubspot_rate', type=float, default=RATE,
+                        help='max API requests per second')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sync HubSpot contacts into an export-compatible CSV')
+    add_hubspot_arguments(parser)
+    parser.add_argument('--state', default='/Users/jasonsmacbookpro2022/Desktop/hubspot_sync.json',
+                        help='lastmodifieddate watermark for incremental syncs')
+    parser.add_argument('--full', action='store_true', help='ignore the watermark and pull every contact')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--output', help='write the rows to this CSV')
+    target.add_argument('--inbox', help="drop the rows as a new delta file into delta_daemon.py's inbox")
+    args = parser.parse_args()
+
+    ingest = make_ingest(args)
+    if args.inbox:
+        os.makedirs(args.inbox, exist_ok=True)
+        output_file = os.path.join(args.inbox, time.strftime('hubspot_delta_%Y%m%d-%H%M%S.csv'))
+    else:
+        output_file = args.output
+    tmp = output_file + '.part'  # not *.csv, so the daemon ignores it until the rename
+
+    started = time.perf_counter()
+    with open(tmp, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(sync_rows(ingest, args.state, args.full))
+    elapsed = time.perf_counter() - started
+    stats, client = ingest.stats, ingest.client.stats
+    if args.inbox and not stats['contacts']:
+        os.remove(tmp)
+        print(f"✅ No contacts modified since the last sync ({client['requests']:,} requests)")
+        return
+    os.replace(tmp, output_file)
+
+    print(f"✅ Synced {stats['contacts']:,} contacts in {elapsed:.1f}s -> {output_file}")
+    print(f"   - {stats['partitions']:,} partitions, {stats['pages']:,} pages, {client['requests']:,} requests "
+          f"({client['throttled']:,} throttled, {client['retries']:,} retried)")
+    print(f"   - Watermark saved to: {args.state}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the HubSpot contacts API, for testing hubspot_ingest.py
+
+Serves an export CSV through the endpoints the ingest uses, with the limits
+that shape it: at most 200 results per page, no paging past 10,000 results,
+and a requests-per-second budget answered with 429 + Retry-After when
+exceeded. Contacts get ids 1..n in file order (or their 'Record ID').
+
+  POST /crm/v3/objects/contacts/search   filters on hs_object_id / lastmodifieddate
+  GET  /crm/v3/owners
+  POST /mock/touch   {"ids": [...], "properties": {...}}  edit contacts, bumping lastmodifieddate
+
+  python3 mock_hubspot.py --input MasterD_NYCC.csv --port 8766 --rate 10
+  python3 hubspot_ingest.py --hubspot-url http://127.0.0.1:8766 --output synced.csv --full
+"""
+
+import argparse
+import csv
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from create_dates import parse_create_date
+from hubspot_ingest import OWNERS_PATH, PAGE_SIZE, PROPERTY_COLUMNS, SEARCH_PATH, SEARCH_WINDOW
+
+COLUMN_PROPERTIES = {column: name for name, column in PROPERTY_COLUMNS.items()}
+OPERATORS = {
+    'EQ': lambda a, b: a == b,
+    'GT': lambda a, b: a > b,
+    'GTE': lambda a, b: a >= b,
+    'LT': lambda a, b: a < b,
+    'LTE': lambda a, b: a <= b,
+}
+
+
+def iso_ms(ms):
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.') + f'{ms % 1000:03d}Z'
+
+
+def to_ms(value):
+    """Filter value: epoch ms or an ISO timestamp"""
+    if str(value).isdigit():
+        return int(value)
+    parsed = parse_create_date(value)
+    return int((parsed - datetime(1970, 1, 1)).total_seconds() * 1000) if parsed else 0
+
+
+class MockHubSpot:
+    """Contacts held as API records, with the search API's filtering and paging"""
+
+    def __init__(self, rows, rate=None):
+        self.owners = {}
+        self.records = []
+        self.modified = []  # lastmodifieddate (ms) per record
+        for i, row in enumerate(rows, 1):
+            owner = (row.get('Contact owner') or '').strip()
+            if owner and owner not in self.owners:
+                self.owners[owner] = str(100 + len(self.owners))
+            properties = {name: row.get(column) or None for column, name in COLUMN_PROPERTIES.items()}
+            properties['hubspot_owner_id'] = self.owners.get(owner)
+            created = parse_create_date(row.get('Create Date'))
+            created_ms = to_ms(created.isoformat()) if created else 0
+            properties['createdate'] = iso_ms(created_ms) if created else None
+            properties['lastmodifieddate'] = iso_ms(created_ms)
+            record_id = int(row.get('Record ID') or i)
+            properties['hs_object_id'] = str(record_id)
+            self.records.append({'id': str(record_id), 'properties': properties})
+            self.modified.append(created_ms)
+        order = sorted(range(len(self.records)), key=lambda j: int(self.records[j]['id']))
+        self.records = [self.records[j] for j in order]
+        self.modified = [self.modified[j] for j in order]
+        self.index = {record['id']: j for j, record in enumerate(self.records)}
+        self.rate = rate
+        self.tokens = rate or 0
+        self.updated = time.monotonic()
+        self.requests = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_csv(cls, path, rate=None):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return cls(list(csv.DictReader(f)), rate)
+
+    def allow(self):
+        """Token bucket: False means answer 429"""
+        with self._lock:
+            self.requests += 1
+            if not self.rate:
+                return True
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            self.throttled += 1
+            return False
+
+    def _matches(self, j, filters):
+        for f in filters:
+            name, op = f.get('propertyName'), OPERATORS[f.get('operator')]
+            if name == 'hs_object_id':
+                if not op(int(self.records[j]['id']), int(f['value'])):
+                    return False
+            elif name == 'lastmodifieddate':
+                if not op(self.modified[j], to_ms(f['value'])):
+                    return False
+            elif not op(self.records[j]['properties'].get(name) or '', f.get('value')):
+                return False
+        return True
+
+    def search(self, body):
+        groups = [g.get('filters', []) for g in body.get('filterGroups') or []] or [[]]
+        limit = min(int(body.get('limit') or 10), PAGE_SIZE)
+        after = int(body.get('after') or 0)
+        if after + limit > SEARCH_WINDOW:
+            raise ValueError(f'Search results are limited to {SEARCH_WINDOW:,}; narrow the filters')
+        with self._lock:
+            matched = [j for j in range(len(self.records)) if any(self._matches(j, g) for g in groups)]
+            sorts = body.get('sorts') or []
+            if sorts and sorts[0].get('direction') == 'DESCENDING':
+                matched.reverse()
+            wanted = body.get('properties') or list(PROPERTY_COLUMNS)
+            results = [{'id': self.records[j]['id'],
+                        'properties': {name: self.records[j]['properties'].get(name) for name in wanted}}
+                       for j in matched[after:after + limit]]
+        payload = {'total': len(matched), 'results': results}
+        if after + limit < len(matched):
+            payload['paging'] = {'next': {'after': str(after + limit)}}
+        return payload
+
+    def touch(self, ids, properties):
+        """Edit contacts as a HubSpot user would; returns how many were found"""
+        now = int(time.time() * 1000)
+        touched = 0
+        with self._lock:
+            for record_id in ids:
+                j = self.index.get(str(record_id))
+                if j is None:
+                    continue
+                self.records[j]['properties'].update(properties)
+                self.records[j]['properties']['lastmodifieddate'] = iso_ms(now)
+                self.modified[j] = now
+                touched += 1
+        return touched
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    hubspot = None  # set by make_server()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _throttled(self):
+        if self.hubspot.allow():
+            return False
+        self._send(429, {'status': 'error', 'category': 'RATE_LIMITS', 'message': 'You have reached your secondly limit.'},
+                   {'Retry-After': '1', 'X-HubSpot-RateLimit-Interval-Milliseconds': '1000'})
+        return True
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path != OWNERS_PATH:
+            self._send(404, {'status': 'error', 'message': 'not found'})
+            return
+        if self._throttled():
+            return
+        params = parse_qs(parts.query)
+        limit = int(params.get('limit', ['100'])[0])
+        after = int(params.get('after', ['0'])[0])
+        owners = [{'id': owner_id, 'firstName': name.split(' ')[0], 'lastName': ' '.join(name.split(' ')[1:])}
+                  for name, owner_id in self.hubspot.owners.items()]
+        payload = {'results': owners[after:after + limit]}
+        if after + limit < len(owners):
+            payload['paging'] = {'next': {'after': str(after + limit)}}
+        self._send(200, payload)
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send(400, {'status': 'error', 'message': 'invalid JSON body'})
+            return
+        try:
+            if self.path == SEARCH_PATH:
+                if not self._throttled():
+                    self._send(200, self.hubspot.search(body))
+            elif self.path == '/mock/touch':
+                self._send(200, {'touched': self.hubspot.touch(body.get('ids', []), body.get('properties', {}))})
+            else:
+                self._send(404, {'status': 'error', 'message': 'not found'})
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {'status': 'error', 'category': 'VALIDATION_ERROR', 'message': str(e)})
+
+
+def make_server(hubspot, host='127.0.0.1', port=8766):
+    handler = type('BoundMockHandler', (MockHandler,), {'hubspot': hubspot})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve an export CSV as a mock HubSpot contacts API')
+    parser.add_argument('--input', default='/Users/jasonsmacbookpro2022/Desktop/MasterD_NYCC.csv')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--rate', type=float, help='requests per second before answering 429 (default: unlimited)')
+    args = parser.parse_args()
+
+    hubspot = MockHubSpot.from_csv(args.input, args.rate)
+    server = make_server(hubspot, args.host, args.port)
+    print(f"✅ Mock HubSpot serving {len(hubspot.records):,} contacts on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"   - {hubspot.requests:,} requests, {hubspot.throttled:,} throttled")
+
+
+if __name__ == "__main__":
+    main()
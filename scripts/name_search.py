@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Prefix + phonetic name search over the enrichment outputs
+
+Reps look people up by half-remembered names ("Dr. Pedro? Pedrow?"), which
+meant grepping contacts_for_supabase.csv. NameIndex loads an output CSV once
+(contacts_for_supabase.csv, contacts_enriched_clean.csv or a raw export) and
+answers lookups in well under a millisecond:
+
+- a prefix trie over normalized first and last names; every trie node keeps
+  its TOP_PER_NODE best contacts, so a prefix lookup is one walk down the trie
+- a Soundex index, so 'Pedrow' finds 'Pedro' and 'Smyth' finds 'Smith'
+
+Contacts get ids in rank order (value_score, else hubspot_score, else file
+order), so candidate lists are already best-first. Results rank exact name
+matches, then prefix matches, then sound-alikes. Extra query words narrow the
+results ('pedro gar' = a Pedro whose other name starts with 'gar').
+
+  python3 name_search.py contacts_enriched_clean.csv pedrow --city Miami
+  python3 name_search.py contacts_for_supabase.csv          # interactive
+"""
+
+import argparse
+import csv
+import time
+import unicodedata
+
+from contact_schema import rank_value
+
+TOP_PER_NODE = 50
+NAME_COLUMNS = [('first_name', 'First Name'), ('last_name', 'Last Name')]
+CITY_COLUMNS = ['city', 'City']
+SPECIALTY_COLUMNS = ['specialty', 'Specialty']
+TITLES = {'dr', 'doctor', 'dds', 'dmd', 'md', 'mr', 'mrs', 'ms', 'jr', 'sr'}
+
+EXACT, PREFIX, PHONETIC = 0, 1, 2
+MATCH_LABELS = {EXACT: 'exact', PREFIX: 'prefix', PHONETIC: 'sounds like'}
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'), 'l': '4', **dict.fromkeys('mn', '5'), 'r': '6',
+}
+
+
+def normalize_words(text):
+    """'Dr. José  O'Neil' -> ['jose', 'oneil']"""
+    text = unicodedata.normalize('NFKD', str(text or '')).encode('ascii', 'ignore').decode('ascii').lower()
+    words = ''.join(ch if ch.isalpha() or ch.isspace() or ch == '-' else '' for ch in text)
+    return [word for word in words.replace('-', ' ').split() if word not in TITLES]
+
+
+def soundex(word):
+    """American Soundex: 'pedro' / 'pedrow' -> 'P360'"""
+    if not word:
+        return ''
+    code = word[0].upper()
+    previous = SOUNDEX_CODES.get(word[0], '')
+    for ch in word[1:]:
+        digit = SOUNDEX_CODES.get(ch, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if ch not in 'hw':  # h/w don't separate equal codes; vowels do
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def _column(row, columns):
+    for column in columns:
+        if column in row:
+            return row[column] or ''
+    return ''
+
+
+class NameIndex:
+    """In-memory name index; search() returns (contact, match label) best first"""
+
+    def __init__(self, contacts):
+        rows = list(contacts)
+        order = sorted(range(len(rows)), key=lambda i: -rank_value(rows[i]))  # stable
+        self.contacts = [rows[i] for i in order]
+        self.names = []     # id -> normalized name words
+        self.cities = []    # id -> casefolded city
+        self.specialties = []
+        self._trie = [{}, [], []]  # [children, best ids in subtree, ids ending here]
+        self._phonetic = {}
+
+        for contact_id, contact in enumerate(self.contacts):
+            words = []
+            for clean, raw in NAME_COLUMNS:
+                words.extend(normalize_words(contact.get(clean, contact.get(raw))))
+            self.names.append(words)
+            self.cities.append(_column(contact, CITY_COLUMNS).strip().casefold())
+            self.specialties.append(_column(contact, SPECIALTY_COLUMNS).strip().casefold())
+            for word in dict.fromkeys(words):
+                self._insert(word, contact_id)
+                self._phonetic.setdefault(soundex(word), []).append(contact_id)
+
+    def _insert(self, word, contact_id):
+        node = self._trie
+        for ch in word:
+            node = node[0].setdefault(ch, [{}, [], []])
+            if len(node[1]) < TOP_PER_NODE and (not node[1] or node[1][-1] != contact_id):
+                node[1].append(contact_id)
+        if not node[2] or node[2][-1] != contact_id:
+            node[2].append(contact_id)
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return cls(csv.DictReader(f))
+
+    def _node(self, prefix):
+        node = self._trie
+        for ch in prefix:
+            node = node[0].get(ch)
+            if node is None:
+                return None
+        return node
+
+    def _subtree(self, node):
+        """Every id under a trie node, best first (used when filters outrun the top list)"""
+        ids = set()
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            ids.update(current[2])
+            stack.extend(current[0].values())
+        return sorted(ids)
+
+    def _matches_rest(self, contact_id, words):
+        names = self.names[contact_id]
+        for word in words:
+            code = soundex(word)
+            if not any(name.startswith(word) or soundex(name) == code for name in names):
+                return False
+        return True
+
+    def search(self, query, city=None, specialty=None, limit=10):
+        words = normalize_words(query)
+        if not words:
+            return []
+        first, rest = words[0], words[1:]
+        city = city.strip().casefold() if city else None
+        specialty = specialty.strip().casefold() if specialty else None
+
+        node = self._node(first)
+        prefix_ids = []
+        if node is not None:
+            prefix_ids = node[1]
+            if (city or specialty or rest) and len(node[1]) == TOP_PER_NODE:
+                prefix_ids = self._subtree(node)
+        candidate_lists = [
+            (EXACT, node[2] if node is not None else []),
+            (PREFIX, prefix_ids),
+            (PHONETIC, self._phonetic.get(soundex(first), [])),
+        ]
+
+        results = []
+        seen = set()
+        for kind, ids in candidate_lists:
+            for contact_id in ids:
+                if contact_id in seen:
+                    continue
+                if city and self.cities[contact_id] != city:
+                    continue
+                if specialty and self.specialties[contact_id] != specialty:
+                    continue
+                if rest and not self._matches_rest(contact_id, rest):
+                    continue
+                seen.add(contact_id)
+                results.append((self.contacts[contact_id], MATCH_LABELS[kind]))
+                if len(results) >= limit:
+                    return results
+        return results
+
+
+def format_result(contact, label):
+    first = contact.get('first_name', contact.get('First Name', ''))
+    last = contact.get('last_name', contact.get('Last Name', ''))
+    city = _column(contact, CITY_COLUMNS)
+    specialty = _column(contact, SPECIALTY_COLUMNS)
+    email = contact.get('email', contact.get('Email', '')) or ''
+    return f"{first} {last} - {specialty}, {city} {email} ({label})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prefix / sound-alike name search over an enrichment output CSV')
+    parser.add_argument('input', nargs='?', default='/Users/jasonsmacbookpro2022/Desktop/contacts_for_supabase.csv')
+    parser.add_argument('query', nargs='?', help='name or partial name (interactive prompt if omitted)')
+    parser.add_argument('--city')
+    parser.add_argument('--specialty')
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = NameIndex.from_csv(args.input)
+    print(f"✓ Indexed {len(index.contacts):,} contacts in {time.perf_counter() - started:.2f}s")
+
+    def run(query):
+        started = time.perf_counter()
+        results = index.search(query, city=args.city, specialty=args.specialty, limit=args.limit)
+        elapsed = (time.perf_counter() - started) * 1000
+        for contact, label in results:
+            print(f"  {format_result(contact, label)}")
+        print(f"  {len(results)} result(s) in {elapsed:.3f} ms")
+
+    if args.query:
+        run(args.query)
+        return
+    while True:
+        try:
+            query = input('\nname> ').strip()
+        except EOFError:
+            break
+        if not query:
+            break
+        run(query)
+
+
+if __name__ == "__main__":
+    main()
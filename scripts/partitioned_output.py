@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Write enriched contacts to one CSV per territory / contact owner in a single pass
+
+Reps want their own lists. Instead of post-filtering contacts_enriched_clean.csv
+once per rep, every contact is routed to its partition file(s) as it streams by.
+Open handles are capped by an LRU pool (evicted files are reopened in append
+mode), and an optional per-partition top-K keeps only each rep's best contacts.
+"""
+
+import csv
+import heapq
+import os
+import re
+from collections import OrderedDict
+
+UNASSIGNED = 'Unassigned'
+
+
+def partition_filename(key):
+    """Filesystem-safe file name for a partition value"""
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', key).strip('_')
+    return (slug or UNASSIGNED) + '.csv'
+
+
+class LRUWriterPool:
+    """csv.DictWriters keyed by path, with at most max_open files open at once"""
+
+    def __init__(self, fieldnames, max_open=64):
+        self.fieldnames = fieldnames
+        self.max_open = max(1, max_open)
+        self._open = OrderedDict()
+        self._created = set()
+        self.reopens = 0
+
+    def writer(self, path):
+        entry = self._open.get(path)
+        if entry is not None:
+            self._open.move_to_end(path)
+            return entry[1]
+
+        if len(self._open) >= self.max_open:
+            _, (old_file, _) = self._open.popitem(last=False)
+            old_file.close()
+
+        if path in self._created:
+            f = open(path, 'a', newline='', encoding='utf-8')
+            writer = csv.DictWriter(f, fieldnames=self.fieldnames, extrasaction='ignore')
+            self.reopens += 1
+        else:
+            f = open(path, 'w', newline='', encoding='utf-8')
+            writer = csv.DictWriter(f, fieldnames=self.fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            self._created.add(path)
+        self._open[path] = (f, writer)
+        return writer
+
+    def close(self):
+        for f, _ in self._open.values():
+            f.close()
+        self._open.clear()
+
+
+class PartitionedWriter:
+    """Route each contact to one file per partition field (e.g. territory, contact_owner)"""
+
+    def __init__(self, output_dir, partition_by, fieldnames, max_open=64, top_k=None,
+                 score_field='value_score'):
+        self.output_dir = output_dir
+        self.partition_by = list(partition_by)
+        self.fieldnames = fieldnames
+        self.top_k = top_k
+        self.score_field = score_field
+        self.pool = LRUWriterPool(fieldnames, max_open)
+        self.counts = {field: {} for field in self.partition_by}
+        self._heaps = {}
+        self._paths = {}
+        self._taken = set()  # casefolded paths
+        self._seen = 0
+        for field in self.partition_by:
+            os.makedirs(os.path.join(output_dir, field), exist_ok=True)
+
+    def _path(self, field, key):
+        path = self._paths.get((field, key))
+        if path is None:
+            # Distinct keys can share a slug ('Smith, J' / 'Smith J'), or differ only in
+            # case ('Greg Pedro' / 'greg pedro') on a case-insensitive disk - number the later ones
+            name = partition_filename(key)
+            path = os.path.join(self.output_dir, field, name)
+            suffix = 2
+            while path.casefold() in self._taken:
+                path = os.path.join(self.output_dir, field, f"{name[:-4]}_{suffix}.csv")
+                suffix += 1
+            self._taken.add(path.casefold())
+            self._paths[(field, key)] = path
+        return path
+
+    def add(self, contact):
+        index = self._seen
+        self._seen += 1
+        for field in self.partition_by:
+            key = str(contact.get(field) or '').strip() or UNASSIGNED
+            counts = self.counts[field]
+            counts[key] = counts.get(key, 0) + 1
+
+            if self.top_k:
+                # Bounded min-heap per partition; ties keep input order
+                heap = self._heaps.setdefault((field, key), [])
+                item = (contact[self.score_field], -index, contact)
+                if len(heap) < self.top_k:
+                    heapq.heappush(heap, item)
+                elif item[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, item)
+            else:
+                self.pool.writer(self._path(field, key)).writerow(contact)
+
+    def close(self):
+        """Flush top-K partitions (best first) and close every handle"""
+        if self.top_k:
+            for (field, key), heap in self._heaps.items():
+                writer = self.pool.writer(self._path(field, key))
+                ranked = sorted(heap, key=lambda x: (-x[0], -x[1]))
+                writer.writerows(contact for _, _, contact in ranked)
+            self._heaps.clear()
+        self.pool.close()
+        return self.counts
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Top 5,000 pipeline as cached stages: only what changed is rerun
+
+  ingest -> normalize -> score ----\\
+                      \\-> enrich ---> select -> export   (Top_5000_Contacts.csv)
+                                             \\-> report   (Top_5000_Report.txt)
+  upload   (contacts_for_supabase.csv)
+
+Each stage's output is pickled under the cache dir, keyed by a fingerprint
+of (a) the source of every function and the value of every rule table
+reachable from the stage's run function (found by walking the globals it
+uses, see code_fingerprint), (b) the keys of its upstream stages and (c) its
+own parameters / input file. Make-style: editing the report wording in
+select_top_5000.write_report reruns only 'report'; editing
+SUPABASE_FIELDNAMES reruns only 'upload'; a new export file reruns
+everything. Upstream outputs are only unpickled when a downstream stage
+actually has to run.
+
+Each output matches the script it replaces. Top_5000_Contacts.csv is
+select_top_5000.py's, plus the enrich stage's columns. contacts_for_supabase.csv
+comes from prepare_contacts_for_upload.py's own scorer and top K, as that
+script does, not from select_top_5000's ranking.
+
+  python3 pipeline.py --input MasterD_NYCC.csv --output-dir ~/Desktop
+  python3 pipeline.py --force score     # rerun score and everything after it
+"""
+
+import argparse
+import csv
+import hashlib
+import inspect
+import os
+import pickle
+import re
+import time
+from collections import namedtuple
+from datetime import date
+
+import pandas as pd
+
+import canonical_values
+import contact_schema
+import create_dates
+import enrich_contacts_clean as rules
+import prepare_contacts_for_upload as upload
+import select_top_5000 as selection
+from raw_export_scanner import select_top_records
+
+CACHE_VERSION = 2
+
+# upstream: stage names whose outputs are passed to run()
+# params: pipeline parameters that feed the key
+# run: the stage function; it and everything it reaches feed the key (code_fingerprint)
+Stage = namedtuple('Stage', ['name', 'upstream', 'params', 'run'])
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def fingerprint(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _is_local(obj):
+    """Defined in one of the scripts next to this one (not the stdlib / pandas)"""
+    path = getattr(inspect.getmodule(obj), '__file__', None)
+    return path is not None and os.path.dirname(os.path.abspath(path)) == SCRIPTS_DIR
+
+
+def _stable(value):
+    """repr() of a rule table that is the same from run to run (sets sorted, no addresses)"""
+    if isinstance(value, dict):
+        return '{' + ', '.join(f'{_stable(k)}: {_stable(v)}' for k, v in value.items()) + '}'
+    if isinstance(value, (set, frozenset)):
+        return '{' + ', '.join(sorted(map(_stable, value))) + '}'
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}({', '.join(map(_stable, value))})"
+    if isinstance(value, (str, bytes, int, float, bool, type(None), date, re.Pattern)):
+        return repr(value)
+    return f'<{type(value).__qualname__}>'
+
+
+def _names(code):
+    """Global and attribute names a code object (and its nested lambdas / comprehensions) uses"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _names(const)
+    return names
+
+
+def code_fingerprint(roots):
+    """Hash of the source of every local function / class reachable from roots
+    through the globals they use, plus the values of the tables they read
+
+    Walking the references instead of listing them by hand means a helper a
+    stage calls (contact_schema.filled, canonical_values._fuzzy, ...) can't be
+    forgotten, while edits to code the stage never reaches still don't count.
+    """
+    parts = {}
+    pending = [(f'{root.__module__}.{root.__qualname__}', root) for root in roots]
+    while pending:
+        label, obj = pending.pop()
+        if label in parts:
+            continue
+        obj = inspect.unwrap(obj) if callable(obj) else obj  # lru_cache wrappers
+        if inspect.ismodule(obj):
+            continue
+        if inspect.isfunction(obj) or inspect.isclass(obj):
+            if not _is_local(obj):
+                continue
+            try:
+                parts[label] = inspect.getsource(obj)
+            except (OSError, TypeError):  # namedtuple classes have no source of their own
+                parts[label] = _stable(getattr(obj, '_fields', obj.__qualname__))
+            functions = [obj] if inspect.isfunction(obj) else [
+                inspect.unwrap(getattr(member, '__func__', member)) for member in vars(obj).values()
+                if inspect.isfunction(getattr(member, '__func__', member))
+            ]
+            for function in functions:
+                pending += _references(function)
+        elif _is_local(type(obj)) and not isinstance(obj, tuple):
+            pending.append((f'{type(obj).__module__}.{type(obj).__qualname__}', type(obj)))
+        else:
+            parts[label] = _stable(obj)
+    return fingerprint(*sorted(parts.items()))
+
+
+def _references(function):
+    """(label, object) for the globals a function uses, and module.attr lookups on local modules"""
+    names = _names(function.__code__)
+    namespace = function.__globals__
+    module = function.__module__
+    found = [(f'{function.__module__}.{function.__qualname__}.<defaults>', function.__defaults__ or ())]
+    for name in names:
+        if name not in namespace:
+            continue
+        value = namespace[name]
+        found.append((f'{module}.{name}', value))
+        if inspect.ismodule(value) and _is_local(value):
+            found += [(f'{value.__name__}.{attr}', getattr(value, attr)) for attr in names if hasattr(value, attr)]
+    return found
+
+
+def file_fingerprint(path):
+    """Cheap identity for an input or output file: path, size and mtime"""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+# ---- stages -----------------------------------------------------------------
+
+def run_ingest(inputs, params):
+    return pd.read_csv(params['input'])
+
+
+def run_normalize(inputs, params):
+    df = inputs['ingest']
+    coercion_report = contact_schema.coerce_frame(df)
+    df['create_date_parsed'] = create_dates.parse_create_dates(df['Create Date'])
+    return {'df': df, 'coercion_report': coercion_report}
+
+
+def run_score(inputs, params):
+    df = inputs['normalize']['df'].copy()
+    selection.score_frame(df)
+    return df[['recency_points', 'numeric_points', 'value_score']]
+
+
+def run_enrich(inputs, params):
+    df = inputs['normalize']['df']
+    rows = []
+    for notes, specialty, state in zip(df['Notes'], df['Specialty'], df['State/Region']):
+        notes = notes if isinstance(notes, str) else ''
+        specialty = canonical_values.canonical_specialty(specialty if isinstance(specialty, str) else '')
+        technologies = rules.extract_technologies(notes)
+        volume = rules.determine_practice_volume(notes, specialty)
+        rows.append((technologies, rules.calculate_innovation_score(notes, specialty), volume,
+                     rules.estimate_deal_value(specialty, volume, technologies),
+                     rules.determine_territory(state if isinstance(state, str) else '')))
+    return pd.DataFrame(rows, index=df.index, columns=[
+        'technologies_mentioned', 'innovation_score', 'practice_volume', 'estimated_deal_value', 'territory'
+    ])
+
+
+def run_select(inputs, params):
+    df = inputs['normalize']['df']
+    scored = pd.concat([df, inputs['score'], inputs['enrich']], axis=1)
+    top = scored.sort_values('value_score', ascending=False, kind='stable').head(params['k']).copy()
+    selection.add_enrichment_priority(top)
+    return {'top': top, 'total_rows': len(df), 'coercion_report': inputs['normalize']['coercion_report']}
+
+
+def run_export(inputs, params):
+    top = inputs['select']['top']
+    contacts_file = os.path.join(params['output_dir'], 'Top_5000_Contacts.csv')
+    top.drop(columns=selection.SCORING_COLUMNS).to_csv(contacts_file, index=False)
+    return {'files': {contacts_file: file_fingerprint(contacts_file)}}
+
+
+def run_upload(inputs, params):
+    """contacts_for_supabase.csv as prepare_contacts_for_upload.py writes it: that
+    script ranks with its own scorer, so this reads the export rather than 'select'"""
+    top_records, total = select_top_records(params['input'], upload.calculate_contact_value, k=params['k'])
+    supabase_file = os.path.join(params['output_dir'], 'contacts_for_supabase.csv')
+    with open(supabase_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=upload.SUPABASE_FIELDNAMES)
+        writer.writeheader()
+        for value_score, row in top_records:
+            writer.writerow(upload.transform_for_supabase(row))
+    return {'files': {supabase_file: file_fingerprint(supabase_file)}}
+
+
+def run_report(inputs, params):
+    selected = inputs['select']
+    report_file = os.path.join(params['output_dir'], 'Top_5000_Report.txt')
+    selection.write_report(report_file, selected['top'], selected['total_rows'], selected['coercion_report'])
+    return {'files': {report_file: file_fingerprint(report_file)}}
+
+
+STAGES = [
+    Stage('ingest', [], ['input_file'], run_ingest),
+    Stage('normalize', ['ingest'], [], run_normalize),
+    Stage('score', ['normalize'], ['as_of'], run_score),
+    Stage('enrich', ['normalize'], [], run_enrich),
+    Stage('select', ['normalize', 'score', 'enrich'], ['k'], run_select),
+    Stage('export', ['select'], ['output_dir'], run_export),
+    Stage('upload', [], ['input_file', 'k', 'as_of', 'output_dir'], run_upload),
+    Stage('report', ['select'], ['output_dir'], run_report),
+]
+
+
+# ---- cache / runner ---------------------------------------------------------
+
+class StageCache:
+    """One pickle per stage under cache_dir; a new key replaces the old entry"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, f'{name}.pkl')
+
+    def load(self, name, key):
+        """(hit, value); the key is pickled first so a miss never unpickles the value"""
+        try:
+            with open(self._path(name), 'rb') as f:
+                if pickle.load(f) != key:
+                    return False, None
+                return True, pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+
+    def store(self, name, key, value):
+        tmp = self._path(name) + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(name))
+
+
+def outputs_intact(value):
+    """File-producing stages ({'files': ...}) are only hits if their files are still as written"""
+    if not (isinstance(value, dict) and 'files' in value):
+        return True
+    try:
+        return all(file_fingerprint(path) == recorded for path, recorded in value['files'].items())
+    except OSError:
+        return False
+
+
+class Pipeline:
+    def __init__(self, stages, cache, params, force=()):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache = cache
+        self.params = params
+        self.force = set(force)
+        self._keys = {}
+        self._values = {}
+        self.status = {}
+        # Keys are taken before any stage runs: code_fingerprint reads module
+        # globals, and running a stage fills some of them (canonical_values.MATCHES)
+        for name in self.stages:
+            self.key(name)
+
+    def key(self, name):
+        if name not in self._keys:
+            stage = self.stages[name]
+            self._keys[name] = fingerprint(
+                CACHE_VERSION, name, code_fingerprint([stage.run]),
+                [self.key(up) for up in stage.upstream],
+                [(param, self.params[param]) for param in stage.params],
+            )
+        return self._keys[name]
+
+    def _forced(self, name):
+        stage = self.stages[name]
+        return name in self.force or any(self._forced(up) for up in stage.upstream)
+
+    def output(self, name):
+        if name in self._values:
+            return self._values[name]
+        stage = self.stages[name]
+        key = self.key(name)
+        if not self._forced(name):
+            hit, value = self.cache.load(name, key)
+            if hit and outputs_intact(value):
+                self.status[name] = ('cached', 0.0)
+                self._values[name] = value
+                return value
+
+        inputs = {up: self.output(up) for up in stage.upstream}
+        started = time.perf_counter()
+        value = stage.run(inputs, self.params)
+        self.status[name] = ('ran', time.perf_counter() - started)
+        self.cache.store(name, key, value)
+        self._values[name] = value
+        return value
+
+    def is_current(self, name):
+        """True if the stage would be a cache hit (without loading anything upstream)"""
+        if self._forced(name):
+            return False
+        hit, value = self.cache.load(name, self.key(name))
+        return hit and outputs_intact(value)
+
+    def run(self, targets):
+        for name in targets:
+            if self.is_current(name):
+                self.status[name] = ('cached', 0.0)
+            else:
+                self.output(name)
+        return self.status
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the top-5000 pipeline, skipping stages whose inputs are unchanged')
+    parser.add_argument('--input', default='/Users/jasonsmacbookpro2022/Desktop/MasterD_NYCC.csv')
+    parser.add_argument('--output-dir', default='/Users/jasonsmacbookpro2022/Desktop')
+    parser.add_argument('--cache-dir', help='default: <output-dir>/.pipeline_cache')
+    parser.add_argument('--k', type=int, default=5000)
+    parser.add_argument('--force', action='append', default=[], choices=[s.name for s in STAGES],
+                        help='rerun this stage and everything downstream (repeatable)')
+    args = parser.parse_args()
+
+    params = {
+        'input': args.input,
+        'input_file': file_fingerprint(args.input),
+        'output_dir': os.path.abspath(args.output_dir),
+        'k': args.k,
+        'as_of': date.today().isoformat(),  # recency points change daily
+    }
+    cache = StageCache(args.cache_dir or os.path.join(args.output_dir, '.pipeline_cache'))
+    pipeline = Pipeline(STAGES, cache, params, force=args.force)
+
+    started = time.perf_counter()
+    status = pipeline.run(['export', 'upload', 'report'])
+
+    print(f"📦 Pipeline finished in {time.perf_counter() - started:.2f}s")
+    for stage in STAGES:
+        if stage.name in status:
+            state, seconds = status[stage.name]
+            print(f"  {'✓ cache hit' if state == 'cached' else f'▶ ran ({seconds:.2f}s)':<16} {stage.name}")
+        else:
+            print(f"  {'- not needed':<16} {stage.name}")
+
+
+if __name__ == "__main__":
+    main()
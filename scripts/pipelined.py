@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Overlapped read / compute / write stages joined by bounded queues
+
+The row-at-a-time scripts read a row, score it, hand it to the outputs and
+only then read the next one, so the disk waits on the CPU and the CPU waits
+on the disk. pipelined_map() runs the three as separate stages:
+
+- a reader thread pulls rows from the input iterator and cuts them into
+  batches of BATCH_SIZE
+- each batch is submitted to a process pool (or a thread pool, for compute
+  that releases the GIL) running the caller's compute function
+- the caller's loop is the write stage: it receives compute(batch) results
+  strictly in input order, so outputs and tie-breaks match a sequential run
+
+At most `queue_batches` batches are in flight between reader and writer; when
+the writer falls behind the reader blocks, so memory stays flat however large
+the input. An exception in any stage is re-raised in the caller, and closing
+the generator early stops the reader and cancels queued work.
+
+  for contacts in pipelined_map(enrich_batch, rows, workers=4):
+      writer.writerows(contacts)
+"""
+
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+BATCH_SIZE = 2000
+DONE = object()
+
+
+class _Failure:
+    """Reader-side exception, handed to the caller through the queue"""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def batched(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _put(out, item, stop):
+    """Blocking put that gives up once the consumer has gone away"""
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.2)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def pipelined_map(compute, rows, workers=None, batch_size=BATCH_SIZE, queue_batches=None,
+                  processes=True, initializer=None, initargs=()):
+    """Yield compute(batch) for consecutive batches of rows, in input order
+
+    compute, initializer and initargs must be picklable when processes=True;
+    initializer runs once per worker (e.g. to install lookup tables).
+    """
+    workers = workers or os.cpu_count() or 1
+    queue_batches = queue_batches or 2 * workers
+    executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    pool = executor(max_workers=workers, initializer=initializer, initargs=initargs)
+    pending = queue.Queue(maxsize=queue_batches)  # futures, in input order
+    stop = threading.Event()
+
+    def read():
+        try:
+            for batch in batched(rows, batch_size):
+                future = pool.submit(compute, batch)
+                if not _put(pending, future, stop):
+                    future.cancel()
+                    return
+            _put(pending, DONE, stop)
+        except BaseException as e:  # re-raised by the consumer
+            _put(pending, _Failure(e), stop)
+
+    reader = threading.Thread(target=read, name='pipelined-reader', daemon=True)
+    reader.start()
+    try:
+        while True:
+            item = pending.get()
+            if item is DONE:
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item.result()
+    finally:
+        stop.set()
+        reader.join()
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Join contacts to the practices dataset through hash indexes
+
+determine_practice_volume() guesses volume from note keywords even though we
+keep a practices table (create_practices_table.sql, importPracticesFromCSV.js).
+PracticeIndex loads a CSV export of that table once and builds dict indexes on
+normalized keys, so each contact is matched with a few O(1) lookups in the
+same streaming pass that scores it:
+
+1. phone      - 10-digit phone (contact's Phone Number, then Mobile Phone Number)
+2. address    - street + 5-digit ZIP, when both sides have an address column
+3. name_city  - practice name with filler words removed + city + state
+
+Keys that point at more than one practice are ambiguous and never used.
+Matched practices supply practice_id / practice_name and a size-based volume
+that replaces the notes guess in estimate_deal_value().
+
+  python3 enrich_contacts_clean.py --practices practices_export.csv
+"""
+
+import csv
+import re
+
+from canonical_values import state_code
+
+# Practice columns as exported from public.practices; extra address columns are optional
+ADDRESS_COLUMNS = ['address', 'street_address', 'street']
+CONTACT_ADDRESS_COLUMNS = ['Street Address', 'Address']
+CONTACT_ZIP_COLUMNS = ['Postal Code', 'Zip', 'ZIP Code']
+CONTACT_NAME_COLUMNS = ['Company Name', 'Company', 'Practice Name']
+CONTACT_PHONE_COLUMNS = ['Phone Number', 'Mobile Phone Number']
+
+MATCH_METHODS = ['phone', 'address', 'name_city']
+
+ADDRESS_ABBREVIATIONS = {
+    'street': 'st', 'avenue': 'ave', 'road': 'rd', 'boulevard': 'blvd', 'drive': 'dr',
+    'lane': 'ln', 'court': 'ct', 'place': 'pl', 'parkway': 'pkwy', 'highway': 'hwy',
+    'suite': 'ste', 'building': 'bldg', 'north': 'n', 'south': 's', 'east': 'e', 'west': 'w',
+}
+NAME_FILLER_WORDS = {
+    'the', 'and', 'of', 'dental', 'dentistry', 'practice', 'group', 'associates',
+    'center', 'office', 'dds', 'dmd', 'pc', 'pa', 'llc', 'inc', 'pllc',
+}
+
+# practices.size -> practice_volume label used by estimate_deal_value()
+PRACTICE_SIZE_VOLUMES = {
+    'large': 'High', 'enterprise': 'High', 'dso': 'High', 'multi-location': 'High',
+    'medium': 'Medium-High', 'mid': 'Medium-High',
+    'small': 'Medium',
+    'solo': 'Low', 'startup': 'Low',
+}
+# Contacts per practice when size is blank
+CONTACT_COUNT_VOLUMES = [(5, 'High'), (3, 'Medium-High')]
+
+_NON_ALNUM = re.compile(r'[^a-z0-9 ]+')
+
+
+def normalize_phone(raw):
+    """Last 10 digits of a US phone number, or None"""
+    digits = ''.join(ch for ch in str(raw or '') if ch.isdigit())
+    if len(digits) == 11 and digits[0] == '1':
+        digits = digits[1:]
+    return digits if len(digits) == 10 else None
+
+
+def _words(text):
+    return _NON_ALNUM.sub(' ', str(text or '').lower()).split()
+
+
+def normalize_address(street, zip_code):
+    """'123 North Main Street, Suite 4' + '10001-1234' -> '123 n main st ste 4|10001'"""
+    words = [ADDRESS_ABBREVIATIONS.get(word, word) for word in _words(street)]
+    zip5 = ''.join(ch for ch in str(zip_code or '') if ch.isdigit())[:5]
+    if not words or len(zip5) != 5:
+        return None
+    return ' '.join(words) + '|' + zip5
+
+
+def normalize_name_city(name, city, state):
+    words = [word for word in _words(name) if word not in NAME_FILLER_WORDS]
+    city_key = ' '.join(_words(city))
+    if not words or not city_key:
+        return None
+    return ' '.join(words) + '|' + city_key + '|' + (state_code(state) or '')
+
+
+def _first(row, columns):
+    for column in columns:
+        value = row.get(column)
+        if value:
+            return value
+    return None
+
+
+def practice_volume(practice):
+    """Volume label from the practice's size (or contact count), None if unknown"""
+    size = str(practice.get('size') or '').strip().lower()
+    if size in PRACTICE_SIZE_VOLUMES:
+        return PRACTICE_SIZE_VOLUMES[size]
+    try:
+        contacts = int(float(practice.get('contact_count') or 0))
+    except ValueError:
+        contacts = 0
+    for minimum, volume in CONTACT_COUNT_VOLUMES:
+        if contacts >= minimum:
+            return volume
+    return None
+
+
+class PracticeIndex:
+    """Hash indexes over practices plus match-rate counters"""
+
+    def __init__(self, practices):
+        self.practices = 0
+        self.indexes = {method: {} for method in MATCH_METHODS}
+        self.ambiguous = {method: 0 for method in MATCH_METHODS}
+        for practice in practices:
+            self.practices += 1
+            self._add(practice)
+
+        self.matched = {method: 0 for method in MATCH_METHODS}
+        self.contacts = 0
+
+    def _add(self, practice):
+        keys = {
+            'phone': normalize_phone(practice.get('phone')),
+            'address': normalize_address(_first(practice, ADDRESS_COLUMNS), practice.get('zip_code')),
+            'name_city': normalize_name_city(practice.get('name'), practice.get('city'), practice.get('state')),
+        }
+        for method, key in keys.items():
+            if key is None:
+                continue
+            index = self.indexes[method]
+            existing = index.get(key, practice)
+            if existing is None:
+                continue
+            if existing is not practice and (not practice.get('id') or existing.get('id') != practice.get('id')):
+                index[key] = None  # two practices share this key - don't guess
+                self.ambiguous[method] += 1
+            else:
+                index[key] = practice
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return cls(csv.DictReader(f))
+
+    def match(self, row):
+        """(practice, method) for one raw export row, or (None, None)"""
+        self.contacts += 1
+        candidates = [('phone', normalize_phone(row.get(column))) for column in CONTACT_PHONE_COLUMNS]
+        candidates.append(('address', normalize_address(_first(row, CONTACT_ADDRESS_COLUMNS),
+                                                        _first(row, CONTACT_ZIP_COLUMNS))))
+        candidates.append(('name_city', normalize_name_city(_first(row, CONTACT_NAME_COLUMNS),
+                                                            row.get('City'), row.get('State/Region'))))
+        for method, key in candidates:
+            if key is None:
+                continue
+            practice = self.indexes[method].get(key)
+            if practice is not None:
+                self.matched[method] += 1
+                return practice, method
+        return None, None
+
+    def report(self):
+        """Summary lines for the console"""
+        total = sum(self.matched.values())
+        rate = total / self.contacts * 100 if self.contacts else 0.0
+        lines = [f"  • Practices indexed: {self.practices:,}",
+                 f"  • Contacts matched: {total:,} of {self.contacts:,} ({rate:.1f}%)"]
+        for method in MATCH_METHODS:
+            lines.append(f"    - by {method}: {self.matched[method]:,} "
+                         f"({len(self.indexes[method]):,} keys, {self.ambiguous[method]:,} ambiguous)")
+        return lines
@@ -7,38 +7,45 @@ import csv
 import json
 from datetime import datetime
 
+from canonical_values import canonical_specialty, canonical_state, state_code
+from contact_schema import HUBSPOT_COERCER, format_coercion_report
+from create_dates import recency_points
+from raw_export_scanner import select_top_records
+
+# Columns of contacts_for_supabase.csv, in order
+SUPABASE_FIELDNAMES = [
+    'first_name', 'last_name', 'email', 'phone_number', 'cell',
+    'city', 'state', 'specialty', 'hubspot_score', 'sales_touches',
+    'notes', 'contact_owner', 'create_date', 'user_id',
+    'is_for_sale', 'sale_price', 'is_public'
+]
+
 def calculate_contact_value(contact):
     """Score each contact 0-100 based on multiple factors"""
     
     score = 0
     
-    # 1. HUBSPOT SCORE (40 points max)
-    try:
-        hubspot = float(contact.get('HubSpot Score', 0) or 0)
-        if hubspot >= 170:
-            score += 40  # Platinum
-        elif hubspot >= 150:
-            score += 30  # Gold
-        elif hubspot >= 130:
-            score += 20  # Silver
-        else:
-            score += 10  # Bronze
-    except:
-        score += 0
+    # 1. HUBSPOT SCORE (40 points max) - typed via contact_schema, no per-row try/except
+    hubspot = HUBSPOT_COERCER.number('HubSpot Score', contact.get('HubSpot Score'))
+    if hubspot >= 170:
+        score += 40  # Platinum
+    elif hubspot >= 150:
+        score += 30  # Gold
+    elif hubspot >= 130:
+        score += 20  # Silver
+    else:
+        score += 10  # Bronze
     
     # 2. SALES ACTIVITY (20 points max)
-    try:
-        activities = float(contact.get('Number of Sales Activities', 0) or 0)
-        if activities >= 50:
-            score += 20  # Very engaged
-        elif activities >= 20:
-            score += 15  # Engaged
-        elif activities >= 10:
-            score += 10  # Somewhat engaged
-        elif activities >= 5:
-            score += 5   # Touched
-    except:
-        score += 0
+    activities = HUBSPOT_COERCER.number('Number of Sales Activities', contact.get('Number of Sales Activities'))
+    if activities >= 50:
+        score += 20  # Very engaged
+    elif activities >= 20:
+        score += 15  # Engaged
+    elif activities >= 10:
+        score += 10  # Somewhat engaged
+    elif activities >= 5:
+        score += 5   # Touched
     
     # 3. SPECIALTY VALUE (20 points max)
     specialty_values = {
@@ -50,7 +57,7 @@ def calculate_contact_value(contact):
         'General Dentist': 10,
         'Pediatric Dentist': 8,
     }
-    specialty = str(contact.get('Specialty', '') or '')
+    specialty = canonical_specialty(contact.get('Specialty', ''))
     score += specialty_values.get(specialty, 5)
     
     # 4. NOTES QUALITY (20 points max)
@@ -77,15 +84,11 @@ def calculate_contact_value(contact):
     elif len(notes) > 10:
         score += 5
     
-    # 5. RECENCY BONUS
-    create_date = str(contact.get('Create Date', '') or '')
-    if '2024' in create_date or '2023' in create_date:
-        score += 10
-    elif '2022' in create_date:
-        score += 5
+    # 5. RECENCY BONUS (decays with days since creation, parsed once per distinct date)
+    score += recency_points(contact.get('Create Date', ''))
     
     # 6. LOCATION BONUS
-    state = str(contact.get('State/Region', '') or '').upper()[:2]
+    state = state_code(contact.get('State/Region', ''))
     premium_states = ['CA', 'NY', 'TX', 'FL', 'IL', 'NJ', 'PA', 'MA']
     if state in premium_states:
         score += 10
@@ -140,8 +143,8 @@ def transform_for_supabase(contact):
         'phone_number': phone,
         'cell': mobile,
         'city': contact.get('City', '').strip(),
-        'state': contact.get('State/Region', '').strip(),
-        'specialty': contact.get('Specialty', '').strip(),
+        'state': canonical_state(contact.get('State/Region', '')),
+        'specialty': canonical_specialty(contact.get('Specialty', '')),
         
         # Sales data
         'hubspot_score': contact.get('HubSpot Score', '').strip(),
@@ -163,21 +166,17 @@ def main():
     
     print("Reading contacts...")
     
-    contacts = []
-    with open(input_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Calculate value score
-            row['value_score'] = calculate_contact_value(row)
-            contacts.append(row)
+    # Score straight off the memory-mapped export; only the top 5000 (or all
+    # if less than 5000) are ever decoded into full row dicts
+    top_records, total = select_top_records(input_file, calculate_contact_value, k=5000)
+    top_contacts = []
+    for value_score, row in top_records:
+        row['value_score'] = value_score
+        top_contacts.append(row)
     
-    print(f"Loaded {len(contacts):,} contacts")
-    
-    # Sort by value score
-    contacts.sort(key=lambda x: x['value_score'], reverse=True)
-    
-    # Get top 5000 (or all if less than 5000)
-    top_contacts = contacts[:5000]
+    print(f"Loaded {total:,} contacts")
+    for line in format_coercion_report(HUBSPOT_COERCER.report(), total):
+        print(line)
     
     print(f"\nSelected top {len(top_contacts):,} contacts")
     
@@ -189,15 +188,8 @@ def main():
     
     # Write CSV for Supabase import
     if supabase_contacts:
-        fieldnames = [
-            'first_name', 'last_name', 'email', 'phone_number', 'cell',
-            'city', 'state', 'specialty', 'hubspot_score', 'sales_touches',
-            'notes', 'contact_owner', 'create_date', 'user_id',
-            'is_for_sale', 'sale_price', 'is_public'
-        ]
-        
         with open(output_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer = csv.DictWriter(f, fieldnames=SUPABASE_FIELDNAMES)
             writer.writeheader()
             writer.writerows(supabase_contacts)
         
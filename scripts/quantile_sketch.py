@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Mergeable streaming quantile sketches for score and deal-value distributions
+
+The score bands and "Total Estimated Pipeline" only cover the 5,000 contacts
+that get materialized; keeping every score of the full export to get its
+percentiles is what we can't afford. A KLL sketch keeps a small, fixed number
+of items per distribution instead:
+
+- items go into a stack of compactors; when a level fills up it is sorted and
+  every other item (random offset) is promoted to the next level with twice
+  the weight. Lower levels get capacities shrinking by C = 2/3, so a sketch
+  holds at most about 3 * K items no matter how many values it has seen
+- with K = 200 a quantile is off by at most ~1.7% of n in rank (99%
+  confidence): p50 returns a value whose true rank lies in 48.3%..51.7%.
+  count, sum (the full-export pipeline total), min and max are exact
+- lead_tier counts are a plain counter per tier, so score bands are exact
+- two sketches merge by concatenating their levels and compacting, with the
+  same error bound as one sketch over both streams - so chunks can be
+  sketched in parallel processes and combined afterwards
+
+SketchSet keeps one sketch per field (value_score, estimated_deal_value,
+innovation_score) overall and per specialty and territory; memory grows with
+the number of groups, not rows.
+
+  python3 quantile_sketch.py build chunk_*.csv --workers 4 --output sketches.json
+  python3 quantile_sketch.py merge all.json east.json west.json
+  python3 quantile_sketch.py report sketches.json
+  python3 enrich_contacts_clean.py --distribution --sketch-output sketches.json
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_K = 200
+CAPACITY_DECAY = 2 / 3
+MIN_CAPACITY = 2
+RANK_ERROR = {200: 0.0165, 400: 0.0083, 800: 0.0042}  # normalized rank error at 99% confidence
+
+SKETCH_FIELDS = ['value_score', 'estimated_deal_value', 'innovation_score']
+SKETCH_DIMENSIONS = ['specialty', 'territory']
+OVERALL = ('overall', 'All')
+REPORT_QUANTILES = [0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+
+class KLLSketch:
+    """Approximate quantiles of a numeric stream in O(K) memory"""
+
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = k
+        self.random = random.Random(seed)
+        self.compactors = [[]]
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._size = 0
+        self._max_size = self._capacity(0)
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(MIN_CAPACITY, int(math.ceil(self.k * CAPACITY_DECAY ** depth)))
+
+    def _grow(self):
+        self.compactors.append([])
+        self._resize()
+
+    def _resize(self):
+        self._max_size = sum(self._capacity(level) for level in range(len(self.compactors)))
+        self._size = sum(len(c) for c in self.compactors)
+
+    def add(self, value):
+        self.compactors[0].append(value)
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self):
+        """Compact the lowest full level(s) until the sketch is back under budget"""
+        for level in range(len(self.compactors)):
+            items = self.compactors[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.compactors):
+                    self._grow()
+                items.sort()
+                keep = [items.pop()] if len(items) % 2 else []
+                self.compactors[level + 1].extend(items[self.random.randrange(2)::2])
+                self.compactors[level] = keep
+                self._size = sum(len(c) for c in self.compactors)
+                if self._size < self._max_size:
+                    break
+
+    def merge(self, other):
+        """Fold another sketch (e.g. from a parallel chunk) into this one"""
+        if other.k != self.k:
+            raise ValueError(f"Can't merge sketches with different K ({self.k} vs {other.k})")
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._size = sum(len(c) for c in self.compactors)
+        while self._size >= self._max_size:
+            self._compress()
+        return self
+
+    def _weighted(self):
+        items = sorted((value, 1 << level) for level, c in enumerate(self.compactors) for value in c)
+        return items, sum(weight for value, weight in items)
+
+    def quantile(self, q):
+        """Value at fraction q (0..1) of the stream; None if empty"""
+        if not self.count:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        items, weight = self._weighted()
+        target = q * weight
+        cumulative = 0
+        for value, w in items:
+            cumulative += w
+            if cumulative >= target:
+                return value
+        return self.max
+
+    def quantiles(self, qs):
+        return [self.quantile(q) for q in qs]
+
+    def rank(self, value):
+        """Estimated fraction of the stream strictly below value"""
+        items, weight = self._weighted()
+        if not weight:
+            return 0.0
+        return sum(w for v, w in items if v < value) / weight
+
+    def rank_error(self):
+        """Normalized rank error bound for this K (99% confidence)"""
+        return RANK_ERROR.get(self.k, 3.3 / self.k)
+
+    def to_dict(self):
+        return {'k': self.k, 'count': self.count, 'total': self.total,
+                'min': self.min if self.count else None, 'max': self.max if self.count else None,
+                'compactors': self.compactors}
+
+    @classmethod
+    def from_dict(cls, data, seed=None):
+        sketch = cls(data['k'], seed)
+        sketch.compactors = [list(items) for items in data['compactors']]
+        sketch.count = data['count']
+        sketch.total = data['total']
+        if data['count']:
+            sketch.min, sketch.max = data['min'], data['max']
+        sketch._resize()
+        return sketch
+
+
+def _number(value):
+    if value is None or value == '':
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number == number else None
+
+
+class SketchSet:
+    """KLL sketches per (field, dimension, group) for enriched contacts"""
+
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = k
+        self.random = random.Random(seed)
+        self.sketches = {}
+        self.tiers = {}
+
+    def _sketch(self, key):
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = KLLSketch(self.k, self.random.randrange(1 << 30))
+        return sketch
+
+    def add(self, contact):
+        """Feed one enriched contact (build_clean_contact() output)"""
+        groups = [OVERALL] + [(dimension, str(contact.get(dimension) or '').strip() or '(blank)')
+                              for dimension in SKETCH_DIMENSIONS]
+        tier = contact.get('lead_tier')
+        if tier:
+            self.tiers[tier] = self.tiers.get(tier, 0) + 1
+        for field in SKETCH_FIELDS:
+            value = _number(contact.get(field))
+            if value is None:
+                continue
+            for dimension, group in groups:
+                self._sketch((field, dimension, group)).add(value)
+
+    def get(self, field, dimension='overall', group='All'):
+        return self.sketches.get((field, dimension, group))
+
+    def merge(self, other):
+        for key, sketch in other.sketches.items():
+            self._sketch(key).merge(sketch)
+        for tier, count in other.tiers.items():
+            self.tiers[tier] = self.tiers.get(tier, 0) + count
+        return self
+
+    def to_dict(self):
+        return {'k': self.k, 'tiers': self.tiers, 'sketches': [[*key, sketch.to_dict()] for key, sketch in self.sketches.items()]}
+
+    @classmethod
+    def from_dict(cls, data, seed=None):
+        sketch_set = cls(data['k'], seed)
+        sketch_set.tiers = dict(data['tiers'])
+        for field, dimension, group, sketch in data['sketches']:
+            sketch_set.sketches[(field, dimension, group)] = KLLSketch.from_dict(
+                sketch, sketch_set.random.randrange(1 << 30))
+        return sketch_set
+
+    def save(self, path):
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def groups(self, dimension):
+        """Groups of a dimension, largest first"""
+        counts = {}
+        for field, dim, group in self.sketches:
+            if dim == dimension and field == SKETCH_FIELDS[0]:
+                counts[group] = self.sketches[(field, dim, group)].count
+        return sorted(counts, key=lambda group: (-counts[group], group))
+
+    def report(self):
+        """Console lines: overall percentiles, lead tiers and per-group medians"""
+        scores = self.get('value_score')
+        if scores is None:
+            return ["  • No contacts sketched"]
+        lines = [f"  Percentiles over all {scores.count:,} contacts "
+                 f"(±{scores.rank_error():.1%} rank, K={self.k}):"]
+        header = ''.join(f"{f'p{q * 100:g}':>10}" for q in REPORT_QUANTILES)
+        lines.append(f"    {'':<22}{'min':>10}{header}{'max':>10}")
+        for field in SKETCH_FIELDS:
+            sketch = self.get(field)
+            if sketch is None:
+                continue
+            values = [sketch.min] + sketch.quantiles(REPORT_QUANTILES) + [sketch.max]
+            lines.append(f"    {field:<22}" + ''.join(f"{value:>10,.0f}" for value in values))
+
+        lines.append("  Lead tiers:")
+        for tier in ['Platinum', 'Gold', 'Silver', 'Bronze']:
+            if tier in self.tiers:
+                lines.append(f"    {tier}: {self.tiers[tier]:,} contacts")
+
+        deals = self.get('estimated_deal_value')
+        if deals is not None:
+            lines.append(f"  Total Estimated Pipeline (full export): ${deals.total:,.2f}")
+
+        for dimension in SKETCH_DIMENSIONS:
+            lines.append(f"  By {dimension}:")
+            lines.append(f"    {'':<28}{'contacts':>10}{'score p50':>11}{'score p90':>11}{'pipeline':>18}")
+            for group in self.groups(dimension):
+                score = self.get('value_score', dimension, group)
+                deal = self.get('estimated_deal_value', dimension, group)
+                pipeline = f"${deal.total:,.0f}" if deal else '-'
+                lines.append(f"    {group[:28]:<28}{score.count:>10,}{score.quantile(0.5):>11,.0f}"
+                             f"{score.quantile(0.9):>11,.0f}{pipeline:>18}")
+        return lines
+
+
+def sketch_file(path, k=DEFAULT_K):
+    """Score and sketch one raw export chunk; returns SketchSet.to_dict() for pickling"""
+    from enrich_contacts_clean import build_clean_contact
+
+    sketches = SketchSet(k)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            sketches.add(build_clean_contact(row))
+    return sketches.to_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Full-export percentiles from mergeable quantile sketches')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help='sketch raw export chunks in parallel and merge them')
+    build.add_argument('inputs', nargs='+', help='raw export CSV chunks (each with a header row)')
+    build.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    build.add_argument('--k', type=int, default=DEFAULT_K, help='sketch size: larger K, smaller error')
+    build.add_argument('--output', help='save the merged sketches as JSON')
+    merge = sub.add_parser('merge', help='merge saved sketch files')
+    merge.add_argument('output')
+    merge.add_argument('inputs', nargs='+')
+    report = sub.add_parser('report', help='print the distribution report of a saved sketch file')
+    report.add_argument('input')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        sketches = SketchSet(args.k)
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(args.inputs))) as pool:
+            for path, data in zip(args.inputs, pool.map(sketch_file, args.inputs, [args.k] * len(args.inputs))):
+                sketches.merge(SketchSet.from_dict(data))
+                print(f"  ✓ {path}")
+        if args.output:
+            sketches.save(args.output)
+    elif args.command == 'merge':
+        sketches = SketchSet.load(args.inputs[0])
+        for path in args.inputs[1:]:
+            sketches.merge(SketchSet.load(path))
+        sketches.save(args.output)
+        print(f"✅ Merged {len(args.inputs)} sketch files into {args.output}")
+    else:
+        sketches = SketchSet.load(args.input)
+
+    print(f"\n📊 FULL-EXPORT DISTRIBUTION:")
+    for line in sketches.report():
+        print(line)
+    if args.command == 'build' and args.output:
+        print(f"\n✅ Sketches saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
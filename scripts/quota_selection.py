@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Top-K selection with per-owner / per-territory / per-specialty quotas
+
+A straight sort + [:5000] lets one rep or one state (NY via the premium-state
+bonus) take most of the slots. QuotaSelector picks the highest-scoring K
+contacts subject to min/max counts per group, in one streaming pass:
+
+1. Streaming (O(n log K)): rows are bucketed by their full group tuple
+   (owner, territory, specialty, ... - every quota'd dimension at once), and
+   each bucket keeps only its best min(K, smallest max cap of its groups)
+   rows. A row pushed out of its bucket can never be selected: every row
+   above it in the bucket shares all of its groups, so it is considered
+   first and fits whenever the dropped row would, and there are already
+   enough of them to fill K or the tightest cap. Caps on one dimension
+   therefore never discard a row another dimension's caps could still need.
+2. Selection over the surviving candidates only: minimums are filled first,
+   always serving the group furthest below its floor with its best row that
+   breaks no max; the rest is greedy by score while every group stays under
+   its max. The result is exactly that selection over every row seen. When
+   the caps leave fewer than K rows selectable, the summary says so.
+
+Quota specs: 'contact_owner=500' applies to every owner, 'territory:Northeast=2000'
+to one group. Example:
+
+  python3 quota_selection.py contacts_enriched_clean.csv balanced.csv --k 5000 \\
+      --max contact_owner=600 --max territory=1500 --min specialty=150
+"""
+
+import argparse
+import csv
+import heapq
+
+from enrich_contacts_clean import determine_territory
+
+# Dimension -> (clean column, raw HubSpot export column)
+DIMENSIONS = {
+    'contact_owner': ('contact_owner', 'Contact owner'),
+    'territory': ('territory', None),
+    'specialty': ('specialty', 'Specialty'),
+}
+
+
+def group_of(row, dimension):
+    """Group value for a clean enriched row or a raw export row"""
+    clean, raw = DIMENSIONS[dimension]
+    value = row.get(clean)
+    if value is None and raw:
+        value = row.get(raw)
+    if value is None and dimension == 'territory':
+        value = determine_territory(str(row.get('State/Region') or ''))
+    return str(value or '').strip()
+
+
+def parse_quotas(specs):
+    """['contact_owner=500', 'territory:West=900'] -> {dimension: {group or None: n}}"""
+    quotas = {}
+    for spec in specs or []:
+        target, _, count = spec.rpartition('=')
+        dimension, _, group = target.partition(':')
+        if dimension not in DIMENSIONS or not count.isdigit():
+            raise ValueError(f"Bad quota '{spec}' - use dimension=N or dimension:group=N "
+                             f"with dimension in {sorted(DIMENSIONS)}")
+        quotas.setdefault(dimension, {})[group or None] = int(count)
+    return quotas
+
+
+class QuotaSelector:
+    """Streaming constrained top-K; feed rows with add(), then call select()"""
+
+    def __init__(self, k, max_quotas=None, min_quotas=None, score_field='value_score'):
+        self.k = k
+        self.max_quotas = max_quotas or {}
+        self.min_quotas = min_quotas or {}
+        self.score_field = score_field
+        self.dimensions = sorted(set(self.max_quotas) | set(self.min_quotas))
+        named_floor = sum(n for spec in self.min_quotas.values() for g, n in spec.items() if g is not None)
+        if named_floor > k:
+            raise ValueError("Named minimum quotas add up to more than k")
+
+        self.rows = {}     # seq -> (score, groups, row) for live candidates
+        self._buckets = {}  # group tuple -> (capacity, min-heap of (score, -seq))
+        self.groups_seen = set()  # (dimension, group) of every row added, for the unmet-minimum report
+        self.seen = 0
+
+    def _limit(self, quotas, dimension, group):
+        spec = quotas.get(dimension, {})
+        return spec.get(group, spec.get(None))
+
+    def _capacity(self, groups):
+        """Rows of one group tuple that could ever be selected together"""
+        caps = [self._limit(self.max_quotas, dimension, group) for dimension, group in groups]
+        return min([self.k] + [cap for cap in caps if cap is not None])
+
+    def add(self, row):
+        seq = self.seen
+        self.seen += 1
+        score = float(row[self.score_field])
+        groups = tuple((d, group_of(row, d)) for d in self.dimensions)
+        self.groups_seen.update(groups)
+        item = (score, -seq)
+
+        bucket = self._buckets.get(groups)
+        if bucket is None:
+            bucket = self._buckets[groups] = (self._capacity(groups), [])
+        capacity, heap = bucket
+        if len(heap) < capacity:
+            heapq.heappush(heap, item)
+        elif capacity and item > heap[0]:
+            del self.rows[-heapq.heapreplace(heap, item)[1]]
+        else:
+            return
+        self.rows[seq] = (score, groups, row)
+
+    def select(self):
+        """[(score, row)] best first, plus a report of unmet minimums"""
+        candidates = sorted(self.rows.items(), key=lambda x: (-x[1][0], x[0]))
+        counts = {}
+        chosen = set()
+
+        def fits(groups):
+            for dimension, group in groups:
+                cap = self._limit(self.max_quotas, dimension, group)
+                if cap is not None and counts.get((dimension, group), 0) >= cap:
+                    return False
+            return True
+
+        def take(seq, groups):
+            chosen.add(seq)
+            for key in groups:
+                counts[key] = counts.get(key, 0) + 1
+
+        # Phase 1: fill minimums, always serving the group furthest from its
+        # floor next (by fill ratio) with its best remaining row
+        members = {}
+        for seq, (score, groups, row) in candidates:
+            for key in groups:
+                floor = self._limit(self.min_quotas, *key)
+                if floor:
+                    members.setdefault(key, []).append(seq)
+        floors = {key: self._limit(self.min_quotas, *key) for key in members}
+        queue = [(0.0, i, key, 0) for i, key in enumerate(sorted(members))]
+        heapq.heapify(queue)
+        while queue and len(chosen) < self.k:
+            ratio, i, key, pos = heapq.heappop(queue)
+            if counts.get(key, 0) >= floors[key]:
+                continue
+            seqs = members[key]
+            while pos < len(seqs) and (seqs[pos] in chosen or not fits(self.rows[seqs[pos]][1])):
+                pos += 1
+            if pos == len(seqs):
+                continue
+            take(seqs[pos], self.rows[seqs[pos]][1])
+            heapq.heappush(queue, (counts[key] / floors[key], i, key, pos + 1))
+
+        # Phase 2: greedy by score under the max caps
+        for seq, (score, groups, row) in candidates:
+            if len(chosen) >= self.k:
+                break
+            if seq not in chosen and fits(groups):
+                take(seq, groups)
+
+        unmet = {}
+        for dimension, spec in self.min_quotas.items():
+            # Every group in the data, including ones that got no rows at all
+            groups = {g for d, g in self.groups_seen if d == dimension} | {g for g in spec if g is not None}
+            for group in groups:
+                floor = self._limit(self.min_quotas, dimension, group) or 0
+                if counts.get((dimension, group), 0) < floor:
+                    unmet[(dimension, group)] = (counts.get((dimension, group), 0), floor)
+
+        selected = [(score, row) for seq, (score, groups, row) in candidates if seq in chosen]
+        return selected, unmet
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quota-constrained top-K selection of enriched contacts')
+    parser.add_argument('input', help='enriched CSV (e.g. contacts_enriched_clean.csv)')
+    parser.add_argument('output')
+    parser.add_argument('--k', type=int, default=5000)
+    parser.add_argument('--max', action='append', help='dimension[:group]=N upper bound (repeatable)')
+    parser.add_argument('--min', action='append', help='dimension[:group]=N lower bound (repeatable)')
+    args = parser.parse_args()
+
+    selector = QuotaSelector(args.k, parse_quotas(args.max), parse_quotas(args.min))
+    with open(args.input, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        for row in reader:
+            selector.add(row)
+
+    selected, unmet = selector.select()
+    with open(args.output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(row for score, row in selected)
+
+    print(f"✅ Selected {len(selected):,} of {selector.seen:,} contacts "
+          f"({len(selector.rows):,} candidates kept) to: {args.output}")
+    print_quota_summary(selected, selector, unmet)
+
+
+def print_quota_summary(selected, selector, unmet):
+    for dimension in selector.dimensions:
+        counts = {}
+        for score, row in selected:
+            group = group_of(row, dimension) or '(blank)'
+            counts[group] = counts.get(group, 0) + 1
+        print(f"\n{dimension}:")
+        for group, count in sorted(counts.items(), key=lambda x: x[1], reverse=True)[:10]:
+            print(f"  {group}: {count:,}")
+    for line in quota_warnings(selected, selector, unmet):
+        print(line)
+
+
+def quota_warnings(selected, selector, unmet):
+    """Unmet minimums, and K left short because the max quotas block every other row"""
+    lines = [f"⚠️  {dimension} '{group}' has only {have:,} of its minimum {need:,}"
+             for (dimension, group), (have, need) in unmet.items()]
+    if len(selected) < min(selector.k, selector.seen):
+        lines.append(f"⚠️  The max quotas leave only {len(selected):,} of the {selector.k:,} slots fillable "
+                     f"from {selector.seen:,} contacts")
+    return lines
+
+
+if __name__ == "__main__":
+    main()
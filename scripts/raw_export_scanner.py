@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped scanner for the raw HubSpot export (MasterD_NYCC.csv)
+
+csv.DictReader decodes every byte of the file and builds a dict per row before
+anything is filtered. This maps the file and walks it as bytes: records and
+fields are located as offsets, only the columns a caller actually asks for are
+decoded, and a full row dict is built only for contacts that reach the output.
+
+ContactRecord implements .get() like a row dict, so the existing scoring
+functions (calculate_value_score, calculate_contact_value) run on it unchanged.
+"""
+
+import csv
+import heapq
+import mmap
+import sys
+
+QUOTE = ord('"')
+COMMA = b','
+NEWLINE = b'\n'
+BOM = b'\xef\xbb\xbf'
+
+
+def _record_end(mm, pos, size):
+    """Offset of the newline ending the record at pos (honours quoted newlines)"""
+    nl = mm.find(NEWLINE, pos)
+    if nl == -1:
+        nl = size
+    q = mm.find(b'"', pos, nl)
+    if q == -1:
+        return nl  # Fast path - no quotes, the line is the record
+
+    # Slow path: walk quote pairs until a newline falls outside quotes
+    in_quotes = False
+    i = pos
+    while True:
+        if in_quotes:
+            q = mm.find(b'"', i)
+            if q == -1:
+                return size
+            in_quotes = False
+            i = q + 1
+        else:
+            q = mm.find(b'"', i)
+            nl = mm.find(NEWLINE, i)
+            if nl == -1:
+                nl = size
+            if q == -1 or nl < q:
+                return nl
+            in_quotes = True
+            i = q + 1
+
+
+class ContactRecord:
+    """One record as byte offsets into the mapped file; fields decode on demand"""
+
+    __slots__ = ('_scanner', 'start', 'end', '_spans', '_pos')
+
+    def __init__(self, scanner, start, end):
+        self._scanner = scanner
+        self.start = start
+        self.end = end
+        self._spans = []
+        self._pos = start
+
+    def _span(self, index):
+        """Locate fields up to index, resuming where the last lookup stopped"""
+        spans = self._spans
+        mm = self._scanner.mm
+        end = self.end
+        while len(spans) <= index and self._pos <= end:
+            p = self._pos
+            if p < end and mm[p] == QUOTE:
+                # Quoted field: skip doubled quotes to find the closing one
+                j = p + 1
+                while True:
+                    j = mm.find(b'"', j, end)
+                    if j == -1:
+                        j = end
+                        break
+                    if j + 1 < end and mm[j + 1] == QUOTE:
+                        j += 2
+                        continue
+                    break
+                spans.append((p + 1, j, True))
+                comma = mm.find(COMMA, j, end)
+            else:
+                comma = mm.find(COMMA, p, end)
+                spans.append((p, end if comma == -1 else comma, False))
+            self._pos = end + 1 if comma == -1 else comma + 1
+        return spans[index] if index < len(spans) else None
+
+    def get(self, name, default=None):
+        index = self._scanner.columns.get(name)
+        if index is None:
+            return default
+        span = self._span(index)
+        if span is None:
+            return default
+        start, end, quoted = span
+        value = self._scanner.mm[start:end].decode(self._scanner.encoding)
+        return value.replace('""', '"') if quoted else value
+
+    def __getitem__(self, name):
+        value = self.get(name, self)
+        if value is self:
+            raise KeyError(name)
+        return value
+
+    def raw(self):
+        """Undecoded bytes of the record"""
+        return self._scanner.mm[self.start:self.end]
+
+    def to_dict(self):
+        """Materialize the full row exactly as csv.DictReader would"""
+        text = self.raw().decode(self._scanner.encoding)
+        values = next(csv.reader([text]))
+        return dict(zip(self._scanner.header, values))
+
+
+class RawExportScanner:
+    """Iterate ContactRecords over a memory-mapped CSV export"""
+
+    def __init__(self, path, encoding='utf-8'):
+        self.path = path
+        self.encoding = encoding
+        self._file = open(path, 'rb')
+        try:
+            self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file - nothing to map
+            self.mm = b''
+        self.size = len(self.mm)
+        self.data_start = 3 if self.mm[:3] == BOM else 0
+
+        header_end = _record_end(self.mm, self.data_start, self.size)
+        header_text = self.mm[self.data_start:header_end].decode(encoding).rstrip('\r')
+        self.header = next(csv.reader([header_text]), [])
+        self.columns = {name: i for i, name in enumerate(self.header)}
+        self.body_start = min(header_end + 1, self.size)
+
+    def __iter__(self):
+        mm = self.mm
+        size = self.size
+        pos = self.body_start
+        while pos < size:
+            end = _record_end(mm, pos, size)
+            record_end = end
+            if record_end > pos and mm[record_end - 1] == 13:  # strip \r of CRLF
+                record_end -= 1
+            if record_end > pos:
+                yield ContactRecord(self, pos, record_end)
+            pos = end + 1
+
+    def close(self):
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def select_top_records(path, score, k=5000):
+    """Score every record lazily; return ([(score, row_dict)] for the top k, rows scanned)
+
+    Ties keep input order, matching a stable sort of the whole file.
+    """
+    heap = []
+    index = -1
+    with RawExportScanner(path) as scanner:
+        for index, record in enumerate(scanner):
+            item = (score(record), -index, record)
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, item)
+        ranked = sorted(heap, key=lambda x: (-x[0], -x[1]))
+        # Only the winners are ever materialized as dicts
+        return [(value, record.to_dict()) for value, neg_index, record in ranked], index + 1
+
+
+def main():
+    from enrich_contacts_clean import calculate_value_score  # only the demo needs the scorers
+
+    input_file = sys.argv[1] if len(sys.argv) > 1 else '/Users/jasonsmacbookpro2022/Desktop/MasterD_NYCC.csv'
+
+    print(f"Scanning {input_file}...")
+    top, total = select_top_records(input_file, calculate_value_score, k=20)
+    print(f"✓ Scored {total:,} contacts, top {len(top)}:")
+    for value, row in top:
+        print(f"  {value:3d}  {row.get('First Name', '')} {row.get('Last Name', '')} ({row.get('Specialty', '')})")
+
+
+if __name__ == "__main__":
+    main()
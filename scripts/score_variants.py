@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Score N weight variants in one pass and compare their rankings
+
+Trying new weights used to mean copying select_top_5000.py, editing the
+constants and rerunning everything. The expensive part of scoring - parsing
+dates, coercing numbers, scanning notes for signals - doesn't depend on the
+weights, so it is done once into per-row feature codes. Each variant is then
+a handful of array lookups, giving a (contacts x variants) score matrix for
+about the cost of scoring once.
+
+Variants are JSON; each entry overrides the baseline (select_top_5000.py's
+current rules), and 'scale' multiplies whole components:
+
+  [
+    {"name": "hubspot-heavy", "scale": {"hubspot": 1.5, "specialty": 0.5}},
+    {"name": "no-location", "premium_points": 0},
+    {"name": "ortho-push", "specialty_values": {"Orthodontist": 20}},
+    {"name": "west-coast", "premium_states": ["CA", "WA", "OR"]}
+  ]
+
+  python3 score_variants.py variants.json --input MasterD_NYCC.csv --k 5000
+
+The report compares every variant with the baseline: top-K overlap,
+Spearman rank correlation and how many contacts change enrichment tier.
+Keyword lists are fixed; only points, tables and scales vary.
+"""
+
+import argparse
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+from canonical_values import canonical_codes, canonical_specialty, canonical_state
+from contact_schema import coerce_frame, filled, format_coercion_report
+from create_dates import RECENCY_MAX_POINTS, parse_create_dates, recency_points_vectorized
+from external_rank import ENRICHMENT_TIERS, QUEUED_TIER
+from contact_value import (
+    BUYING_SIGNALS, DEFAULT_SPECIALTY_POINTS, INTEREST_SIGNALS, PREMIUM_STATES,
+    SPECIALTY_VALUES, TECH_SIGNALS, VOLUME_SIGNALS,
+)
+
+# The rules calculate_contact_value() applies today
+BASELINE = {
+    'name': 'baseline',
+    'hubspot_points': [[170, 40], [150, 30], [130, 20]],
+    'hubspot_default': 10,
+    'activity_points': [[50, 20], [20, 15], [10, 10], [5, 5]],
+    'activity_default': 0,
+    'specialty_values': SPECIALTY_VALUES,
+    'default_specialty_points': DEFAULT_SPECIALTY_POINTS,
+    'notes_points': {'buying': 20, 'interest': 15, 'tech': 10, 'volume': 10, 'any': 5},
+    'recency_points': RECENCY_MAX_POINTS,
+    'premium_states': PREMIUM_STATES,
+    'premium_points': 10,
+    'completeness_points': {'email_and_mobile': 10, 'email': 5},
+    'scale': {},
+    'cap': 100,
+}
+
+COMPONENTS = ['hubspot', 'activity', 'specialty', 'notes', 'recency', 'location', 'completeness']
+
+# Notes bands, checked in this order like the if/elif chain
+NOTES_BANDS = [
+    ('buying', BUYING_SIGNALS),
+    ('interest', INTEREST_SIGNALS),
+    ('tech', TECH_SIGNALS),
+    ('volume', VOLUME_SIGNALS),
+]
+NOTES_ANY, NOTES_NONE = len(NOTES_BANDS), len(NOTES_BANDS) + 1
+
+COMPLETE_BOTH, COMPLETE_EMAIL, COMPLETE_NONE = 0, 1, 2
+
+
+def make_variant(overrides):
+    """Baseline with one variant's overrides applied (tables are merged, not replaced)"""
+    variant = dict(BASELINE)
+    for key, value in overrides.items():
+        if key not in BASELINE:
+            raise ValueError(f"Unknown variant setting '{key}' - expected one of {sorted(BASELINE)}")
+        if key in ('specialty_values', 'notes_points', 'completeness_points', 'scale'):
+            value = {**BASELINE[key], **value}
+        variant[key] = value
+    unknown = set(variant['scale']) - set(COMPONENTS)
+    if unknown:
+        raise ValueError(f"Unknown scale component(s) {sorted(unknown)} - expected {COMPONENTS}")
+    return variant
+
+
+def extract_features(df):
+    """Weight-independent per-row features, computed once for all variants"""
+    notes = df['Notes'].map(str).str.lower()
+    notes_band = np.where(notes.str.len() > 10, NOTES_ANY, NOTES_NONE)
+    for band in reversed(range(len(NOTES_BANDS))):
+        signals = NOTES_BANDS[band][1]
+        pattern = '|'.join(re.escape(signal) for signal in signals)
+        notes_band = np.where(notes.str.contains(pattern, regex=True).to_numpy(), band, notes_band)
+
+    email = df['Email']
+    has_email = (email.notna() & email.map(str).str.contains('@', regex=False)).to_numpy()
+    has_mobile = df['Mobile Phone Number'].notna().to_numpy()
+    completeness = np.where(has_email & has_mobile, COMPLETE_BOTH,
+                            np.where(has_email, COMPLETE_EMAIL, COMPLETE_NONE))
+
+    # Each distinct raw value is canonicalized once, then broadcast as codes
+    specialty_codes, specialties = canonical_codes(df['Specialty'], canonical_specialty)
+    state_codes, states = canonical_codes(df['State/Region'], canonical_state)
+
+    return {
+        'hubspot': filled(df, 'HubSpot Score'),
+        'activities': filled(df, 'Number of Sales Activities'),
+        'specialty_codes': specialty_codes,
+        'specialties': list(specialties),
+        'notes_band': notes_band,
+        'recency': recency_points_vectorized(parse_create_dates(df['Create Date'])),
+        'state_codes': state_codes,
+        'states': list(states),
+        'completeness': completeness,
+    }
+
+
+def _banded(values, thresholds, default):
+    """Points for the first threshold a value reaches (thresholds high to low)"""
+    return np.select([values >= limit for limit, points in thresholds],
+                     [points for limit, points in thresholds], default=default)
+
+
+def score_variant(features, variant):
+    """value_score for every contact under one variant"""
+    scale = variant['scale']
+    specialty_table = np.array([
+        variant['specialty_values'].get(name, variant['default_specialty_points'])
+        for name in features['specialties']
+    ], dtype=float)
+    notes_table = np.array([variant['notes_points'][name] for name, signals in NOTES_BANDS]
+                           + [variant['notes_points']['any'], 0], dtype=float)
+    premium = set(variant['premium_states'])
+    state_table = np.array([variant['premium_points'] if s in premium else 0 for s in features['states']],
+                           dtype=float)
+    completeness_table = np.array([variant['completeness_points']['email_and_mobile'],
+                                   variant['completeness_points']['email'], 0], dtype=float)
+
+    parts = {
+        'hubspot': _banded(features['hubspot'], variant['hubspot_points'], variant['hubspot_default']),
+        'activity': _banded(features['activities'], variant['activity_points'], variant['activity_default']),
+        'specialty': specialty_table[features['specialty_codes']],
+        'notes': notes_table[features['notes_band']],
+        'recency': features['recency'] * (variant['recency_points'] / RECENCY_MAX_POINTS),
+        'location': state_table[features['state_codes']],
+        'completeness': completeness_table[features['completeness']],
+    }
+    score = sum(parts[name] * scale.get(name, 1.0) for name in COMPONENTS)
+    return np.minimum(score, variant['cap'])
+
+
+def score_matrix(features, variants):
+    """(contacts x variants) score matrix"""
+    return np.column_stack([score_variant(features, variant) for variant in variants])
+
+
+def ranking(scores):
+    """Row indices best first; ties keep input order"""
+    return np.argsort(-scores, kind='stable')
+
+
+def tier_codes(order):
+    """Enrichment tier index per row (len(ENRICHMENT_TIERS) = queued) from a ranking"""
+    positions = np.empty(len(order), dtype=np.int64)
+    positions[order] = np.arange(1, len(order) + 1)
+    return np.searchsorted([last for last, tier in ENRICHMENT_TIERS], positions, side='left')
+
+
+def compare_variants(matrix, k=5000):
+    """Per-variant comparison with column 0 (the baseline)"""
+    orders = [ranking(matrix[:, j]) for j in range(matrix.shape[1])]
+    ranks = pd.DataFrame(matrix).rank(method='average', ascending=False).to_numpy()
+    correlations = np.corrcoef(ranks, rowvar=False) if matrix.shape[1] > 1 else np.ones((1, 1))
+    base_top = set(orders[0][:k].tolist())
+    base_tiers = tier_codes(orders[0])
+
+    results = []
+    for j, order in enumerate(orders):
+        tiers = tier_codes(order)
+        results.append({
+            'top_k_overlap': len(base_top & set(order[:k].tolist())) / max(1, min(k, len(order))),
+            'spearman': float(correlations[0, j]),
+            'promoted': int((tiers < base_tiers).sum()),
+            'demoted': int((tiers > base_tiers).sum()),
+            'tier_shifts': pd.crosstab(base_tiers, tiers),
+            'mean_score': float(matrix[:, j].mean()),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score several weight variants in one pass and compare rankings')
+    parser.add_argument('variants', help='JSON list of variant overrides (baseline is always included)')
+    parser.add_argument('--input', default='/Users/jasonsmacbookpro2022/Desktop/MasterD_NYCC.csv')
+    parser.add_argument('--k', type=int, default=5000, help='top-K size for the overlap metric')
+    parser.add_argument('--matrix-output', help='also write Email + one score column per variant')
+    args = parser.parse_args()
+
+    with open(args.variants, 'r', encoding='utf-8') as f:
+        variants = [make_variant({})] + [make_variant(v) for v in json.load(f)]
+
+    print(f"Reading {args.input}...")
+    df = pd.read_csv(args.input)
+    print(f"✓ Loaded {len(df):,} contacts")
+    for line in format_coercion_report(coerce_frame(df), len(df)):
+        print(line)
+
+    features = extract_features(df)
+    matrix = score_matrix(features, variants)
+    results = compare_variants(matrix, args.k)
+
+    tier_names = [tier for last, tier in ENRICHMENT_TIERS] + [QUEUED_TIER]
+    print(f"\n📊 VARIANT COMPARISON ({len(variants) - 1} variants vs baseline, top {args.k:,}):")
+    print(f"{'='*70}")
+    print(f"  {'variant':<24}{'top-K overlap':>14}{'spearman':>10}{'promoted':>10}{'demoted':>10}{'mean':>8}")
+    for variant, result in zip(variants, results):
+        print(f"  {variant['name']:<24}{result['top_k_overlap']:>13.1%}{result['spearman']:>10.3f}"
+              f"{result['promoted']:>10,}{result['demoted']:>10,}{result['mean_score']:>8.1f}")
+
+    for variant, result in zip(variants[1:], results[1:]):
+        shifts = result['tier_shifts']
+        print(f"\nTier shifts, baseline -> {variant['name']}:")
+        for src in shifts.index:
+            moves = [f"{tier_names[dst]}: {shifts.loc[src, dst]:,}" for dst in shifts.columns
+                     if dst != src and shifts.loc[src, dst]]
+            if moves:
+                print(f"  {tier_names[src]} -> " + ', '.join(moves))
+
+    if args.matrix_output:
+        out = pd.DataFrame(matrix, columns=[v['name'] for v in variants])
+        out.insert(0, 'Email', df['Email'])
+        out.to_csv(args.matrix_output, index=False)
+        print(f"\n✅ Score matrix saved to: {args.matrix_output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Long-running contact scoring service for the CRM front end
+
+Contacts created in the app have no value_score / lead_tier until the next
+batch run. This serves the same rules as enrich_contacts_clean.py over HTTP:
+the rule tables are built once at import, each request only runs the scoring
+functions. Stdlib only, keep-alive connections, no per-request logging.
+
+  GET  /health          -> {"status": "ok", "coercion": {column: {"missing", "invalid"}}}
+  POST /score           {contact}                 -> {enrichment fields}
+  POST /score/batch     {"contacts": [contact..]} -> {"results": [...]}
+
+The coercion counts cover the requests since the previous /health call, so a
+long-running service reports per-interval data quality instead of totals
+that grow for the life of the process.
+
+Contacts may use either the HubSpot export column names ('HubSpot Score') or
+the Supabase contacts columns ('hubspot_score').
+"""
+
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from contact_schema import HUBSPOT_COERCER
+from enrich_contacts_clean import build_clean_contact
+
+# Supabase contacts column -> HubSpot export column expected by the rules
+CRM_FIELD_MAP = {
+    'first_name': 'First Name',
+    'last_name': 'Last Name',
+    'email': 'Email',
+    'phone_number': 'Phone Number',
+    'cell': 'Mobile Phone Number',
+    'city': 'City',
+    'state': 'State/Region',
+    'specialty': 'Specialty',
+    'hubspot_score': 'HubSpot Score',
+    'sales_touches': 'Number of Sales Activities',
+    'contact_owner': 'Contact owner',
+    'create_date': 'Create Date',
+    'notes': 'Notes',
+}
+HUBSPOT_FIELDS = list(CRM_FIELD_MAP.values())
+
+ENRICHMENT_FIELDS = [
+    'value_score', 'lead_tier', 'technologies_mentioned', 'tech_count',
+    'innovation_score', 'practice_volume', 'estimated_deal_value',
+    'purchase_timeline', 'territory', 'engagement_level',
+    'recommended_action', 'data_quality_score', 'sale_price'
+]
+
+MAX_BATCH = 10000
+
+
+def to_export_row(contact):
+    """Normalize an API payload to the string-valued row the rules expect"""
+    row = {}
+    for crm_key, hubspot_key in CRM_FIELD_MAP.items():
+        value = contact.get(hubspot_key, contact.get(crm_key))
+        row[hubspot_key] = '' if value is None else str(value)
+    return row
+
+
+def score_contact(contact):
+    """Score one API contact; raises ValueError on unusable input"""
+    if not isinstance(contact, dict):
+        raise ValueError('contact must be a JSON object')
+    enriched = build_clean_contact(to_export_row(contact))
+    return {field: enriched[field] for field in ENRICHMENT_FIELDS}
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, no reconnect per request
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send(200, {'status': 'ok', 'coercion': HUBSPOT_COERCER.take_report()})
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = json.loads(self.rfile.read(length) or b'null')
+        except ValueError:
+            self._send(400, {'error': 'invalid JSON body'})
+            return
+
+        try:
+            if self.path == '/score':
+                self._send(200, score_contact(payload))
+            elif self.path == '/score/batch':
+                contacts = payload.get('contacts') if isinstance(payload, dict) else None
+                if not isinstance(contacts, list):
+                    raise ValueError("body must be {\"contacts\": [...]}")
+                if len(contacts) > MAX_BATCH:
+                    raise ValueError(f"batch limited to {MAX_BATCH:,} contacts")
+                self._send(200, {'results': [score_contact(c) for c in contacts]})
+            else:
+                self._send(404, {'error': 'not found'})
+        except ValueError as e:
+            self._send(400, {'error': str(e)})
+
+
+def make_server(host='127.0.0.1', port=8765):
+    server = ThreadingHTTPServer((host, port), ScoringHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Contact scoring HTTP service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port)
+    print(f"✅ Scoring service listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,113 +8,80 @@ import numpy as np
 from datetime import datetime
 import sys
 
-def calculate_contact_value(contact):
-    """Score each contact 0-100 based on multiple factors"""
-    
-    score = 0
-    
-    # 1. HUBSPOT SCORE (40 points max)
-    try:
-        hubspot = float(contact.get('HubSpot Score', 0))
-        if hubspot >= 170:
-            score += 40  # Platinum
-        elif hubspot >= 150:
-            score += 30  # Gold
-        elif hubspot >= 130:
-            score += 20  # Silver
-        else:
-            score += 10  # Bronze
-    except:
-        score += 0
-    
-    # 2. SALES ACTIVITY (20 points max)
-    try:
-        activities = float(contact.get('Number of Sales Activities', 0))
-        if activities >= 50:
-            score += 20  # Very engaged
-        elif activities >= 20:
-            score += 15  # Engaged
-        elif activities >= 10:
-            score += 10  # Somewhat engaged
-        elif activities >= 5:
-            score += 5   # Touched
-    except:
-        score += 0
-    
-    # 3. SPECIALTY VALUE (20 points max)
-    specialty_values = {
-        'Oral Surgeon': 20,        # Highest ticket
-        'Periodontist': 18,        # Implant heavy
-        'Prosthodontist': 16,      # Full mouth rehabs
-        'Endodontist': 14,         # Tech adopters
-        'Orthodontist': 12,        # High volume
-        'General Dentist': 10,     # Largest market
-        'Pediatric Dentist': 8,    # Lower ticket
-    }
-    specialty = str(contact.get('Specialty', ''))
-    score += specialty_values.get(specialty, 5)
-    
-    # 4. NOTES QUALITY (20 points max)
-    notes = str(contact.get('Notes', '')).lower()
-    
-    # Buying signals
-    if any(signal in notes for signal in [
-        'ready to buy', 'immediate', 'asap', 'this quarter',
-        'wants to purchase', 'decision', 'budget approved', 'edge'
-    ]):
-        score += 20
-        
-    # High interest signals
-    elif any(signal in notes for signal in [
-        'very interested', 'demo', 'evaluation', 'comparing',
-        'requested pricing', 'follow up', 'next steps'
-    ]):
-        score += 15
+from contact_schema import coerce_frame, filled, format_coercion_report
+from contact_value import (  # scoring rules, shared with the stdlib-only rankers
+    BUYING_SIGNALS, DEFAULT_SPECIALTY_POINTS, INTEREST_SIGNALS, PREMIUM_STATES, SPECIALTY_VALUES,
+    TECH_SIGNALS, VOLUME_SIGNALS, calculate_contact_value, numeric_points,
+)
+from create_dates import parse_create_dates, recency_points_vectorized
+from stratified_sample import StratifiedReservoir
+
+# Working columns score_frame() adds; not part of the Top_5000_Contacts.csv layout
+SCORING_COLUMNS = ['create_date_parsed', 'recency_points', 'numeric_points']
+
+def numeric_points_vectorized(hubspot, activities):
+    """numeric_points() over whole float arrays"""
+    hubspot_points = np.select([hubspot >= 170, hubspot >= 150, hubspot >= 130], [40, 30, 20], default=10)
+    activity_points = np.select(
+        [activities >= 50, activities >= 20, activities >= 10, activities >= 5], [20, 15, 10, 5], default=0
+    )
+    return hubspot_points + activity_points
+
+def score_frame(df):
+    """Add recency_points, numeric_points and value_score to a coerced frame
+    with 'create_date_parsed'"""
+    # Recency and HubSpot/activity points in one vectorized step each
+    df['recency_points'] = recency_points_vectorized(df['create_date_parsed'].to_numpy())
+    df['numeric_points'] = numeric_points_vectorized(
+        filled(df, 'HubSpot Score'), filled(df, 'Number of Sales Activities')
+    )
+    df['value_score'] = df.apply(
+        lambda row: calculate_contact_value(row, row['recency_points'], row['numeric_points']), axis=1
+    )
+
+def add_enrichment_priority(top_5000):
+    """Number the selected rows 1..K and cut them into enrichment tiers"""
+    top_5000['enrichment_priority'] = range(1, len(top_5000) + 1)
+    top_5000['enrichment_tier'] = pd.cut(
+        top_5000['enrichment_priority'], 
+        bins=[0, 1000, 2500, 5000],
+        labels=['Tier 1 - Deep', 'Tier 2 - Medium', 'Tier 3 - Light']
+    )
+
+def write_report(report_file, top_5000, total_rows, coercion_report):
+    """Top_5000_Report.txt: coercion summary, enrichment plan and top 20 preview"""
+    with open(report_file, 'w') as f:
+        f.write("TOP 5,000 CONTACTS SUMMARY REPORT\n")
+        f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write("="*50 + "\n\n")
         
-    # Technology mentions (good for your products)
-    elif any(tech in notes for tech in [
-        'yomi', 'robot', 'implant', 'digital', 'cad/cam',
-        'cerec', 'guided', '3d', 'innovation', 'technology'
-    ]):
-        score += 10
+        f.write(f"Total Contacts Analyzed: {total_rows:,}\n")
+        f.write("Column Coercion:\n")
+        for line in format_coercion_report(coercion_report, total_rows):
+            f.write(line + "\n")
+        f.write(f"Top 5,000 Selected Based on Value Score\n\n")
         
-    # Volume indicators
-    elif any(volume in notes for volume in [
-        'high volume', 'busy', '10+', '20+', 'monthly',
-        'cases per', 'full arch', '4-5', '5-10'
-    ]):
-        score += 10
+        f.write("ENRICHMENT RECOMMENDATIONS:\n")
+        f.write(f"- Tier 1 (Top 1,000): Deep enrichment with 5 searches each\n")
+        f.write(f"  Estimated cost: $25 | These are your BEST prospects\n\n")
+        f.write(f"- Tier 2 (Next 1,500): Medium enrichment with 2 searches each\n")
+        f.write(f"  Estimated cost: $15 | Good potential\n\n")
+        f.write(f"- Tier 3 (Next 2,500): Light enrichment with 1 search each\n")
+        f.write(f"  Estimated cost: $12.50 | Worth enriching\n\n")
+        f.write(f"TOTAL ENRICHMENT COST: ~$52.50\n\n")
         
-    # Any notes is better than none
-    elif len(notes) > 10:
-        score += 5
-    
-    # 5. RECENCY BONUS (10 points bonus)
-    try:
-        create_date = str(contact.get('Create Date', ''))
-        if '2024' in create_date or '2023' in create_date:
-            score += 10  # Recent contact
-        elif '2022' in create_date:
-            score += 5   # Somewhat recent
-    except:
-        pass
-    
-    # 6. LOCATION BONUS (10 points bonus)
-    state = str(contact.get('State/Region', '')).upper()[:2]
-    premium_states = ['CA', 'NY', 'TX', 'FL', 'IL', 'NJ', 'PA', 'MA']
-    if state in premium_states:
-        score += 10
-    
-    # 7. CONTACT COMPLETENESS (10 points bonus)
-    has_email = pd.notna(contact.get('Email')) and '@' in str(contact.get('Email', ''))
-    has_mobile = pd.notna(contact.get('Mobile Phone Number'))
-    
-    if has_email and has_mobile:
-        score += 10  # Has both email and mobile
-    elif has_email:
-        score += 5   # At least has email
-    
-    return min(score, 100)  # Cap at 100
+        # Add top 20 contacts preview
+        f.write("TOP 20 CONTACTS BY VALUE SCORE:\n")
+        f.write("-"*100 + "\n")
+        for idx, row in top_5000.head(20).iterrows():
+            f.write(f"{row['enrichment_priority']}. {row['First Name']} {row['Last Name']} ")
+            f.write(f"({row['Specialty']}) - Score: {row['value_score']}\n")
+            f.write(f"   Location: {row['City']}, {row['State/Region']}\n")
+            f.write(f"   HubSpot Score: {row['HubSpot Score']} | Activities: {row['Number of Sales Activities']}\n")
+            if pd.notna(row['Notes']) and len(str(row['Notes'])) > 0:
+                note_preview = str(row['Notes'])[:100]
+                f.write(f"   Notes: {note_preview}...\n")
+            f.write("\n")
 
 def main():
     # Read the CSV
@@ -127,22 +94,25 @@ def main():
         return
     
     # Calculate value scores
+    # Coerce the typed columns once, in bulk, and report what didn't parse
+    coercion_report = coerce_frame(df)
+    print("\nColumn Coercion:")
+    for line in format_coercion_report(coercion_report, len(df)):
+        print(line)
+    
     print("\nCalculating value scores...")
-    df['value_score'] = df.apply(lambda row: calculate_contact_value(row), axis=1)
+    # Parse each distinct 'Create Date' once, then score recency in one vectorized step
+    df['create_date_parsed'] = parse_create_dates(df['Create Date'])
+    score_frame(df)
     
     # Sort by value score
     df_sorted = df.sort_values('value_score', ascending=False)
     
     # Get top 5000
-    top_5000 = df_sorted.head(5000).copy()
+    top_5000 = df_sorted.head(5000).drop(columns=SCORING_COLUMNS)
     
     # Add enrichment priority fields
-    top_5000['enrichment_priority'] = range(1, 5001)
-    top_5000['enrichment_tier'] = pd.cut(
-        top_5000['enrichment_priority'], 
-        bins=[0, 1000, 2500, 5000],
-        labels=['Tier 1 - Deep', 'Tier 2 - Medium', 'Tier 3 - Light']
-    )
+    add_enrichment_priority(top_5000)
     
     # Analysis
     print(f"\n📊 TOP 5,000 CONTACTS ANALYSIS:")
@@ -211,47 +181,24 @@ def main():
     
     # Save summary report
     report_file = '/Users/jasonsmacbookpro2022/Desktop/Top_5000_Report.txt'
-    with open(report_file, 'w') as f:
-        f.write("TOP 5,000 CONTACTS SUMMARY REPORT\n")
-        f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write("="*50 + "\n\n")
-        
-        f.write(f"Total Contacts Analyzed: {len(df):,}\n")
-        f.write(f"Top 5,000 Selected Based on Value Score\n\n")
-        
-        f.write("ENRICHMENT RECOMMENDATIONS:\n")
-        f.write(f"- Tier 1 (Top 1,000): Deep enrichment with 5 searches each\n")
-        f.write(f"  Estimated cost: $25 | These are your BEST prospects\n\n")
-        f.write(f"- Tier 2 (Next 1,500): Medium enrichment with 2 searches each\n")
-        f.write(f"  Estimated cost: $15 | Good potential\n\n")
-        f.write(f"- Tier 3 (Next 2,500): Light enrichment with 1 search each\n")
-        f.write(f"  Estimated cost: $12.50 | Worth enriching\n\n")
-        f.write(f"TOTAL ENRICHMENT COST: ~$52.50\n\n")
-        
-        # Add top 20 contacts preview
-        f.write("TOP 20 CONTACTS BY VALUE SCORE:\n")
-        f.write("-"*100 + "\n")
-        for idx, row in top_5000.head(20).iterrows():
-            f.write(f"{row['enrichment_priority']}. {row['First Name']} {row['Last Name']} ")
-            f.write(f"({row['Specialty']}) - Score: {row['value_score']}\n")
-            f.write(f"   Location: {row['City']}, {row['State/Region']}\n")
-            f.write(f"   HubSpot Score: {row['HubSpot Score']} | Activities: {row['Number of Sales Activities']}\n")
-            if pd.notna(row['Notes']) and len(str(row['Notes'])) > 0:
-                note_preview = str(row['Notes'])[:100]
-                f.write(f"   Notes: {note_preview}...\n")
-            f.write("\n")
+    write_report(report_file, top_5000, len(df), coercion_report)
     
     print(f"✅ Saved summary report to: {report_file}")
     
-    # Create a sample for testing (first 100)
+    # Create a representative sample for testing - stratified across tier,
+    # specialty and territory instead of the first 100 (all Tier 1)
     sample_file = '/Users/jasonsmacbookpro2022/Desktop/Top_100_Sample.csv'
-    top_5000.head(100).to_csv(sample_file, index=False)
-    print(f"✅ Saved top 100 sample to: {sample_file}")
+    reservoir = StratifiedReservoir(100, seed=42)
+    for row in top_5000.to_dict('records'):
+        reservoir.add(row)
+    pd.DataFrame(reservoir.sample(), columns=top_5000.columns).to_csv(sample_file, index=False)
+    print(f"✅ Saved stratified 100-contact sample ({len(reservoir.counts)} strata) to: {sample_file}")
     
     print(f"\n🎯 NEXT STEPS:")
     print(f"1. Review Top_5000_Report.txt for detailed analysis")
-    print(f"2. Use Top_100_Sample.csv to test enrichment")
+    print(f"2. Use Top_100_Sample.csv (stratified by tier, specialty, territory) to test enrichment")
     print(f"3. If results are good, proceed with full Top_5000_Contacts.csv")
+    print(f"4. Run enrichment_scheduler.py to execute the tiered searches within budget")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,574 @@
+#!/usr/bin/env python3
+"""
+Score exports across several machines: one coordinator, many TCP workers
+
+The combined exports from several HubSpot portals no longer fit one box's
+nightly window. Here the coordinator splits the input into shards of
+SHARD_ROWS rows. It streams the shards to scoring workers on other hosts
+and merges what they send back:
+
+- a worker scores each shard with build_clean_contact(). It returns only
+  that shard's best K contacts, tagged with their global row index, plus
+  the shard's quantile sketches and report counters
+- the global top K is always inside the union of the per-shard top Ks.
+  Merging them on (score, row index) therefore selects and orders exactly
+  what enrich_contacts_clean.py does on one machine
+- the SketchSets merge into the full-export distribution. The counters
+  merge into the same coercion and canonical-value reports
+
+Workers take one shard at a time over a persistent connection. Messages are
+length-prefixed, zlib-compressed JSON. When a worker fails mid-shard, the
+shard goes back in the queue for the next free worker; failures include a
+dropped connection, a timeout, a crashed process or an error reply. A
+worker that keeps failing is dropped. A shard that fails MAX_ATTEMPTS times
+stops the run. On connect, each worker proves it runs the same scoring
+rules (a hash of the rule modules and the data files they load). It also checks the optional shared
+token ($SHARD_TOKEN).
+
+  # each scoring host, one worker per core
+  python3 sharded_scoring.py worker --host 0.0.0.0 --port 9400
+  python3 sharded_scoring.py worker --host 0.0.0.0 --port 9401
+  # the box holding the exports
+  python3 sharded_scoring.py coordinate --input portal_a.csv portal_b.csv \\
+      --worker scorer1:9400 --worker scorer1:9401 --worker scorer2:9400
+  # everything on this machine, e.g. for testing
+  python3 sharded_scoring.py coordinate --input MasterD_NYCC.csv --local 4
+"""
+
+import argparse
+import csv
+import hashlib
+import heapq
+import hmac
+import json
+import os
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from collections import Counter, deque, namedtuple
+
+import canonical_values
+import contact_schema
+import enrich_contacts_clean
+from canonical_values import format_match_report
+from contact_schema import HUBSPOT_COERCER, format_coercion_report
+from enrich_contacts_clean import CLEAN_FIELDNAMES, add_counters, build_clean_contact, take_counters
+from quantile_sketch import SketchSet
+
+TOP_K = 5000
+SHARD_ROWS = 50000
+PORT = 9400
+TIMEOUT = 600  # seconds for one shard round trip
+MAX_ATTEMPTS = 3  # per shard, across workers
+MAX_WORKER_FAILURES = 3  # consecutive, before a worker is dropped
+BACKOFF = 1.0
+MAX_MESSAGE = 1 << 30
+
+HEADER = struct.Struct('>I')
+RULE_MODULES = (enrich_contacts_clean, canonical_values, contact_schema)
+RULE_FILES = (canonical_values.STATES_FILE,)
+
+Shard = namedtuple('Shard', 'id source start header rows')
+
+
+class ShardError(Exception):
+    pass
+
+
+def rules_fingerprint():
+    """Hash of the scoring rule modules and data; a worker on other code would score differently"""
+    digest = hashlib.sha256()
+    for path in [module.__file__ for module in RULE_MODULES] + list(RULE_FILES):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def send_message(sock, payload):
+    body = zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'), 1)
+    sock.sendall(HEADER.pack(len(body)) + body)
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError('connection closed')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_message(sock):
+    (length,) = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if length > MAX_MESSAGE:
+        raise ShardError(f'message of {length:,} bytes exceeds the {MAX_MESSAGE:,} byte limit')
+    return json.loads(zlib.decompress(_recv_exact(sock, length)))
+
+
+def push_top(heap, item, k):
+    """Keep the k largest (score, -row index, contact) items; ties keep the earlier row"""
+    if len(heap) < k:
+        heapq.heappush(heap, item)
+    elif item[:2] > heap[0][:2]:
+        heapq.heapreplace(heap, item)
+
+
+def row_dict(header, values):
+    """csv.DictReader's mapping of one record (short rows padded with None, extras under None)"""
+    row = dict(zip(header, values))
+    if len(values) > len(header):
+        row[None] = values[len(header):]
+    for name in header[len(values):]:
+        row[name] = None
+    return row
+
+
+def counters_to_json(counters):
+    return {**counters, 'canonical': {kind: {method: sorted(values) for method, values in methods.items()}
+                                      for kind, methods in counters['canonical'].items()}}
+
+
+def counters_from_json(counters):
+    return {**counters, 'canonical': {kind: {method: set(values) for method, values in methods.items()}
+                                      for kind, methods in counters['canonical'].items()}}
+
+
+def score_shard(request):
+    """Worker side: the best K contacts of one shard, its sketches and its report counters"""
+    take_counters()
+    # Uncached, so every shard reports all of its canonical values even if an
+    # earlier shard's reply was lost
+    canonical_values.canonical_specialty.cache_clear()
+    canonical_values.state_code.cache_clear()
+    header, start, k = request['header'], request['start'], request['k']
+    sketches = SketchSet() if request.get('sketch') else None
+    top = []
+    for offset, values in enumerate(request['rows']):
+        contact = build_clean_contact(row_dict(header, values))
+        push_top(top, (contact['value_score'], -(start + offset), contact), k)
+        if sketches:
+            sketches.add(contact)
+    return {
+        'ok': True,
+        'shard': request['shard'],
+        'rows': len(request['rows']),
+        'top': [[-neg_index, contact] for score, neg_index, contact in top],
+        'sketch': sketches.to_dict() if sketches else None,
+        'counters': counters_to_json(take_counters()),
+    }
+
+
+class WorkerHandler(socketserver.BaseRequestHandler):
+    """One coordinator connection: hello, then score requests until it hangs up"""
+    token = ''
+    rules = None
+
+    def handle(self):
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            hello = recv_message(sock)
+            if hello.get('op') != 'hello' or not hmac.compare_digest(str(hello.get('token') or ''), self.token):
+                send_message(sock, {'ok': False, 'error': 'unknown shard token'})
+                return
+            send_message(sock, {'ok': True, 'rules': self.rules, 'pid': os.getpid()})
+            while True:
+                request = recv_message(sock)
+                try:
+                    reply = score_shard(request)
+                except Exception as e:  # reported to the coordinator, which retries elsewhere
+                    reply = {'ok': False, 'shard': request.get('shard'), 'error': f'{type(e).__name__}: {e}'}
+                send_message(sock, reply)
+        except (OSError, ValueError, ShardError, zlib.error):
+            return  # coordinator hung up or sent garbage; wait for the next one
+
+
+def make_worker(host='127.0.0.1', port=PORT, token=''):
+    """Single-threaded server: scoring is CPU-bound, so run one worker process per core"""
+    handler = type('BoundWorkerHandler', (WorkerHandler,), {'token': token or '', 'rules': rules_fingerprint()})
+    socketserver.TCPServer.allow_reuse_address = True
+    return socketserver.TCPServer((host, port), handler)
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(':')
+    if not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"expected host:port, got '{text}'")
+    return host, int(port)
+
+
+class WorkerConnection:
+    """The coordinator's end of one worker connection"""
+
+    def __init__(self, address, token='', timeout=TIMEOUT, rules=None):
+        self.address = address
+        self.sock = socket.create_connection(address, timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            send_message(self.sock, {'op': 'hello', 'token': token or ''})
+            hello = recv_message(self.sock)
+        except BaseException:
+            self.close()
+            raise
+        if not hello.get('ok'):
+            self.close()
+            raise ShardError(hello.get('error') or 'worker refused the connection')
+        if rules and hello.get('rules') != rules:
+            self.close()
+            raise ShardError('worker runs different scoring rules (update its checkout)')
+
+    def score(self, shard, k, sketch):
+        send_message(self.sock, {'op': 'score', 'shard': shard.id, 'start': shard.start, 'k': k,
+                                 'sketch': sketch, 'header': shard.header, 'rows': shard.rows})
+        reply = recv_message(self.sock)
+        if not reply.get('ok'):
+            raise ShardError(reply.get('error') or 'worker error')
+        if reply.get('shard') != shard.id or reply.get('rows') != len(shard.rows):
+            raise ShardError(f"reply for shard {reply.get('shard')} ({reply.get('rows')} rows) "
+                             f"to shard {shard.id} ({len(shard.rows)} rows)")
+        return reply
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def read_shards(paths, shard_rows=SHARD_ROWS):
+    """Consecutive shards of every input file; row indexes run on across files"""
+    shard_id = start = 0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:  # as read_export_rows() opens it
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                continue
+            rows = []
+            for values in reader:
+                if not values:
+                    continue  # DictReader skips blank lines too
+                rows.append(values)
+                if len(rows) >= shard_rows:
+                    yield Shard(shard_id, path, start, header, rows)
+                    shard_id, start, rows = shard_id + 1, start + len(rows), []
+            if rows:
+                yield Shard(shard_id, path, start, header, rows)
+                shard_id, start = shard_id + 1, start + len(rows)
+
+
+class ShardQueue:
+    """Shards awaiting a worker: retries first, then at most `limit` read ahead from the input"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.fresh = deque()
+        self.retry = deque()
+        self.in_flight = 0
+        self.reading = True
+        self.error = None  # set once the run cannot finish
+        self.cond = threading.Condition()
+
+    def put(self, shard):
+        """Reader side; blocks while the read-ahead is full. False once the run has failed"""
+        with self.cond:
+            while len(self.fresh) >= self.limit and self.error is None:
+                self.cond.wait()
+            if self.error is not None:
+                return False
+            self.fresh.append(shard)
+            self.cond.notify_all()
+            return True
+
+    def close(self):
+        with self.cond:
+            self.reading = False
+            self.cond.notify_all()
+
+    def get(self):
+        """Next shard to score, or None once every shard is merged (or the run has failed)"""
+        with self.cond:
+            while True:
+                if self.error is not None:
+                    return None
+                if self.retry or self.fresh:
+                    shard = (self.retry or self.fresh).popleft()
+                    self.in_flight += 1
+                    self.cond.notify_all()
+                    return shard
+                if not self.reading and not self.in_flight:
+                    return None
+                self.cond.wait()
+
+    def done(self, shard, retry=False):
+        with self.cond:
+            self.in_flight -= 1
+            if retry:
+                self.retry.append(shard)
+            self.cond.notify_all()
+
+    def fail(self, error):
+        with self.cond:
+            if self.error is None:
+                self.error = error
+            self.cond.notify_all()
+
+    def finished(self):
+        with self.cond:
+            return not (self.reading or self.fresh or self.retry or self.in_flight)
+
+
+class Coordinator:
+    """Dispatch shards to workers, retry failures and merge top-K, sketches and counters"""
+
+    def __init__(self, workers, k=TOP_K, sketch=False, token='', timeout=TIMEOUT,
+                 max_attempts=MAX_ATTEMPTS, read_ahead=None):
+        self.workers = workers
+        self.k = k
+        self.token = token
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.queue = ShardQueue(read_ahead or 2 * len(workers))
+        self.rules = rules_fingerprint()
+        self.lock = threading.Lock()
+        self.top = []
+        self.sketches = SketchSet() if sketch else None
+        self.rows = 0
+        self.merged = set()
+        self.attempts = Counter()
+        self.retried = 0
+        self.scored_by = Counter()
+        self.dropped = []
+
+    def _merge(self, address, shard, reply):
+        with self.lock:
+            if shard.id in self.merged:
+                return
+            self.merged.add(shard.id)
+            self.rows += reply['rows']
+            for index, contact in reply['top']:
+                push_top(self.top, (contact['value_score'], -index, contact), self.k)
+            if self.sketches is not None:
+                self.sketches.merge(SketchSet.from_dict(reply['sketch']))
+            add_counters(counters_from_json(reply['counters']))
+            self.scored_by[address] += 1
+
+    def _failed(self, address, shard, error):
+        with self.lock:
+            self.attempts[shard.id] += 1
+            attempts = self.attempts[shard.id]
+            self.retried += 1
+        print(f"⚠️  Shard {shard.id} ({shard.source}, rows {shard.start:,}+) failed on "
+              f"{address[0]}:{address[1]} (attempt {attempts}): {error}")
+        if attempts >= self.max_attempts:
+            self.queue.fail(ShardError(f"shard {shard.id} failed {attempts} times, last: {error}"))
+        self.queue.done(shard, retry=attempts < self.max_attempts)
+
+    def _serve(self, address):
+        """One thread per worker: connect, then score shards until the queue runs dry"""
+        conn = None
+        failures = 0
+        while True:
+            if conn is None:
+                try:
+                    conn = WorkerConnection(address, self.token, self.timeout, self.rules)
+                except (OSError, ValueError, ShardError, zlib.error) as e:
+                    failures += 1
+                    if failures >= MAX_WORKER_FAILURES or isinstance(e, ShardError):
+                        self._drop(address, e)
+                        return
+                    time.sleep(BACKOFF * 2 ** failures)
+                    continue
+            shard = self.queue.get()
+            if shard is None:
+                conn.close()
+                return
+            try:
+                reply = conn.score(shard, self.k, self.sketches is not None)
+            except ShardError as e:  # the worker answered; the connection is still good
+                failures += 1
+                self._failed(address, shard, e)
+            except (OSError, ValueError, zlib.error) as e:
+                conn.close()
+                conn = None
+                failures += 1
+                self._failed(address, shard, e)
+            else:
+                failures = 0
+                self._merge(address, shard, reply)
+                self.queue.done(shard)
+                continue
+            if failures >= MAX_WORKER_FAILURES:
+                if conn:
+                    conn.close()
+                self._drop(address, f'{failures} failures in a row')
+                return
+
+    def _drop(self, address, reason):
+        print(f"⚠️  Dropping worker {address[0]}:{address[1]}: {reason}")
+        with self.lock:
+            self.dropped.append(address)
+
+    def run(self, shards):
+        """Score every shard; returns the top K contacts, best first"""
+        def read():
+            try:
+                for shard in shards:
+                    if not self.queue.put(shard):
+                        return
+            except BaseException as e:  # re-raised below
+                self.queue.fail(e)
+            finally:
+                self.queue.close()
+
+        reader = threading.Thread(target=read, name='shard-reader', daemon=True)
+        reader.start()
+        threads = [threading.Thread(target=self._serve, args=(address,), name=f'worker-{address[0]}:{address[1]}',
+                                    daemon=True) for address in self.workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.queue.error is None and not self.queue.finished():
+            self.queue.fail(ShardError('every worker was dropped with shards still unscored'))
+        reader.join()
+        if self.queue.error is not None:
+            raise self.queue.error
+        return [contact for score, neg_index, contact in sorted(self.top, key=lambda x: (-x[0], -x[1]))]
+
+
+def start_local_workers(count, token=''):
+    """Spawn worker processes on free localhost ports; returns (processes, addresses)"""
+    processes, addresses = [], []
+    env = dict(os.environ, SHARD_TOKEN=token or '')
+    for _ in range(count):
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'worker', '--port', '0'],
+                                   stdout=subprocess.PIPE, text=True, env=env)
+        line = process.stdout.readline()  # "✅ Scoring worker listening on host:port"
+        if not line:
+            raise ShardError('local worker exited before listening')
+        processes.append(process)
+        addresses.append(parse_address(line.split()[-1]))
+    return processes, addresses
+
+
+def stop_local_workers(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.wait()
+        process.stdout.close()
+
+
+def run_worker(args):
+    server = make_worker(args.host, args.port, args.token)
+    host, port = server.server_address[:2]
+    print(f"✅ Scoring worker listening on {host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def run_coordinator(args):
+    workers = list(args.worker or [])
+    processes = []
+    if args.local:
+        processes, local = start_local_workers(args.local, args.token)
+        workers += local
+    if not workers:
+        raise SystemExit('No workers: pass --worker host:port (repeatable) or --local N')
+
+    coordinator = Coordinator(workers, k=args.k, sketch=bool(args.distribution or args.sketch_output),
+                              token=args.token, timeout=args.timeout, max_attempts=args.max_attempts)
+    print(f"Scoring {len(args.input)} export(s) in shards of {args.shard_rows:,} rows on {len(workers)} worker(s)...")
+    started = time.time()
+    try:
+        top = coordinator.run(read_shards(args.input, args.shard_rows))
+    except ShardError as e:
+        raise SystemExit(f"⚠️  Sharded scoring failed: {e}")
+    finally:
+        stop_local_workers(processes)
+    elapsed = time.time() - started
+
+    print(f"Enriched {coordinator.rows:,} contacts in {len(coordinator.merged):,} shards ({elapsed:.1f}s)")
+    for address in workers:
+        print(f"   - {address[0]}:{address[1]}: {coordinator.scored_by[address]:,} shards")
+    if coordinator.retried:
+        print(f"   - {coordinator.retried:,} shard attempt(s) retried")
+    for line in format_coercion_report(HUBSPOT_COERCER.report(), coordinator.rows):
+        print(line)
+    for kind, column in (('specialty', 'Specialty'), ('state', 'State/Region')):
+        lines = format_match_report(kind)
+        if lines:
+            print(f"Canonical {column} values:")
+            for line in lines:
+                print(line)
+    if coordinator.sketches:
+        print("\n📊 Full-Export Distribution:")
+        for line in coordinator.sketches.report():
+            print(line)
+        if args.sketch_output:
+            coordinator.sketches.save(args.sketch_output)
+            print(f"   - Sketches saved to: {args.sketch_output}")
+
+    if top:
+        tmp = args.output + '.tmp'
+        with open(tmp, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=CLEAN_FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(top)
+        os.replace(tmp, args.output)
+        print(f"\n✅ Created clean enriched CSV: {args.output}")
+        print(f"   - {len(top):,} contacts")
+
+        tiers = Counter(contact['lead_tier'] for contact in top)
+        print(f"\n📊 Lead Distribution:")
+        for tier in ['Platinum', 'Gold', 'Silver', 'Bronze']:
+            if tier in tiers:
+                print(f"   {tier}: {tiers[tier]:,} contacts")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score exports on several machines and merge the top contacts')
+    shared = argparse.ArgumentParser(add_help=False)
+    shared.add_argument('--token', default=os.environ.get('SHARD_TOKEN', ''),
+                        help='shared secret workers require (default: $SHARD_TOKEN)')
+    modes = parser.add_subparsers(dest='mode', required=True)
+
+    worker = modes.add_parser('worker', parents=[shared], help='serve shard scoring requests')
+    worker.add_argument('--host', default='127.0.0.1', help='0.0.0.0 to accept coordinators on other hosts')
+    worker.add_argument('--port', type=int, default=PORT, help='0 picks a free port')
+
+    coordinate = modes.add_parser('coordinate', parents=[shared], help='split the exports into shards and merge the results')
+    coordinate.add_argument('--input', nargs='+', default=['/Users/jasonsmacbookpro2022/Desktop/MasterD_NYCC.csv'],
+                            help='one or more exports, scored as one combined list')
+    coordinate.add_argument('--output', default='/Users/jasonsmacbookpro2022/Desktop/contacts_enriched_clean.csv')
+    coordinate.add_argument('--worker', action='append', type=parse_address, help='host:port of a worker (repeatable)')
+    coordinate.add_argument('--local', type=int, help='also start this many workers on this machine')
+    coordinate.add_argument('--k', type=int, default=TOP_K, help='contacts to keep')
+    coordinate.add_argument('--shard-rows', type=int, default=SHARD_ROWS)
+    coordinate.add_argument('--timeout', type=float, default=TIMEOUT, help='seconds before a shard is retried elsewhere')
+    coordinate.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS, help='tries per shard before giving up')
+    coordinate.add_argument('--distribution', action='store_true',
+                            help='sketch score / deal value / innovation percentiles over every contact')
+    coordinate.add_argument('--sketch-output', help='save those sketches (quantile_sketch.py can merge them)')
+    args = parser.parse_args()
+
+    if args.mode == 'worker':
+        run_worker(args)
+    else:
+        run_coordinator(args)
+
+
+if __name__ == "__main__":
+    main()
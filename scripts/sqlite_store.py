@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Indexed SQLite store for enriched contacts
+
+Every question about contacts_enriched_clean.csv ("Platinum periodontists in
+the Southeast", "what does Greg own") meant parsing the whole CSV again.
+ContactStore bulk-loads the enriched contacts - every row, not just the top
+5,000 - into a local SQLite file, so those become index lookups:
+
+- WAL journal with synchronous=NORMAL: readers keep working during a load and
+  commits don't fsync every page; a bulk load drops to synchronous=OFF (a
+  crash mid-load just means loading the file again)
+- rows go in through executemany() in BATCH_SIZE batches inside large
+  transactions (committed every COMMIT_EVERY rows)
+- load_csv() passes each csv.reader row to SQLite as a plain tuple, in the
+  file's own column order; the text -> number conversion ('' -> NULL,
+  'True' -> 1) happens in the INSERT statement, not in Python per cell
+- the secondary indexes (value_score, lead_tier, territory, specialty,
+  contact_owner) are dropped before a load and rebuilt once at the end,
+  which is much cheaper than maintaining them row by row
+- contacts are keyed by lowercased email (name + phone + city without one),
+  and a re-run upserts in place (a repeated email keeps its last row);
+  selected_rank is the contact's position in the latest top 5,000 (only a
+  run that writes a new selection clears the old one, so `load` keeps it)
+
+  python3 enrich_contacts_clean.py --sqlite contacts.db
+  python3 sqlite_store.py load contacts.db contacts_enriched_clean.csv
+  python3 sqlite_store.py query contacts.db --territory Southeast --tier Platinum
+  python3 sqlite_store.py stats contacts.db
+"""
+
+import argparse
+import csv
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+from operator import itemgetter
+
+from enrich_contacts_clean import CLEAN_FIELDNAMES, PRACTICE_FIELDNAMES
+
+BATCH_SIZE = 10000
+COMMIT_EVERY = 500000
+CACHE_KB = 262144  # 256 MB page cache while loading
+
+STORE_COLUMNS = CLEAN_FIELDNAMES + PRACTICE_FIELDNAMES
+INTEGER_COLUMNS = {'value_score', 'tech_count', 'innovation_score', 'data_quality_score',
+                   'is_for_sale', 'is_public'}
+REAL_COLUMNS = {'sale_price', 'estimated_deal_value'}
+
+# name -> indexed column(s); rebuilt after every load
+INDEXES = {
+    'idx_contacts_value_score': 'value_score DESC',
+    'idx_contacts_lead_tier': 'lead_tier, value_score DESC',
+    'idx_contacts_territory': 'territory, value_score DESC',
+    'idx_contacts_specialty': 'specialty, value_score DESC',
+    'idx_contacts_contact_owner': 'contact_owner, value_score DESC',
+}
+# query() filters -> column
+FILTERS = {'tier': 'lead_tier', 'territory': 'territory', 'specialty': 'specialty', 'owner': 'contact_owner'}
+
+
+def _column_type(column):
+    if column in INTEGER_COLUMNS:
+        return 'INTEGER'
+    if column in REAL_COLUMNS:
+        return 'REAL'
+    return 'TEXT'
+
+
+CREATE_TABLE = (
+    'CREATE TABLE IF NOT EXISTS contacts (contact_key TEXT PRIMARY KEY, '
+    + ', '.join(f'{column} {_column_type(column)}' for column in STORE_COLUMNS)
+    + ', selected_rank INTEGER, loaded_at TEXT)'
+)
+
+
+def _upsert(values):
+    """INSERT ... ON CONFLICT for (contact_key, *STORE_COLUMNS, loaded_at) = values"""
+    return (
+        f"INSERT INTO contacts (contact_key, {', '.join(STORE_COLUMNS)}, loaded_at) "
+        f"VALUES ({', '.join(values)}) "
+        f"ON CONFLICT(contact_key) DO UPDATE SET "
+        + ', '.join(f'{column} = excluded.{column}' for column in STORE_COLUMNS + ['loaded_at'])
+    )
+
+
+UPSERT = _upsert(['?'] * (len(STORE_COLUMNS) + 2))
+
+# The same conversions as _typed(), done by SQLite for CSV text (?N is the cell)
+_TYPED_SQL = "CASE ?{0} WHEN 'True' THEN 1 WHEN 'False' THEN 0 WHEN '' THEN NULL ELSE ?{0} END"
+
+
+def _csv_upsert(header):
+    """UPSERT for CSV rows with this header, and a getter for the cells it binds
+
+    ValueError if the header has none of the store's columns (e.g. a raw export).
+    """
+    positions = {column: i for i, column in enumerate(header)}
+    present = [column for column in STORE_COLUMNS if column in positions]
+    if not present:
+        raise ValueError(f"CSV header has none of the enriched contact columns "
+                         f"({', '.join(STORE_COLUMNS[:4])}, ...) - load contacts_enriched_clean.csv "
+                         f"or a partition file")
+    placeholders = {column: f'?{n}' for n, column in enumerate(present, 2)}
+    values = ['?1']
+    for column in STORE_COLUMNS:
+        if column not in placeholders:
+            values.append('NULL')  # same as a dict row without the field
+        elif column in INTEGER_COLUMNS or column in REAL_COLUMNS:
+            values.append(_TYPED_SQL.format(placeholders[column][1:]))
+        else:
+            values.append(placeholders[column])
+    values.append(f'?{len(present) + 2}')
+    if present == header:
+        return _upsert(values), None  # rows are already in bind order
+    if len(present) == 1:
+        index = positions[present[0]]
+        return _upsert(values), lambda row: (row[index],)  # itemgetter(i) isn't a tuple
+    return _upsert(values), itemgetter(*(positions[column] for column in present))
+
+
+def contact_key(contact):
+    """Upsert key: lowercased email, else name + phone + city"""
+    email = (contact.get('email') or '').strip().lower()
+    if email:
+        return email
+    parts = [contact.get(field) or '' for field in ('first_name', 'last_name', 'phone_number', 'cell', 'city')]
+    return 'noemail:' + '|'.join(str(part).strip().lower() for part in parts)
+
+
+def _typed(value, integer=False):
+    """Numeric column value: CSV text back to a number ('' -> NULL, 'True' -> 1)"""
+    if value is None or value == '':
+        return None
+    if not isinstance(value, str):
+        return value
+    if value in ('True', 'False'):
+        return int(value == 'True')
+    try:
+        number = float(value)
+    except ValueError:
+        return value  # SQLite keeps the text; it sorts after every number
+    return int(number) if integer and number.is_integer() else number
+
+
+# Column positions that need _typed() when loading CSV text
+_NUMERIC_POSITIONS = [(i, column in INTEGER_COLUMNS) for i, column in enumerate(STORE_COLUMNS)
+                      if column in INTEGER_COLUMNS or column in REAL_COLUMNS]
+_SCORE_POSITION = STORE_COLUMNS.index('value_score')
+
+
+class ContactStore:
+    """Bulk upserts of enriched contacts into an indexed SQLite table"""
+
+    def __init__(self, path, batch_size=BATCH_SIZE, commit_every=COMMIT_EVERY):
+        self.path = path
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.conn = sqlite3.connect(path, isolation_level=None)  # transactions are explicit
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA temp_store=MEMORY')
+        self.conn.execute(CREATE_TABLE)
+        self.run_id = datetime.now().isoformat(timespec='seconds')
+        self.loaded = 0
+        self._uncommitted = 0
+        self._pending = []
+        self._loading = False
+
+    def begin_load(self):
+        """Drop the secondary indexes and open the first load transaction"""
+        self.conn.execute(f'PRAGMA cache_size=-{CACHE_KB}')
+        self.conn.execute('PRAGMA synchronous=OFF')
+        for name in INDEXES:
+            self.conn.execute(f'DROP INDEX IF EXISTS {name}')
+        self.conn.execute('BEGIN')
+        self._loading = True
+
+    def add(self, contact):
+        """Queue one enriched contact (build_clean_contact() output or a CSV row)"""
+        values = [*map(contact.get, STORE_COLUMNS)]
+        if isinstance(values[_SCORE_POSITION], str):  # a CSV row, not build_clean_contact() output
+            for i, integer in _NUMERIC_POSITIONS:
+                values[i] = _typed(values[i], integer)
+        self._pending.append((contact_key(contact), *values, self.run_id))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    def load_csv(self, path):
+        """Upsert every row of an enriched CSV; returns the rows read"""
+        self._flush()
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return 0
+            statement, pick = _csv_upsert(header)
+            email_at = header.index('email') if 'email' in header else None
+            run_id = self.run_id
+
+            def params():
+                for row in reader:
+                    email = row[email_at].strip().lower() if email_at is not None else ''
+                    key = email or contact_key(dict(zip(header, row)))
+                    yield (key, *(pick(row) if pick else row), run_id)
+
+            rows = params()
+            read = 0
+            while True:
+                batch = self.conn.executemany(statement, islice(rows, self.batch_size)).rowcount
+                if not batch:
+                    return read
+                read += batch
+                self._count(batch)
+
+    def _flush(self):
+        if not self._pending:
+            return
+        self.conn.executemany(UPSERT, self._pending)
+        self._count(len(self._pending))
+        self._pending = []
+
+    def _count(self, rows):
+        self.loaded += rows
+        self._uncommitted += rows
+        if self._uncommitted >= self.commit_every:
+            self.conn.execute('COMMIT')
+            self.conn.execute('BEGIN')
+            self._uncommitted = 0
+
+    def mark_selected(self, contacts):
+        """Replace the top-K order; contacts are the selected rows, best first"""
+        self._flush()
+        self.conn.execute('UPDATE contacts SET selected_rank = NULL WHERE selected_rank IS NOT NULL')
+        # A repeated email keeps its best rank
+        self.conn.executemany('UPDATE contacts SET selected_rank = ? WHERE contact_key = ? AND selected_rank IS NULL',
+                              ((rank, contact_key(contact)) for rank, contact in enumerate(contacts, 1)))
+
+    def finish_load(self, prune=False):
+        """Commit, optionally drop contacts this run didn't see, then rebuild the indexes"""
+        self._flush()
+        pruned = 0
+        if prune:
+            pruned = self.conn.execute('DELETE FROM contacts WHERE loaded_at IS NOT ?', (self.run_id,)).rowcount
+        self.conn.execute('COMMIT')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._loading = False
+        self.build_indexes()
+        return pruned
+
+    def build_indexes(self):
+        self.conn.execute('BEGIN')
+        for name, columns in INDEXES.items():
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON contacts ({columns})')
+        self.conn.execute('COMMIT')
+        self.conn.execute('PRAGMA optimize')
+
+    def query(self, limit=20, min_score=None, selected_only=False, **filters):
+        """Contacts matching the filters (tier/territory/specialty/owner), best first"""
+        clauses, params = [], []
+        for name, value in filters.items():
+            if value is not None:
+                clauses.append(f'{FILTERS[name]} = ?')
+                params.append(value)
+        if min_score is not None:
+            clauses.append('value_score >= ?')
+            params.append(min_score)
+        if selected_only:
+            clauses.append('selected_rank IS NOT NULL')
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        cursor = self.conn.execute(
+            f'SELECT * FROM contacts {where} ORDER BY value_score DESC LIMIT ?', params + [limit])
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def counts(self, column):
+        """(value, contacts) per value of an indexed column, largest first"""
+        return self.conn.execute(
+            f'SELECT {column}, COUNT(*) FROM contacts GROUP BY {column} ORDER BY COUNT(*) DESC').fetchall()
+
+    def close(self):
+        if self._loading:
+            self.finish_load()
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load and query enriched contacts in an indexed SQLite file')
+    sub = parser.add_subparsers(dest='command', required=True)
+    load = sub.add_parser('load', help='upsert an enriched CSV (contacts_enriched_clean.csv or a partition file)')
+    load.add_argument('database')
+    load.add_argument('input')
+    load.add_argument('--prune', action='store_true', help='delete contacts that are not in this file')
+    query = sub.add_parser('query', help='best contacts matching the filters')
+    query.add_argument('database')
+    for name in FILTERS:
+        query.add_argument(f'--{name}')
+    query.add_argument('--min-score', type=int)
+    query.add_argument('--selected', action='store_true', help='only the current top 5,000')
+    query.add_argument('--limit', type=int, default=20)
+    stats = sub.add_parser('stats', help='contacts per tier, territory and owner')
+    stats.add_argument('database')
+    args = parser.parse_args()
+
+    store = ContactStore(args.database)
+    if args.command == 'load':
+        started = time.perf_counter()
+        store.begin_load()
+        try:
+            store.load_csv(args.input)
+        except ValueError as e:
+            store.finish_load()  # puts the indexes back
+            print(f"⚠️  {args.input}: {e}")
+            sys.exit(1)
+        pruned = store.finish_load(prune=args.prune)
+        elapsed = time.perf_counter() - started
+        print(f"✅ Upserted {store.loaded:,} contacts into {args.database} in {elapsed:.2f}s "
+              f"({store.loaded / max(elapsed, 1e-9):,.0f} rows/s)")
+        if args.prune:
+            print(f"   - Pruned {pruned:,} contacts missing from {args.input}")
+    elif args.command == 'query':
+        started = time.perf_counter()
+        rows = store.query(limit=args.limit, min_score=args.min_score, selected_only=args.selected,
+                           **{name: getattr(args, name) for name in FILTERS})
+        elapsed = (time.perf_counter() - started) * 1000
+        for row in rows:
+            print(f"  {row['value_score']:>3}  {row['first_name']} {row['last_name']} - {row['specialty']}, "
+                  f"{row['city']} {row['state']} ({row['lead_tier']}, {row['contact_owner'] or 'unowned'})")
+        print(f"  {len(rows)} contact(s) in {elapsed:.2f} ms")
+    else:
+        for column in ('lead_tier', 'territory', 'contact_owner'):
+            print(f"\n{column}:")
+            for value, count in store.counts(column):
+                print(f"  {value or '(blank)'}: {count:,}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
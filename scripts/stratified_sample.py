@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Streaming stratified reservoir sampling for quick, representative test extracts
+
+Top_100_Sample.csv used to be the first 100 rows of the sorted output - all
+Tier 1 and mostly Oral Surgeons. This draws a fixed-size sample in one pass
+with each stratum (enrichment_tier x Specialty x territory by default)
+represented in proportion to its size, without holding the dataset in memory.
+
+How it works: every row gets a seeded random key. A bounded heap keeps the
+rows with the smallest keys (OVERSAMPLE x the sample size), each stratum also
+keeps its own PER_STRATUM smallest-key rows, and every stratum's row count is
+tallied. At the end each stratum's share is fixed by cumulative proportional
+rounding and filled with its smallest-key rows, which is a uniform sample
+within the stratum. If a stratum is still short (rare) the slack goes to the
+strata with the most spare rows.
+
+  python3 stratified_sample.py Top_5000_Contacts.csv Top_100_Sample.csv --size 100
+  python3 stratified_sample.py MasterD_NYCC.csv sample_1pct.csv --fraction 0.01 --seed 7
+"""
+
+import argparse
+import csv
+import heapq
+import random
+
+from enrich_contacts_clean import determine_territory
+from raw_export_scanner import RawExportScanner
+
+DEFAULT_STRATA = ['enrichment_tier', 'Specialty', 'territory']
+OVERSAMPLE = 2
+PER_STRATUM = 2
+
+
+def stratum_value(row, column):
+    """Column value, deriving territory from State/Region when it isn't a column"""
+    value = row.get(column)
+    if value is None and column == 'territory':
+        value = determine_territory(str(row.get('State/Region') or ''))
+    return '' if value is None or value != value else str(value).strip()
+
+
+class StratifiedReservoir:
+    """One-pass fixed-size stratified sample with bounded memory"""
+
+    def __init__(self, size, strata=DEFAULT_STRATA, seed=42):
+        self.size = size
+        self.strata = list(strata)
+        self.capacity = max(size * OVERSAMPLE, size + 1)
+        self.random = random.Random(seed)
+        self.counts = {}
+        self.seen = 0
+        self._heap = []  # max-heap on key via (-key, seq, stratum, row)
+        self._stratum_heaps = {}  # stratum -> same, PER_STRATUM rows each
+
+    def key_for(self, row):
+        return tuple(stratum_value(row, column) for column in self.strata)
+
+    def add(self, row):
+        stratum = self.key_for(row)
+        self.counts[stratum] = self.counts.get(stratum, 0) + 1
+        key = self.random.random()
+        item = (-key, self.seen, stratum, row)
+        self.seen += 1
+        for heap, capacity in ((self._heap, self.capacity),
+                               (self._stratum_heaps.setdefault(stratum, []), PER_STRATUM)):
+            if len(heap) < capacity:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:  # smaller key than the current worst
+                heapq.heapreplace(heap, item)
+
+    def allocation(self):
+        """Proportional share of the sample per stratum
+
+        Cumulative rounding over the sorted strata keeps each leading column's
+        marginal (e.g. tier totals) within one row of exact, even when there
+        are more strata than sample slots.
+        """
+        total = self.seen
+        size = min(self.size, total)
+        shares = {}
+        cumulative = 0
+        allocated = 0
+        for stratum in sorted(self.counts):
+            cumulative += self.counts[stratum]
+            target = int(size * cumulative / total + 0.5) if total else 0
+            shares[stratum] = target - allocated
+            allocated = target
+        return shares
+
+    def sample(self):
+        """Sampled rows in input order"""
+        candidates = {item[1]: item for item in self._heap}
+        for heap in self._stratum_heaps.values():
+            candidates.update((item[1], item) for item in heap)
+
+        by_stratum = {}
+        for neg_key, seq, stratum, row in sorted(candidates.values(), reverse=True):
+            by_stratum.setdefault(stratum, []).append((seq, row))  # smallest key first
+
+        picked = []
+        slack = 0
+        for stratum, share in self.allocation().items():
+            available = by_stratum.get(stratum, [])
+            picked.extend(available[:share])
+            by_stratum[stratum] = available[share:]
+            slack += max(0, share - len(available))
+
+        # Redistribute any shortfall to the strata with the most spare rows
+        while slack:
+            spare = max(by_stratum.values(), key=len, default=[])
+            if not spare:
+                break
+            picked.append(spare.pop(0))
+            slack -= 1
+
+        picked.sort(key=lambda x: x[0])
+        return [row for seq, row in picked]
+
+
+def count_records(path):
+    """CSV record count (header excluded) for turning --fraction into a size
+
+    Walks record boundaries with the raw export scanner, so newlines inside
+    quoted notes don't count as extra rows.
+    """
+    with RawExportScanner(path) as scanner:
+        return sum(1 for _ in scanner)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stratified reservoir sample of a contacts CSV')
+    parser.add_argument('input')
+    parser.add_argument('output')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--size', type=int, help='number of rows to sample')
+    group.add_argument('--fraction', type=float, help='sample this fraction of the rows (e.g. 0.01)')
+    parser.add_argument('--strata', default=','.join(DEFAULT_STRATA),
+                        help='comma-separated columns to stratify by')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    size = args.size if args.size is not None else max(1, round(count_records(args.input) * args.fraction))
+    reservoir = StratifiedReservoir(size, args.strata.split(','), seed=args.seed)
+
+    print(f"Sampling {size:,} rows from {args.input}...")
+    with open(args.input, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        for row in reader:
+            reservoir.add(row)
+
+    rows = reservoir.sample()
+    with open(args.output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"✅ Saved {len(rows):,} of {reservoir.seen:,} rows "
+          f"across {len(reservoir.counts):,} strata to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+contact_schema.coerce_frame on dirty text columns, including pandas' str dtype
+
+  python3 -m pytest scripts/tests/test_contact_schema.py
+"""
+
+import io
+import math
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contact_schema import coerce_frame, filled  # noqa: E402
+
+try:
+    import pandas as pd
+except ImportError:  # the stdlib scripts don't need it
+    pd = None
+
+EXPORT = ('First Name,HubSpot Score,Number of Sales Activities\n'
+          'Maria,186,52\n'
+          'Greg,abc,\n'
+          'Li," 1,200 ",n/a\n'
+          'Pedro,,7\n')
+
+
+@unittest.skipIf(pd is None, 'pandas is not installed')
+class CoerceFrameTest(unittest.TestCase):
+
+    def check(self, df):
+        report = coerce_frame(df)
+        self.assertEqual(report['HubSpot Score'], {'missing': 1, 'invalid': 1})
+        self.assertEqual(report['Number of Sales Activities'], {'missing': 1, 'invalid': 1})
+        scores = df['HubSpot Score'].tolist()
+        self.assertEqual(scores[0], 186.0)
+        self.assertTrue(math.isnan(scores[1]))  # 'abc' is invalid, not a crash
+        self.assertEqual(scores[2], 1200.0)
+        self.assertEqual(filled(df, 'HubSpot Score').tolist(), [186.0, 0.0, 1200.0, 0.0])
+
+    def test_non_numeric_cell_in_default_text_dtype(self):
+        # pandas 3 reads text as its str dtype, not object
+        self.check(pd.read_csv(io.StringIO(EXPORT), keep_default_na=False))
+
+    def test_non_numeric_cell_in_object_dtype(self):
+        self.check(pd.read_csv(io.StringIO(EXPORT), dtype=object, keep_default_na=False))
+
+    def test_numeric_column_is_only_cast(self):
+        df = pd.DataFrame({'HubSpot Score': [150, None, 170]})
+        self.assertEqual(coerce_frame(df), {'HubSpot Score': {'missing': 1, 'invalid': 0}})
+        self.assertEqual(df['HubSpot Score'].dtype, float)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+hubspot_ingest.HubSpotIngest against mock_hubspot.py: id order across
+partitions and pages, 429 backoff, and the incremental watermark
+
+  python3 -m pytest scripts/tests/test_hubspot_ingest.py
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hubspot_ingest  # noqa: E402
+import mock_hubspot  # noqa: E402
+from hubspot_ingest import HubSpotClient, HubSpotIngest, load_state, sync_rows  # noqa: E402
+from mock_hubspot import MockHubSpot, make_server  # noqa: E402
+
+OWNERS = ['Alice Smith', 'Bob Jones', '']
+
+
+def export_rows(count, seed=7):
+    """Export rows with gappy, shuffled Record IDs (the API returns them sorted)"""
+    rng = random.Random(seed)
+    ids = rng.sample(range(1, count * 3), count)
+    return [{
+        'Record ID': str(record_id),
+        'First Name': f'First{record_id}',
+        'Last Name': f'Last{record_id}',
+        'Email': f'c{record_id}@example.com',
+        'State/Region': 'NY',
+        'Specialty': 'Periodontist',
+        'HubSpot Score': str(100 + record_id % 90),
+        'Contact owner': OWNERS[record_id % len(OWNERS)],
+        'Create Date': f'2023-{1 + record_id % 12:02d}-15 09:30',
+    } for record_id in ids]
+
+
+class MockApiTestCase(unittest.TestCase):
+    rows = 600
+    rate = None  # mock requests per second before 429
+
+    def setUp(self):
+        self.export = export_rows(self.rows)
+        self.hubspot = MockHubSpot(self.export, rate=self.rate)
+        self.server = make_server(self.hubspot, port=0)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def ingest(self, rate=1000.0, **kwargs):
+        return HubSpotIngest(HubSpotClient(self.url, rate=rate), **kwargs)
+
+    def expected_ids(self):
+        return sorted((row['Record ID'] for row in self.export), key=int)
+
+
+class PaginationTest(MockApiTestCase):
+
+    def test_rows_arrive_in_id_order_across_partitions_and_pages(self):
+        ingest = self.ingest(workers=3, page_size=40, partition_size=150)
+        rows = list(ingest.rows())
+        self.assertEqual([row['Record ID'] for row in rows], self.expected_ids())
+        self.assertGreater(ingest.stats['partitions'], 1)
+        self.assertGreater(ingest.stats['pages'], ingest.stats['partitions'])
+        self.assertEqual(ingest.stats['contacts'], self.rows)
+
+    def test_rows_carry_export_columns_and_owner_names(self):
+        by_id = {row['Record ID']: row for row in self.export}
+        for row in self.ingest(workers=2, page_size=100).rows():
+            source = by_id[row['Record ID']]
+            self.assertEqual(list(row), hubspot_ingest.EXPORT_COLUMNS)
+            self.assertEqual(row['Email'], source['Email'])
+            self.assertEqual(row['Contact owner'], source['Contact owner'])
+            self.assertEqual(row['Create Date'], source['Create Date'])
+
+    def test_partition_past_the_search_window_continues_from_its_last_id(self):
+        with mock.patch.object(hubspot_ingest, 'SEARCH_WINDOW', 120), \
+                mock.patch.object(mock_hubspot, 'SEARCH_WINDOW', 120):
+            ingest = self.ingest(workers=2, page_size=40, partition_size=self.rows)
+            rows = list(ingest.rows())
+        self.assertEqual(ingest.stats['partitions'], 1)
+        self.assertEqual([row['Record ID'] for row in rows], self.expected_ids())
+
+
+class BackoffTest(MockApiTestCase):
+    rows = 200
+    rate = 5.0
+
+    def test_429_halves_the_rate_and_every_row_still_arrives(self):
+        ingest = self.ingest(rate=40.0, workers=2, page_size=50, partition_size=100)
+        rows = list(ingest.rows())
+        self.assertEqual([row['Record ID'] for row in rows], self.expected_ids())
+        client = ingest.client
+        self.assertGreater(self.hubspot.throttled, 0)
+        self.assertEqual(client.stats['throttled'], self.hubspot.throttled)
+        self.assertLess(client.limiter.rate, client.max_rate)
+        self.assertGreaterEqual(client.limiter.rate, hubspot_ingest.MIN_RATE)
+
+
+class WatermarkTest(MockApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        fd, self.state_file = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        os.remove(self.state_file)
+
+    def tearDown(self):
+        super().tearDown()
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
+
+    def sync(self, full=False):
+        ingest = self.ingest(workers=2, page_size=100)
+        return [row['Record ID'] for row in sync_rows(ingest, self.state_file, full)]
+
+    def test_second_sync_only_pulls_contacts_modified_since(self):
+        self.assertEqual(self.sync(), self.expected_ids())
+        watermark = load_state(self.state_file)['since']
+        self.assertEqual(self.sync(), [])
+
+        touched = self.expected_ids()[10:13]
+        self.assertEqual(self.hubspot.touch(touched, {'hubspotscore': '199'}), 3)
+        self.assertEqual(self.sync(), touched)
+        self.assertGreaterEqual(load_state(self.state_file)['since'], watermark)
+
+        ingest = self.ingest(workers=2, page_size=100)
+        rows = list(sync_rows(ingest, self.state_file))
+        self.assertEqual([row['HubSpot Score'] for row in rows], ['199'] * 3)  # overlap re-fetch
+        self.assertEqual(len(self.sync(full=True)), self.rows)
+
+    def test_watermark_is_not_saved_until_the_rows_are_consumed(self):
+        rows = sync_rows(self.ingest(workers=2, page_size=100), self.state_file)
+        next(rows)
+        rows.close()
+        self.assertFalse(os.path.exists(self.state_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+QuotaSelector: the streaming candidate pruning never changes the selection
+
+  python3 -m pytest scripts/tests/test_quota_selection.py
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quota_selection import QuotaSelector, group_of, quota_warnings  # noqa: E402
+
+
+def keep_everything(k, max_quotas, min_quotas, rows):
+    """The same selection with every row a candidate (no pruning)"""
+    selector = QuotaSelector(k, max_quotas, min_quotas)
+    for seq, row in enumerate(rows):
+        groups = tuple((d, group_of(row, d)) for d in selector.dimensions)
+        selector.groups_seen.update(groups)
+        selector.rows[seq] = (float(row['value_score']), groups, row)
+    selector.seen = len(rows)
+    return selector.select()
+
+
+def contacts(rng, count, owners='ABCDEFGH'):
+    return [{'value_score': str(rng.randint(0, 40)), 'contact_owner': rng.choice(owners),
+             'territory': rng.choice(['Northeast', 'Southeast', 'West']),
+             'specialty': rng.choice(['Periodontist', 'Oral Surgeon', 'Endodontist'])} for _ in range(count)]
+
+
+class QuotaSelectorTest(unittest.TestCase):
+
+    def check(self, k, max_quotas, min_quotas, rows):
+        selector = QuotaSelector(k, max_quotas, min_quotas)
+        for row in rows:
+            selector.add(row)
+        selected, unmet = selector.select()
+        expected, expected_unmet = keep_everything(k, max_quotas, min_quotas, rows)
+        self.assertEqual([id(row) for score, row in selected], [id(row) for score, row in expected])
+        self.assertEqual(unmet, expected_unmet)
+        return selector, selected, unmet
+
+    def test_caps_on_two_dimensions_still_fill_k(self):
+        # A row dropped by the owner cap's heap used to be gone for good, even
+        # when the territory cap then blocked the rows above it
+        rng = random.Random(35)
+        rows = contacts(rng, 400)
+        selector, selected, unmet = self.check(30, {'contact_owner': {None: 4}, 'territory': {None: 22}}, {}, rows)
+        self.assertEqual(len(selected), 30)
+        self.assertEqual(quota_warnings(selected, selector, unmet), [])
+
+    def test_matches_selection_over_every_row(self):
+        for trial in range(300):
+            rng = random.Random(trial)
+            max_quotas, min_quotas = {}, {}
+            if rng.random() < 0.8:
+                max_quotas['contact_owner'] = {None: rng.randint(0, 15)}
+            if rng.random() < 0.6:
+                max_quotas['territory'] = {None: rng.randint(1, 25), 'Northeast': rng.randint(0, 5)}
+            if rng.random() < 0.5:
+                min_quotas['specialty'] = {None: rng.randint(0, 8)}
+            if rng.random() < 0.3:
+                min_quotas['territory'] = {'Southeast': rng.randint(0, 6)}
+            with self.subTest(trial=trial):
+                self.check(rng.randint(6, 60), max_quotas, min_quotas,
+                           contacts(rng, rng.randint(1, 300), 'ABCDE'))
+
+    def test_short_selection_is_reported(self):
+        rows = contacts(random.Random(1), 200, owners='AB')
+        selector, selected, unmet = self.check(30, {'contact_owner': {None: 4}}, {}, rows)
+        self.assertEqual(len(selected), 8)
+        self.assertIn('only 8 of the 30 slots', quota_warnings(selected, selector, unmet)[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
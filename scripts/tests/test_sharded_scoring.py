@@ -0,0 +1,131 @@
+"""
+sharded_scoring.py with --local workers: the merged top K is byte-identical
+to enrich_contacts_clean.py, and a shard whose worker is killed is retried
+on another worker
+
+  python3 -m pytest scripts/tests/test_sharded_scoring.py
+"""
+
+import csv
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+import sharded_scoring  # noqa: E402
+from enrich_contacts_clean import CLEAN_FIELDNAMES  # noqa: E402
+from sharded_scoring import Coordinator, read_shards, start_local_workers, stop_local_workers  # noqa: E402
+
+ROWS = 6000  # more than the top 5,000, so the merge has to select
+SHARD_ROWS = 400
+EXPORT_COLUMNS = ['First Name', 'Last Name', 'Email', 'Phone Number', 'Mobile Phone Number', 'City',
+                  'State/Region', 'Specialty', 'HubSpot Score', 'Number of Sales Activities', 'Notes',
+                  'Contact owner', 'Create Date']
+SPECIALTIES = ['Oral Surgeon', 'periodontics', 'Prosthodontist', 'Endodontist', 'Orthodontist',
+               'General Dentist', 'Pediatric Dentist', 'Hygienist', '']
+STATES = ['NY', 'California', 'tx', 'Florida', 'IL', 'New Jersey', 'PA', 'MA', 'Ohio', 'WA', 'Georgia', '']
+NOTES = ['ready to buy Yomi ASAP', 'Interested in implants and digital workflow', 'high volume, 20+ cases per month',
+         'Asked about CEREC pricing', 'left voicemail', 'Budget approved for this quarter', '']
+OWNERS = ['Alice Smith', 'Bob Jones', 'Dan Brown', '']
+
+
+def write_export(path, rows=ROWS, seed=50):
+    """A raw export with ties, blanks and dirty numbers, as the real one has"""
+    rng = random.Random(seed)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        for i in range(rows):
+            writer.writerow([
+                rng.choice(['Maria', 'Greg', 'Li', 'Pedro', '']), rng.choice(['Patel', 'Johnson', 'Nguyen']),
+                f'c{i}@example.com' if rng.random() < 0.9 else '',
+                f'555-{i:04d}' if rng.random() < 0.5 else '', f'555-9{i:03d}' if rng.random() < 0.4 else '',
+                rng.choice(['New York', 'Miami', 'Austin', 'Chicago', '']), rng.choice(STATES),
+                rng.choice(SPECIALTIES), rng.choice([str(rng.randint(90, 200)), '', 'n/a']),
+                rng.choice([str(rng.randint(0, 80)), '']), rng.choice(NOTES), rng.choice(OWNERS),
+                rng.choice([f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 10:15',
+                            f'{rng.randint(1, 12)}/{rng.randint(1, 28)}/2023', '']),
+            ])
+
+
+def run_script(*args):
+    return subprocess.run([sys.executable, *args], cwd=SCRIPTS_DIR, check=True, capture_output=True, text=True)
+
+
+def write_top(path, top):
+    """The coordinator's output file (as run_coordinator writes it)"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CLEAN_FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(top)
+
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class ShardedScoringTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.export = os.path.join(cls.tmp, 'export.csv')
+        write_export(cls.export)
+        cls.baseline = os.path.join(cls.tmp, 'baseline.csv')
+        run_script('enrich_contacts_clean.py', '--input', cls.export, '--output', cls.baseline)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp)
+
+    def test_local_workers_match_enrich_contacts_clean(self):
+        output = os.path.join(self.tmp, 'sharded.csv')
+        result = run_script('sharded_scoring.py', 'coordinate', '--input', self.export, '--output', output,
+                            '--local', '3', '--shard-rows', str(SHARD_ROWS))
+        self.assertEqual(read_bytes(output), read_bytes(self.baseline))
+        self.assertIn(f'Enriched {ROWS:,} contacts in {ROWS // SHARD_ROWS} shards', result.stdout)
+        self.assertNotIn('retried', result.stdout)
+
+    def test_shard_of_a_killed_worker_is_retried_elsewhere(self):
+        processes, addresses = start_local_workers(3)
+        victim, victim_process = addresses[0], processes[0]
+        calls = {}
+        score = sharded_scoring.WorkerConnection.score
+
+        def score_then_kill(conn, shard, k, sketch):
+            # The victim scores one shard, then dies holding its second
+            calls[conn.address] = calls.get(conn.address, 0) + 1
+            if conn.address == victim and calls[victim] == 2:
+                victim_process.kill()
+                victim_process.wait()
+            return score(conn, shard, k, sketch)
+
+        try:
+            with mock.patch.object(sharded_scoring.WorkerConnection, 'score', score_then_kill), \
+                    mock.patch.object(sharded_scoring, 'BACKOFF', 0.01):
+                coordinator = Coordinator(addresses)
+                top = coordinator.run(read_shards([self.export], SHARD_ROWS))
+        finally:
+            stop_local_workers(processes)
+
+        self.assertEqual(calls[victim], 2)
+        self.assertGreaterEqual(coordinator.retried, 1)
+        self.assertEqual(coordinator.dropped, [victim])
+        self.assertEqual(coordinator.scored_by[victim], 1)
+        self.assertEqual(len(coordinator.merged), ROWS // SHARD_ROWS)
+        self.assertEqual(coordinator.rows, ROWS)
+        output = os.path.join(self.tmp, 'retried.csv')
+        write_top(output, top)
+        self.assertEqual(read_bytes(output), read_bytes(self.baseline))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+sqlite_store.ContactStore.load_csv on partial and unrelated CSV headers
+
+  python3 -m pytest scripts/tests/test_sqlite_store.py
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlite_store import ContactStore  # noqa: E402
+
+
+class LoadCsvTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.store = ContactStore(os.path.join(self.dir.name, 'contacts.db'))
+
+    def tearDown(self):
+        self.store.conn.close()
+        self.dir.cleanup()
+
+    def load(self, text):
+        path = os.path.join(self.dir.name, 'input.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        self.store.begin_load()
+        try:
+            return self.store.load_csv(path)
+        finally:
+            self.store.finish_load()
+
+    def rows(self):
+        return self.store.conn.execute(
+            'SELECT contact_key, email, first_name, value_score FROM contacts ORDER BY contact_key').fetchall()
+
+    def test_single_known_column_binds_whole_cells(self):
+        self.assertEqual(self.load('email,Notes\nA@x.com,hi\nb@y.com,\n'), 2)
+        self.assertEqual(self.rows(), [('a@x.com', 'A@x.com', None, None), ('b@y.com', 'b@y.com', None, None)])
+
+    def test_subset_of_columns_in_any_order(self):
+        self.load('value_score,Extra,first_name,email\n82,x,Maria,m@x.com\n,y,Greg,\n')
+        self.assertEqual(self.rows(), [('m@x.com', 'm@x.com', 'Maria', 82), ('noemail:greg||||', '', 'Greg', None)])
+
+    def test_header_without_store_columns_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.load('First Name,Email,HubSpot Score\nMaria,m@x.com,186\n')
+        self.assertEqual(self.rows(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()